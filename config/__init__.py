@@ -42,6 +42,14 @@ DEFAULT_OPENROUTER_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
 # 屏幕分享模式的原生图片输入限流配置（秒）
 NATIVE_IMAGE_MIN_INTERVAL = 1.5
 
+# 语音模式上行音频合并窗口（毫秒）：把 10ms 的处理后 PCM 合并成一帧 input_audio_buffer.append 再发送
+# 取值 40-100；0 表示不合并（每个 chunk 单独发送）
+AUDIO_UPSTREAM_COALESCE_MS = 60
+
+# TTS 句级预取：支持并行连接的后端（本地 CosyVoice）最多同时合成的句子数，按顺序播放
+# 1 表示逐句串行合成
+TTS_PREFETCH_SENTENCES = 3
+
 # 用户自定义模型配置的默认 Provider/URL/API_KEY（空字符串表示使用全局配置）
 DEFAULT_SUMMARY_MODEL_PROVIDER = ""
 DEFAULT_SUMMARY_MODEL_URL = ""
@@ -354,6 +362,8 @@ __all__ = [
     'TFLINK_UPLOAD_URL',
     'TFLINK_ALLOWED_HOSTS',
     'NATIVE_IMAGE_MIN_INTERVAL',
+    'AUDIO_UPSTREAM_COALESCE_MS',
+    'TTS_PREFETCH_SENTENCES',
     # API 和模型配置的默认值
     'DEFAULT_CORE_API_KEY',
     'DEFAULT_AUDIO_API_KEY',
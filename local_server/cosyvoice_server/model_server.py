@@ -2,16 +2,22 @@ import os
 import sys
 import asyncio
 import json
+import time
 import uuid
 import logging
+import argparse
+import threading
+from collections import deque
+
 import uvicorn
 import numpy as np
-import config
-import queue
-import torch
-from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 
+try:
+    import config
+except ImportError:
+    config = None
+
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("CosyVoice-Server")
@@ -20,35 +26,10 @@ app = FastAPI()
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 COSYVOICE_PROJECT_ROOT = os.path.join(CURRENT_DIR, "CosyVoice")
 
-# 2. 将该路径加入 Python 搜索路径
-if COSYVOICE_PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, COSYVOICE_PROJECT_ROOT)
-
-# 3. 【关键步骤】处理 third_party 依赖 (Matcha-TTS)
-# CosyVoice 内部经常引用 third_party/Matcha-TTS，如果不加这个，可能会报 "No module named 'matcha'"
-MATCHA_PATH = os.path.join(COSYVOICE_PROJECT_ROOT, "third_party", "Matcha-TTS")
-if os.path.exists(MATCHA_PATH) and MATCHA_PATH not in sys.path:
-    sys.path.insert(0, MATCHA_PATH)
-
-print(f"已添加 CosyVoice 路径: {COSYVOICE_PROJECT_ROOT}")
-
-# 4. 现在可以正常导入了
-try:
-    from cosyvoice.cli.cosyvoice import CosyVoice3
-    from cosyvoice.utils.file_utils import load_wav
-except ImportError as e:
-    logger.error(f"导入失败: {e}")
-    sys.exit(1)
-
 MODEL_DIR = os.path.join(COSYVOICE_PROJECT_ROOT, "pretrained_models/Fun-CosyVoice3-0.5B")
 # 或者如果你把模型拷到了 Lanlan 下面：
 # MODEL_DIR = "pretrained_models/Fun-CosyVoice3-0.5B"
 
-
-logger.info("正在加载 CosyVoice3 模型，请稍候...")
-cosyvoice_model = CosyVoice3(MODEL_DIR, fp16=False)
-logger.info("CosyVoice3 模型加载完成！")
-
 # 默认参考音频配置
 PROMPT_WAV_PATH = os.path.join(COSYVOICE_PROJECT_ROOT, "asset/sft_longwan_zh.wav")
 PROMPT_TEXT = "希望你以后能够做得比我还好呦。"
@@ -56,81 +37,290 @@ PROMPT_TEXT = "希望你以后能够做得比我还好呦。"
 # PROMPT_WAV_PATH = os.path.join(COSYVOICE_PROJECT_ROOT, "asset/Angry_ZH_prompt.wav")
 # PROMPT_TEXT = "刚才还好好的，一眨眼又消失了，真的是要气死我了。。"
 
-try:
-    if os.path.exists(PROMPT_WAV_PATH):
-        logger.info(f"正在加载参考音频: {PROMPT_WAV_PATH}")
-        # 这里只加载一次作为全局默认，实际推理中可能会被锁住，但在单线程模型下没问题
-        # 注意：CosyVoice 内部推理是无状态的，但显存是共享的
-    else:
-        logger.critical(f'找不到必须的参考音频: {PROMPT_WAV_PATH}')
-except Exception as e:
-    logger.critical(f"加载参考音频失败: {e}")
-
-# 创建全局线程池，用于运行阻塞的模型推理
-executor = ThreadPoolExecutor(max_workers=2)
+# 调度参数（环境变量可覆盖）
+# 每次向客户端发送的音频块时长（毫秒），0 表示模型产出多少发多少
+CHUNK_MS = int(os.getenv("COSYVOICE_CHUNK_MS", "100"))
+# 同一批前向中最多推进的请求数
+MAX_BATCH = int(os.getenv("COSYVOICE_MAX_BATCH", "8"))
+# 设为 1 时使用桩模型（不加载 CosyVoice，用于压测调度与网络路径）
+USE_STUB_MODEL = os.getenv("COSYVOICE_STUB", "0") == "1"
 
 
-def create_response(action, task_id, payload=None):
-    return {
-        "header": {
-            "action": action,
-            "task_id": task_id,
-            "event_id": str(uuid.uuid4())
-        },
-        "payload": payload or {}
-    }
-
-def generator(input_queue: queue.Queue):
+class CosyVoiceBackend:
     """
-    【核心组件】
-    这是一个运行在推理线程中的同步生成器。
-    它不断从 input_queue 获取文本，并 yield 给 CosyVoice。
+    CosyVoice3 推理后端。
+    每段文本对应一个 inference_zero_shot 流式生成器；step() 在调度线程中让批内每个流各前进一次前向，
+    所有请求共用同一个推理线程，避免多线程抢占 CPU。
     """
-    while True:
-        # 阻塞等待新文本
-        text = input_queue.get()
-        if text is None:  # 结束信号
-            break
 
-        # 只有非空文本才 yield，避免空转
-        if text.strip():
-            logger.debug(f"Bridge yielding text: {text}")
-            yield text
+    def __init__(self):
+        # 将 CosyVoice 项目路径加入 Python 搜索路径
+        if COSYVOICE_PROJECT_ROOT not in sys.path:
+            sys.path.insert(0, COSYVOICE_PROJECT_ROOT)
 
+        # 处理 third_party 依赖 (Matcha-TTS)
+        # CosyVoice 内部经常引用 third_party/Matcha-TTS，如果不加这个，可能会报 "No module named 'matcha'"
+        matcha_path = os.path.join(COSYVOICE_PROJECT_ROOT, "third_party", "Matcha-TTS")
+        if os.path.exists(matcha_path) and matcha_path not in sys.path:
+            sys.path.insert(0, matcha_path)
 
-def inference_loop(input_queue: queue.Queue, output_queue: asyncio.Queue, loop):
-    """
-    运行在 ThreadPoolExecutor 中的阻塞函数
-    """
-    try:
-        # 调用 inference_zero_shot，传入 generator
-        logger.info("后台推理线程启动，等待输入流...")
+        print(f"已添加 CosyVoice 路径: {COSYVOICE_PROJECT_ROOT}")
 
-        # 注意：这里 prompt_speech_16k 需要实时加载或者传入，这里为了简化使用全局加载
-        # 实际生产中建议每次从文件读取或传入 buffer
-        prompt_speech_16k = load_wav(PROMPT_WAV_PATH, 16000)
+        try:
+            from cosyvoice.cli.cosyvoice import CosyVoice3
+            from cosyvoice.utils.file_utils import load_wav
+        except ImportError as e:
+            logger.error(f"导入失败: {e}")
+            sys.exit(1)
+
+        logger.info("正在加载 CosyVoice3 模型，请稍候...")
+        self.model = CosyVoice3(MODEL_DIR, fp16=False)
+        logger.info("CosyVoice3 模型加载完成！")
+        self.sample_rate = self.model.sample_rate
+
+        if not os.path.exists(PROMPT_WAV_PATH):
+            logger.critical(f'找不到必须的参考音频: {PROMPT_WAV_PATH}')
+        logger.info(f"正在加载参考音频: {PROMPT_WAV_PATH}")
+        # 参考音频只加载一次，所有请求共用
+        self.prompt_speech_16k = load_wav(PROMPT_WAV_PATH, 16000)
 
-        model_output_gen = cosyvoice_model.inference_zero_shot(
-            tts_text=generator(input_queue),  # <--- 关键：传入生成器
+    def new_stream(self, text):
+        return self.model.inference_zero_shot(
+            tts_text=text,
             prompt_text=PROMPT_TEXT,
-            prompt_wav=prompt_speech_16k,
+            prompt_wav=self.prompt_speech_16k,
             stream=True
         )
 
-        for i in model_output_gen:
-            tts_speech = i['tts_speech']
-            audio_data = (tts_speech.numpy() * 32768).astype(np.int16).tobytes()
+    def step(self, streams):
+        """返回每个流本次产出的 float32 音频，流结束或推理出错时为 None（只结束出错的那一段）"""
+        outputs = []
+        for stream in streams:
+            try:
+                outputs.append(next(stream)['tts_speech'].numpy().reshape(-1))
+            except StopIteration:
+                outputs.append(None)
+            except Exception as e:
+                logger.error(f"推理异常，结束当前文本段: {e}")
+                outputs.append(None)
+        return outputs
+
+
+class StubBackend:
+    """
+    桩模型：不做真实推理，按文本长度产出正弦音频。
+    一次 step 的耗时 = base_cost + item_cost * 批大小，模拟批量前向对固定开销的摊薄。
+    """
 
-            # 将音频数据放入 asyncio 队列，发送给主线程
-            # run_coroutine_threadsafe 是必须的，因为我们在普通线程里操作 async 队列
-            asyncio.run_coroutine_threadsafe(output_queue.put(audio_data), loop)
+    def __init__(self, sample_rate=22050, seconds_per_char=0.2, step_audio_ms=200,
+                 base_cost_ms=30.0, item_cost_ms=4.0):
+        self.sample_rate = sample_rate
+        self.seconds_per_char = seconds_per_char
+        self.step_samples = sample_rate * step_audio_ms // 1000
+        self.base_cost = base_cost_ms / 1000.0
+        self.item_cost = item_cost_ms / 1000.0
+
+    def new_stream(self, text):
+        return {"remaining": int(len(text.strip()) * self.seconds_per_char * self.sample_rate), "phase": 0}
+
+    def step(self, streams):
+        time.sleep(self.base_cost + self.item_cost * len(streams))
+        outputs = []
+        for stream in streams:
+            n = min(self.step_samples, stream["remaining"])
+            if n <= 0:
+                outputs.append(None)
+                continue
+            t = np.arange(stream["phase"], stream["phase"] + n) / self.sample_rate
+            outputs.append((0.2 * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32))
+            stream["phase"] += n
+            stream["remaining"] -= n
+        return outputs
+
+
+class SynthesisRequest:
+    """一个连接的合成请求：文本分段按顺序合成，音频按 chunk_samples 切块后投递到事件循环"""
+
+    def __init__(self, loop, sample_rate, chunk_samples):
+        self.id = str(uuid.uuid4())
+        self.loop = loop
+        self.sample_rate = sample_rate
+        self.chunk_samples = chunk_samples
+        self.output = asyncio.Queue()
+        self.segments = deque()  # 待合成文本，None 表示输入结束
+        self.stream = None
+        self.cancelled = False
+        self._pending = np.zeros(0, dtype=np.int16)
+        # 指标
+        self.created_at = time.perf_counter()
+        self.first_audio_at = None
+        self.compute_seconds = 0.0
+        self.audio_samples = 0
+
+    def has_work(self):
+        return self.stream is not None or (bool(self.segments) and self.segments[0] is not None)
+
+    def input_finished(self):
+        return self.stream is None and bool(self.segments) and self.segments[0] is None
+
+    def _deliver(self, item):
+        self.loop.call_soon_threadsafe(self.output.put_nowait, item)
+
+    def emit(self, audio):
+        """模型输出的 float32 音频转 int16，按配置的块大小发送"""
+        if audio is None or len(audio) == 0:
+            return
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        self.audio_samples += len(pcm)
+        if self.first_audio_at is None:
+            self.first_audio_at = time.perf_counter()
+        if self.chunk_samples <= 0:
+            self._deliver(pcm.tobytes())
+            return
+        if len(self._pending):
+            pcm = np.concatenate([self._pending, pcm])
+        full = len(pcm) - len(pcm) % self.chunk_samples
+        for start in range(0, full, self.chunk_samples):
+            self._deliver(pcm[start:start + self.chunk_samples].tobytes())
+        self._pending = pcm[full:]
+
+    def finish(self):
+        if len(self._pending):
+            self._deliver(self._pending.tobytes())
+            self._pending = self._pending[:0]
+        self._deliver(None)
+
+    def abort(self):
+        """取消：丢弃未满一块的音频，只投递结束标记，让发送循环退出"""
+        self._pending = self._pending[:0]
+        self._deliver(None)
+
+    def metrics(self):
+        audio_seconds = self.audio_samples / self.sample_rate
+        return {
+            "audio_seconds": round(audio_seconds, 3),
+            "compute_seconds": round(self.compute_seconds, 3),
+            "rtf": round(self.compute_seconds / audio_seconds, 4) if audio_seconds > 0 else None,
+            "first_audio_ms": round((self.first_audio_at - self.created_at) * 1000, 1) if self.first_audio_at else None,
+        }
+
+
+class BatchScheduler:
+    """
+    批调度器：所有连接的合成请求由一个推理线程统一推进。
+    每一轮从有待合成内容的请求中轮转取出最多 MAX_BATCH 个，调用一次 backend.step() 推进一批，
+    本轮耗时按批大小平摊计入各请求的计算时间（用于 RTF 统计）。
+    """
 
-    except Exception as e:
-        logger.error(f"推理线程异常: {e}")
-    finally:
-        # 发送结束信号给输出队列
-        asyncio.run_coroutine_threadsafe(output_queue.put(None), loop)
-        logger.info("后台推理线程结束")
+    def __init__(self, backend, max_batch=MAX_BATCH, chunk_ms=CHUNK_MS):
+        self.backend = backend
+        self.max_batch = max(1, max_batch)
+        self.chunk_samples = backend.sample_rate * chunk_ms // 1000
+        self._active = deque()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="cosyvoice-scheduler", daemon=True)
+        self._thread.start()
+        self.batches = 0
+        self.batched_items = 0
+
+    def open(self, loop):
+        request = SynthesisRequest(loop, self.backend.sample_rate, self.chunk_samples)
+        with self._cond:
+            self._active.append(request)
+        return request
+
+    def add_text(self, request, text):
+        if not text or not text.strip():
+            return
+        with self._cond:
+            request.segments.append(text)
+            self._cond.notify()
+
+    def finish(self, request):
+        with self._cond:
+            request.segments.append(None)
+            self._cond.notify()
+
+    def cancel(self, request):
+        with self._cond:
+            request.cancelled = True
+            self._cond.notify()
+
+    def _next_batch(self):
+        """在锁内调用：清理已结束/取消的请求，返回本轮要推进的请求"""
+        batch = []
+        waiting = deque()
+        for request in self._active:
+            if request.cancelled:
+                request.abort()
+                continue
+            if request.input_finished():
+                request.finish()
+                logger.info(f"请求 {request.id[:8]} 完成: {request.metrics()}")
+                continue
+            if len(batch) < self.max_batch and request.has_work():
+                if request.stream is None:
+                    request.stream = self.backend.new_stream(request.segments.popleft())
+                batch.append(request)
+            else:
+                waiting.append(request)
+        # 轮转：本轮被选中的请求排到队尾，下一轮优先推进其余请求
+        waiting.extend(batch)
+        self._active = waiting
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batch = self._next_batch()
+                while not batch:
+                    self._cond.wait()
+                    batch = self._next_batch()
+            start = time.perf_counter()
+            try:
+                outputs = self.backend.step([request.stream for request in batch])
+            except Exception as e:
+                # 后端通常在 step 内按流处理异常；这里兜底整个批次失败的情况
+                logger.error(f"推理异常: {e}")
+                outputs = [None] * len(batch)
+            share = (time.perf_counter() - start) / len(batch)
+            self.batches += 1
+            self.batched_items += len(batch)
+            for request, audio in zip(batch, outputs):
+                request.compute_seconds += share
+                if audio is None:
+                    request.stream = None
+                else:
+                    request.emit(audio)
+
+    def stats(self):
+        return {
+            "active": len(self._active),
+            "batches": self.batches,
+            "avg_batch": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+scheduler = None
+
+
+@app.on_event("startup")
+async def startup():
+    global scheduler
+    backend = StubBackend() if USE_STUB_MODEL else CosyVoiceBackend()
+    scheduler = BatchScheduler(backend)
+    logger.info(f"调度器已启动: backend={type(backend).__name__}, max_batch={scheduler.max_batch}, chunk_ms={CHUNK_MS}")
+
+
+def create_response(action, task_id, payload=None):
+    return {
+        "header": {
+            "action": action,
+            "task_id": task_id,
+            "event_id": str(uuid.uuid4())
+        },
+        "payload": payload or {}
+    }
 
 
 @app.websocket("/api/v1/ws/cosyvoice")
@@ -138,85 +328,119 @@ async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     logger.info("🔗 客户端已连接 (Bistream Mode)")
 
-    # 每个连接独立的队列
-    input_queue = queue.Queue()  # 主线程 -> 推理线程 (传文本)
-    output_queue = asyncio.Queue()  # 推理线程 -> 主线程 (传音频)
-
-    loop = asyncio.get_running_loop()
-    task_id = str(uuid.uuid4())
+    request = scheduler.open(asyncio.get_running_loop())
+    task_id = request.id
 
-    # 1. 启动后台推理线程
-    # 这是一个长期运行的任务，直到连接断开或收到结束信号
-    inference_future = loop.run_in_executor(
-        executor,
-        inference_loop,
-        input_queue,
-        output_queue,
-        loop
-    )
-
-    # 2. 定义接收循环 (从 WS 收文本)
+    # 接收循环 (从 WS 收文本)，每段文本进入调度器排队合成
     async def receive_task():
         try:
             while True:
                 data = await websocket.receive_text()
-                request = json.loads(data)
-                action = request.get("header", {}).get("action")
+                message = json.loads(data)
+                action = message.get("header", {}).get("action")
 
                 if action == "run-task":
                     # 获取增量文本
-                    payload = request.get("payload", {})
+                    payload = message.get("payload", {})
                     text = payload.get("input", {}).get("text", "")
-                    if text:
-                        # 放入同步队列，供后台线程消费
-                        input_queue.put(text)
+                    scheduler.add_text(request, text)
 
                 elif action == "finish-task":
                     # 客户端通知说话结束
-                    input_queue.put(None)
+                    scheduler.finish(request)
                     break
         except WebSocketDisconnect:
             logger.warning("接收循环检测到断开")
-            input_queue.put(None)  # 确保推理线程退出
+            scheduler.cancel(request)
         except Exception as e:
             logger.error(f"接收循环错误: {e}")
-            input_queue.put(None)
+            scheduler.cancel(request)
 
-    # 3. 定义发送循环 (往 WS 发音频)
+    # 发送循环 (往 WS 发音频)
     async def send_task():
         try:
             # 先发一个 task-started
             await websocket.send_text(json.dumps(create_response("task-started", task_id)))
 
             while True:
-                # 等待推理线程产生的音频
-                audio_data = await output_queue.get()
-
-                if audio_data is None:  # 推理结束信号
+                audio_data = await request.output.get()
+                if audio_data is None:  # 合成结束
                     break
-
                 await websocket.send_bytes(audio_data)
+            if request.cancelled:  # 客户端已断开
+                return
 
-            # 发送 task-finished
-            await websocket.send_text(json.dumps(create_response("task-finished", task_id)))
+            # 发送 task-finished，附带本次请求的 RTF 等指标
+            await websocket.send_text(json.dumps(create_response("task-finished", task_id, request.metrics())))
 
         except Exception as e:
             logger.error(f"发送循环错误: {e}")
 
-    # 4. 并发运行接收和发送
-    # gather 会等待两个任务都结束
-    # 注意：通常 send_task 会在 output_queue 收到 None 时结束
-    # 而 receive_task 会在 WebSocket 断开时结束
     try:
         await asyncio.gather(receive_task(), send_task())
     except Exception as e:
         logger.error(f"主处理逻辑异常: {e}")
     finally:
         logger.info("连接关闭，清理资源")
-        # 确保队列里有 None 以防线程卡住
-        input_queue.put(None)
+        scheduler.cancel(request)
+
+
+@app.websocket("/v1/audio/speech/stream")
+async def speech_stream_endpoint(websocket: WebSocket):
+    """
+    OpenAI 兼容 bistream 接口（main_logic/tts_client.local_cosyvoice_worker 与 test_ws_client.py 使用）：
+    config -> {"text": ...}* -> {"event": "end"}，服务器返回 PCM16 音频块，
+    结束时发送 {"event": "finished", ...指标} 后关闭连接。
+    """
+    await websocket.accept()
+    request = scheduler.open(asyncio.get_running_loop())
+
+    async def receive_task():
+        try:
+            await websocket.receive_text()  # config：voice/speed 由服务器端参考音频决定，此处不使用
+            while True:
+                message = json.loads(await websocket.receive_text())
+                if message.get("event") == "end":
+                    scheduler.finish(request)
+                    break
+                scheduler.add_text(request, message.get("text", ""))
+        except WebSocketDisconnect:
+            scheduler.cancel(request)
+        except Exception as e:
+            logger.error(f"接收循环错误: {e}")
+            scheduler.cancel(request)
+
+    async def send_task():
+        try:
+            while True:
+                audio_data = await request.output.get()
+                if audio_data is None:
+                    break
+                await websocket.send_bytes(audio_data)
+            if request.cancelled:  # 客户端已断开
+                return
+            await websocket.send_text(json.dumps({"event": "finished", **request.metrics()}))
+            await websocket.close()
+        except Exception as e:
+            logger.error(f"发送循环错误: {e}")
+
+    try:
+        await asyncio.gather(receive_task(), send_task())
+    finally:
+        scheduler.cancel(request)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "scheduler": scheduler.stats() if scheduler else None}
 
 
 if __name__ == "__main__":
-    # 启动服务，端口 8000
-    uvicorn.run(app, host=config.SERVER_HOST, port=config.SERVER_PORT)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="CosyVoice WebSocket TTS server")
+    parser.add_argument("--host", type=str, default=getattr(config, "SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=getattr(config, "SERVER_PORT", 50000))
+    parser.add_argument("--stub", action="store_true", help="使用桩模型（压测调度与网络路径，不加载 CosyVoice）")
+    args = parser.parse_args()
+    if args.stub:
+        USE_STUB_MODEL = True
+    uvicorn.run(app, host=args.host, port=args.port)
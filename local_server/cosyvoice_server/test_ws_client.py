@@ -8,14 +8,22 @@ Usage:
     
 Example:
     python test_ws_client.py --url ws://localhost:50000/v1/audio/speech/stream
+
+Load test (p50/p95 time-to-first-audio at 1/4/16 concurrent speakers):
+    python test_ws_client.py --mode load --concurrency 1,4,16
+    python test_ws_client.py --mode load --spawn-stub   # starts model_server.py --stub on --url's port
 """
 
 import asyncio
 import json
 import argparse
+import os
+import subprocess
+import sys
 import wave
 import time
 from typing import Optional
+from urllib.parse import urlparse
 
 try:
     import websockets
@@ -222,6 +230,109 @@ async def run_test_suite(url: str, voice: str, speed: float, language: Optional[
             print(f"    - Error: {result['error']}")
 
 
+LOAD_TEST_SENTENCES = [
+    "你好呀，今天过得怎么样？",
+    "我刚刚整理了一下房间，",
+    "现在想和你一起听首歌。",
+]
+
+
+def _percentile(values: list[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _load_session(url: str, voice: str, speed: float, text_chunks: list[str]) -> dict:
+    """One speaker: send all sentences then end, return time-to-first-audio and server-side metrics."""
+    result = {"ttfa": None, "audio_bytes": 0, "server": None, "error": None}
+    try:
+        async with websockets.connect(url) as ws:
+            await ws.send(json.dumps({"voice": voice, "speed": speed}))
+            start = time.perf_counter()
+            for chunk in text_chunks:
+                await ws.send(json.dumps({"text": chunk}))
+            await ws.send(json.dumps({"event": "end"}))
+            try:
+                async for msg in ws:
+                    if isinstance(msg, bytes):
+                        if result["ttfa"] is None:
+                            result["ttfa"] = time.perf_counter() - start
+                        result["audio_bytes"] += len(msg)
+                    else:
+                        event = json.loads(msg)
+                        if event.get("event") == "finished":
+                            result["server"] = event
+            except websockets.exceptions.ConnectionClosed:
+                pass
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+async def run_load_test(url: str, voice: str, speed: float, concurrency_levels: list[int], rounds: int) -> list[dict]:
+    """Run `rounds` waves of N simultaneous speakers per level and report TTFA percentiles and RTF."""
+    print("=" * 60)
+    print("CosyVoice WebSocket Load Test")
+    print("=" * 60)
+    summaries = []
+    for n in concurrency_levels:
+        sessions = []
+        wall_start = time.perf_counter()
+        for _ in range(rounds):
+            sessions += await asyncio.gather(*(
+                _load_session(url, voice, speed, LOAD_TEST_SENTENCES) for _ in range(n)
+            ))
+        wall = time.perf_counter() - wall_start
+        ttfas = [s["ttfa"] * 1000 for s in sessions if s["ttfa"] is not None]
+        rtfs = [s["server"]["rtf"] for s in sessions if s["server"] and s["server"].get("rtf") is not None]
+        errors = [s["error"] for s in sessions if s["error"]]
+        summary = {
+            "concurrency": n,
+            "sessions": len(sessions),
+            "errors": len(errors),
+            "ttfa_p50_ms": _percentile(ttfas, 50),
+            "ttfa_p95_ms": _percentile(ttfas, 95),
+            "rtf_mean": sum(rtfs) / len(rtfs) if rtfs else None,
+            "wall_seconds": wall,
+        }
+        summaries.append(summary)
+        p50 = f"{summary['ttfa_p50_ms']:.1f}" if ttfas else "-"
+        p95 = f"{summary['ttfa_p95_ms']:.1f}" if ttfas else "-"
+        rtf = f"{summary['rtf_mean']:.3f}" if rtfs else "-"
+        print(f"  N={n:<3} sessions={len(sessions):<4} errors={len(errors):<3} "
+              f"TTFA p50={p50}ms p95={p95}ms  RTF={rtf}  wall={wall:.2f}s")
+        if errors:
+            print(f"    - first error: {errors[0]}")
+    return summaries
+
+
+def _spawn_stub_server(url: str) -> subprocess.Popen:
+    """Start model_server.py with the stub model on the URL's host/port and wait until it accepts connections."""
+    parsed = urlparse(url)
+    server = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_server.py")
+    proc = subprocess.Popen(
+        [sys.executable, server, "--stub", "--host", parsed.hostname or "127.0.0.1", "--port", str(parsed.port or 50000)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    async def wait_ready():
+        deadline = time.perf_counter() + 30
+        while time.perf_counter() < deadline:
+            try:
+                async with websockets.connect(url):
+                    return
+            except (OSError, websockets.exceptions.WebSocketException):
+                await asyncio.sleep(0.2)
+        raise RuntimeError(f"stub server did not start on {url}")
+
+    asyncio.run(wait_ready())
+    return proc
+
+
 async def run_interactive(url: str, voice: str, speed: float, language: Optional[str]):
     """Run interactive mode where user can type text."""
     print("=" * 60)
@@ -284,15 +395,33 @@ def main():
                         help="Speech speed")
     parser.add_argument("--language", type=str, default=None,
                         help="Language tag (e.g., 'zh', 'en')")
-    parser.add_argument("--mode", type=str, choices=["test", "interactive"], default="test",
-                        help="Mode: 'test' for automated tests, 'interactive' for manual input")
+    parser.add_argument("--mode", type=str, choices=["test", "interactive", "load"], default="test",
+                        help="Mode: 'test' for automated tests, 'interactive' for manual input, 'load' for concurrency load test")
     parser.add_argument("--sample-rate", type=int, default=22050,
                         help="Sample rate for saving WAV files")
+    parser.add_argument("--concurrency", type=str, default="1,4,16",
+                        help="Load mode: comma-separated numbers of concurrent speakers")
+    parser.add_argument("--rounds", type=int, default=5,
+                        help="Load mode: waves of concurrent speakers per level")
+    parser.add_argument("--spawn-stub", action="store_true",
+                        help="Load mode: start model_server.py --stub for the duration of the test")
     
     args = parser.parse_args()
     
     if args.mode == "test":
         asyncio.run(run_test_suite(args.url, args.voice, args.speed, args.language, args.sample_rate))
+    elif args.mode == "load":
+        levels = [int(n) for n in args.concurrency.split(",") if n.strip()]
+        proc = _spawn_stub_server(args.url) if args.spawn_stub else None
+        try:
+            asyncio.run(run_load_test(args.url, args.voice, args.speed, levels, args.rounds))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
     else:
         asyncio.run(run_interactive(args.url, args.voice, args.speed, args.language))
 
@@ -9,15 +9,17 @@ import struct  # For packing audio data
 import re
 import logging
 import time
+from collections import deque
 from datetime import datetime
 from websockets import exceptions as web_exceptions
 from fastapi import WebSocket, WebSocketDisconnect
 from utils.frontend_utils import contains_chinese, replace_blank, replace_corner_mark, remove_bracket, \
     is_only_punctuation
-from utils.screenshot_utils import process_screen_data
+from utils.screenshot_utils import process_screen_frame
 from main_logic.omni_realtime_client import OmniRealtimeClient
 from main_logic.omni_offline_client import OmniOfflineClient
-from main_logic.tts_client import get_tts_worker
+from main_logic.tts_client import get_tts_worker, TTSSentenceSegmenter
+from main_logic.tts_transport import TTSResponseRing
 from config import MEMORY_SERVER_PORT
 from utils.config_manager import get_config_manager
 from utils.language_utils import normalize_language_code
@@ -31,6 +33,11 @@ import httpx
 # Setup logger for this module
 logger = logging.getLogger(__name__)
 
+# 下行语音二进制帧（与 static/app.js 中 decodeSpeechFrame 保持一致），小端：
+# u8 version | u8 flags(保留) | u16 speech_id 字节长度 | speech_id(utf-8) | 音频数据(PCM16 48kHz 或 OGG OPUS)
+_SPEECH_FRAME_HEADER = struct.Struct('<BBH')
+_SPEECH_FRAME_VERSION = 1
+
 # --- 一个带有定期上下文压缩+在线热切换的语音会话管理器 ---
 class LLMSessionManager:
     def __init__(self, sync_message_queue, lanlan_name, lanlan_prompt):
@@ -42,8 +49,9 @@ class LLMSessionManager:
         self.active_session_is_idle = False
         self.current_expression = None
         self.tts_request_queue = Queue()  # TTS request (线程队列)
-        self.tts_response_queue = Queue()  # TTS response (线程队列)
+        self.tts_response_queue = TTSResponseRing(speech_id_getter=lambda: self.current_speech_id)  # TTS response (SPSC 环形缓冲区，事件驱动读取)
         self.tts_thread = None  # TTS线程
+        self.tts_segmenter = TTSSentenceSegmenter()  # 文本增量按句切分后再送入 tts_request_queue
         # 流式音频重采样器（24kHz→48kHz）- 维护内部状态避免 chunk 边界不连续
         self.audio_resampler = soxr.ResampleStream(24000, 48000, 1, dtype='float32')
         self.lock = asyncio.Lock()  # 使用异步锁替代同步锁
@@ -130,7 +138,7 @@ class LLMSessionManager:
         
         # TTS缓存机制：确保不丢包
         self.tts_ready = False  # TTS是否完全就绪
-        self.tts_pending_chunks = []  # 待处理的TTS文本chunk: [(speech_id, text), ...]
+        self.tts_pending_chunks = []  # 待处理的TTS文本chunk: [(speech_id, text), ...]，text 为 None 表示回复结束
         self.tts_cache_lock = asyncio.Lock()  # 保护缓存的锁
         
         # 输入数据缓存机制：确保session初始化期间的输入不丢失
@@ -138,6 +146,19 @@ class LLMSessionManager:
         self.pending_input_data = []  # 待处理的输入数据: [message_dict, ...]
         self.input_cache_lock = asyncio.Lock()  # 保护输入缓存的锁
         
+        # 输入流水线：WebSocket 收到的 stream_data 进入有界队列，由单个消费协程按序处理
+        # 队列满时丢弃最旧的音频chunk（文本/图片不丢弃），上游限流时延迟保持有界
+        self.INPUT_QUEUE_MAX = 200  # 约 2 秒的 10ms 音频
+        self._input_queue = deque()  # [(enqueued_at, message), ...]
+        self._input_queue_event = asyncio.Event()
+        self._input_consumer_task = None
+        self._input_stats = {'enqueued': 0, 'dropped': 0, 'max_depth': 0, 'stages': {}}
+        
+        # 输出流水线：TTS chunk 按 speech_id 合并为 60~120ms 的帧再发送，减少前端 WebSocket 消息数
+        self.SPEECH_FRAME_MIN_BYTES = 60 * 96  # 48kHz PCM16 每毫秒 96 字节
+        self.SPEECH_FRAME_MAX_BYTES = 120 * 96
+        self.SPEECH_COALESCE_WAIT = 0.04  # 不足最小帧长时最多等待后续 chunk 的时间（秒）
+        
         # 热切换音频缓存机制：确保热切换期间的用户输入语音不丢失
         self.hot_swap_audio_cache = []  # 热切换期间缓存的音频数据: [bytes, ...]
         self.hot_swap_cache_lock = asyncio.Lock()  # 保护热切换音频缓存的锁
@@ -163,12 +184,9 @@ class LLMSessionManager:
         self.audio_resampler.clear()
         if self.use_tts and self.tts_thread and self.tts_thread.is_alive():
             # 清空响应队列中待发送的音频数据
-            while not self.tts_response_queue.empty():
-                try:
-                    self.tts_response_queue.get_nowait()
-                except: # noqa
-                    break
+            self.tts_response_queue.clear()
             # 发送终止信号以清空TTS请求队列并停止当前合成
+            self.tts_segmenter.reset()
             try:
                 self.tts_request_queue.put((None, None))
             except Exception as e:
@@ -195,11 +213,7 @@ class LLMSessionManager:
             
             if self.tts_thread and self.tts_thread.is_alive():
                 # 清空响应队列中待发送的音频数据
-                while not self.tts_response_queue.empty():
-                    try:
-                        self.tts_response_queue.get_nowait()
-                    except: # noqa
-                        break
+                self.tts_response_queue.clear()
         
         # 文本模式下，无论是否使用TTS，都要发送文本到前端显示
         await self.send_lanlan_response(text, is_first_chunk)
@@ -211,7 +225,7 @@ class LLMSessionManager:
                 if self.tts_ready and self.tts_thread and self.tts_thread.is_alive():
                     # TTS已就绪，直接发送
                     try:
-                        self.tts_request_queue.put((self.current_speech_id, text))
+                        self._put_tts_text(self.current_speech_id, text)
                     except Exception as e:
                         logger.warning(f"⚠️ 发送TTS请求失败: {e}")
                 else:
@@ -231,10 +245,15 @@ class LLMSessionManager:
         
         if self.use_tts and self.tts_thread and self.tts_thread.is_alive():
             logger.info("📨 Response complete (LLM 回复结束)")
-            try:
-                self.tts_request_queue.put((None, None))
-            except Exception as e:
-                logger.warning(f"⚠️ 发送TTS结束信号失败: {e}")
+            async with self.tts_cache_lock:
+                if self.tts_ready:
+                    try:
+                        self._put_tts_response_end()
+                    except Exception as e:
+                        logger.warning(f"⚠️ 发送TTS结束信号失败: {e}")
+                else:
+                    # TTS未就绪：结束标记排在已缓存的文本之后，待缓存送入分句器后再 flush
+                    self.tts_pending_chunks.append((self.current_speech_id, None))
         self.sync_message_queue.put({'type': 'system', 'data': 'turn end'})
         
         # 直接向前端发送turn end消息
@@ -309,7 +328,7 @@ class LLMSessionManager:
                 resampled_float = self.audio_resampler.resample_chunk(audio_float)
                 audio = (resampled_float * 32767.0).clip(-32768, 32767).astype(np.int16)
 
-                await self.send_speech(audio.tobytes())
+                await self.send_speech(audio.tobytes(), self.current_speech_id)
                 # 你可以根据需要加上格式、isNewMessage等标记
                 # await self.websocket.send_json({"type": "cozy_audio", "format": "blob", "isNewMessage": True})
             else:
@@ -360,7 +379,7 @@ class LLMSessionManager:
                 if self.tts_ready and self.tts_thread and self.tts_thread.is_alive():
                     # TTS已就绪，直接发送
                     try:
-                        self.tts_request_queue.put((self.current_speech_id, text))
+                        self._put_tts_text(self.current_speech_id, text)
                     except Exception as e:
                         logger.warning(f"⚠️ 发送TTS请求失败: {e}")
                 else:
@@ -521,6 +540,17 @@ class LLMSessionManager:
         self.pending_session = None  # Managed by connector's __aexit__
         self.is_hot_swap_imminent = False
 
+    def _put_tts_text(self, speech_id, text):
+        """文本增量经分句器切成完整句子后送入 TTS 请求队列，使后端可以按句预取合成"""
+        for sentence_speech_id, sentence in self.tts_segmenter.feed(speech_id, text):
+            self.tts_request_queue.put((sentence_speech_id, sentence))
+
+    def _put_tts_response_end(self):
+        """回复结束：分句器中未成句的残余文本作为最后一句送出，再发送结束信号"""
+        for speech_id, text in self.tts_segmenter.flush():
+            self.tts_request_queue.put((speech_id, text))
+        self.tts_request_queue.put((None, None))
+
     async def _flush_tts_pending_chunks(self):
         """将缓存的TTS文本chunk发送到TTS队列"""
         async with self.tts_cache_lock:
@@ -533,7 +563,10 @@ class LLMSessionManager:
             if self.tts_thread and self.tts_thread.is_alive():
                 for speech_id, text in self.tts_pending_chunks:
                     try:
-                        self.tts_request_queue.put((speech_id, text))
+                        if text is None:
+                            self._put_tts_response_end()
+                        else:
+                            self._put_tts_text(speech_id, text)
                     except Exception as e:
                         logger.error(f"💥 发送缓存的TTS请求失败: {e}")
                         break
@@ -770,7 +803,9 @@ class LLMSessionManager:
                 )
                 
                 self.tts_request_queue = Queue()  # TTS request (线程队列)
-                self.tts_response_queue = Queue()  # TTS response (线程队列)
+                # TTS response (SPSC 环形缓冲区)；音频写入时打上当时的 speech_id
+                self.tts_response_queue = TTSResponseRing(speech_id_getter=lambda: self.current_speech_id)
+                self.tts_segmenter.reset()
                 # 根据是否有自定义音色/TTS配置选择 TTS API 配置
                 if has_custom_tts:
                     tts_config = self._config_manager.get_model_api_config('tts_custom')
@@ -791,28 +826,21 @@ class LLMSessionManager:
                 start_time = time.time()
                 timeout = 8.0  # 最多等待8秒
                 
-                while time.time() - start_time < timeout:
-                    try:
-                        # 非阻塞检查队列
-                        if not self.tts_response_queue.empty():
-                            msg = self.tts_response_queue.get_nowait()
-                            # 检查是否是就绪信号
-                            if isinstance(msg, tuple) and len(msg) == 2 and msg[0] == "__ready__":
-                                tts_ready = msg[1]
-                                if tts_ready:
-                                    logger.info(f"✅ TTS进程已就绪 (用时: {time.time() - start_time:.2f}秒)")
-                                else:
-                                    logger.error("❌ TTS进程初始化失败")
-                                break
-                            else:
-                                # 不是就绪信号，放回队列
-                                self.tts_response_queue.put(msg)
-                                break
-                    except: # noqa
-                        pass
-                    
-                    # 小睡眠避免忙等
-                    await asyncio.sleep(0.05)
+                try:
+                    # 就绪信号到达时由 worker 线程唤醒，无需轮询
+                    msg = await asyncio.wait_for(self.tts_response_queue.get(), timeout=timeout)
+                    # 检查是否是就绪信号
+                    if isinstance(msg, tuple) and len(msg) == 2 and msg[0] == "__ready__":
+                        tts_ready = msg[1]
+                        if tts_ready:
+                            logger.info(f"✅ TTS进程已就绪 (用时: {time.time() - start_time:.2f}秒)")
+                        else:
+                            logger.error("❌ TTS进程初始化失败")
+                    else:
+                        # 不是就绪信号，放回队首（消费者侧，不与 worker 线程竞争写入）
+                        self.tts_response_queue.unget(msg, self.tts_response_queue.last_speech_id)
+                except asyncio.TimeoutError:
+                    pass
                 
                 if not tts_ready:
                     if time.time() - start_time >= timeout:
@@ -1362,6 +1390,92 @@ class LLMSessionManager:
         self.sync_message_queue.put({'type': 'system', 'data': 'API server disconnected'})
         await self.cleanup()
     
+    def enqueue_stream_data(self, message: dict):
+        """把 stream_data 放入有序输入队列（非阻塞，由 websocket_router 调用）"""
+        queue = self._input_queue
+        if self.is_starting_session and not self.session_ready:
+            # 启动期间消费者可能正阻塞在 start_session 上（最长数秒），此时与基线一致直接缓存输入，
+            # 由 _flush_pending_input_data 在 session 就绪后按序回放，不受队列容量限制、不丢弃
+            while queue:
+                self.pending_input_data.append(queue.popleft()[1])
+            self.pending_input_data.append(message)
+            self._input_stats['enqueued'] += 1
+            return
+        if len(queue) >= self.INPUT_QUEUE_MAX:
+            victim = next((i for i, (_, m) in enumerate(queue) if m.get("input_type") == 'audio'), None)
+            if victim is not None:
+                del queue[victim]
+                self._input_stats['dropped'] += 1
+            elif message.get("input_type") == 'audio':
+                self._input_stats['dropped'] += 1
+                return
+        queue.append((time.perf_counter(), message))
+        self._input_stats['enqueued'] += 1
+        if len(queue) > self._input_stats['max_depth']:
+            self._input_stats['max_depth'] = len(queue)
+        self._input_queue_event.set()
+        if self._input_consumer_task is None or self._input_consumer_task.done():
+            self._input_consumer_task = asyncio.create_task(self._input_consumer())
+
+    def _record_input_stage(self, stage: str, seconds: float):
+        st = self._input_stats['stages'].get(stage)
+        if st is None:
+            st = self._input_stats['stages'][stage] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        ms = seconds * 1000.0
+        st['count'] += 1
+        st['total_ms'] += ms
+        if ms > st['max_ms']:
+            st['max_ms'] = ms
+
+    async def _input_consumer(self):
+        """单消费者：按到达顺序逐条处理输入，避免每个chunk一个task导致的调度开销和乱序"""
+        queue = self._input_queue
+        while True:
+            if not queue:
+                self._input_queue_event.clear()
+                await self._input_queue_event.wait()
+                continue
+            enqueued_at, message = queue.popleft()
+            input_type = message.get("input_type") or 'unknown'
+            started = time.perf_counter()
+            self._record_input_stage(f'{input_type}.queue_wait', started - enqueued_at)
+            try:
+                await self.stream_data(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"💥 处理输入数据失败: {e}")
+            self._record_input_stage(f'{input_type}.process', time.perf_counter() - started)
+
+    def get_input_pipeline_stats(self) -> dict:
+        stages = {
+            name: {
+                'count': st['count'],
+                'avg_ms': round(st['total_ms'] / st['count'], 3) if st['count'] else 0.0,
+                'max_ms': round(st['max_ms'], 3),
+            }
+            for name, st in self._input_stats['stages'].items()
+        }
+        return {
+            'depth': len(self._input_queue),
+            'max_depth': self._input_stats['max_depth'],
+            'capacity': self.INPUT_QUEUE_MAX,
+            'enqueued': self._input_stats['enqueued'],
+            'dropped': self._input_stats['dropped'],
+            'stages': stages,
+        }
+
+    async def _stop_input_consumer(self):
+        self._input_queue.clear()
+        task = self._input_consumer_task
+        self._input_consumer_task = None
+        if task and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
     async def stream_data(self, message: dict):  # 向Core API发送Media数据
         input_type = message.get("input_type")
         
@@ -1384,13 +1498,16 @@ class LLMSessionManager:
                 logger.info(f"Session未就绪且不存在，根据输入类型 {input_type} 自动创建 session")
                 # 根据输入类型确定模式
                 mode = 'text' if input_type == 'text' else 'audio'
+                # 触发启动的这条数据也先放入缓存，session 就绪后与启动期间到达的数据一起按到达顺序回放
+                async with self.input_cache_lock:
+                    self.pending_input_data.append(message)
                 await self.start_session(self.websocket, new=False, input_mode=mode)
-                
+
                 # 检查启动是否成功
                 if not self.session or not self.is_active:
                     logger.warning("⚠️ Session启动失败，放弃本次数据流")
-                    return
-        
+                return
+
         # Session已就绪，直接处理
         await self._process_stream_data_internal(message)
     
@@ -1513,13 +1630,19 @@ class LLMSessionManager:
                     logger.error("💥 Stream: Session websocket not available")
                     return
                 try:
-                    if isinstance(data, list):
-                        audio_bytes = struct.pack(f'<{len(data)}h', *data)
+                    if isinstance(data, (list, np.ndarray)):
+                        if isinstance(data, np.ndarray):
+                            # 二进制帧：websocket_router 用 np.frombuffer 得到的 PCM16 视图，
+                            # 以字节视图零拷贝交给 AudioProcessor.process_chunk
+                            audio_bytes = memoryview(data).cast('B')
+                        else:
+                            audio_bytes = struct.pack(f'<{len(data)}h', *data)
                         
                         # 🔧 音频预处理：RNNoise降噪 + 降采样到16kHz（在缓存之前）
-                        # 检查是否为48kHz输入（480 samples = 960 bytes per 10ms chunk）
+                        # 二进制帧头携带采样率；JSON 旧协议按 chunk 大小推断（480 samples = 960 bytes per 10ms chunk）
                         num_samples = len(audio_bytes) // 2
-                        is_48khz = (num_samples == 480)
+                        sample_rate = message.get("sample_rate")
+                        is_48khz = (sample_rate == 48000) if sample_rate else (num_samples == 480)
                         
                         processed_audio = audio_bytes  # 默认使用原始音频
                         if is_48khz and isinstance(self.session, OmniRealtimeClient):
@@ -1610,13 +1733,13 @@ class LLMSessionManager:
             elif input_type in ['screen', 'camera']:
                 try:
                     # 使用统一的屏幕分享工具处理数据（只验证，不缩放）
-                    image_b64 = await process_screen_data(data)
+                    frame = await process_screen_frame(data)
                     
-                    if image_b64:
+                    if frame:
                         # 如果是文本模式（OmniOfflineClient），只存储图片，不立即发送
                         if isinstance(self.session, OmniOfflineClient):
                             # 只添加到待发送队列，等待与文本一起发送
-                            await self.session.stream_image(image_b64)
+                            await self.session.stream_image(frame.image_b64)
                         
                         # 如果是语音模式（OmniRealtimeClient），检查是否支持视觉并直接发送
                         elif isinstance(self.session, OmniRealtimeClient):
@@ -1625,8 +1748,8 @@ class LLMSessionManager:
                                 logger.error("💥 Stream: Session websocket not available")
                                 return
                             
-                            # 语音模式直接发送图片
-                            await self.session.stream_image(image_b64)
+                            # 语音模式直接发送图片（附带帧签名，静止画面由会话侧跳过）
+                            await self.session.stream_image(frame.image_b64, frame_signature=frame.signature)
                     else:
                         logger.error("💥 Stream: 屏幕数据验证失败")
                         return
@@ -1707,11 +1830,7 @@ class LLMSessionManager:
                 self.tts_request_queue.get_nowait()
         except: # noqa
             pass
-        try:
-            while not self.tts_response_queue.empty():
-                self.tts_response_queue.get_nowait()
-        except: # noqa
-            pass
+        self.tts_response_queue.clear()
         
         # 重置TTS缓存状态
         async with self.tts_cache_lock:
@@ -1744,6 +1863,7 @@ class LLMSessionManager:
                 logger.info("⏭️ cleanup 跳过：当前 websocket 已被新连接替换")
                 return
         
+        await self._stop_input_consumer()
         await self.end_session(by_server=True)
         # 清理websocket引用，防止保留失效的连接
         # 使用共享锁保护websocket操作，防止与initialize_character_data()中的restore竞争
@@ -1906,17 +2026,19 @@ class LLMSessionManager:
             logger.error(f"💥 WS Send Response Error: {e}")
 
 
-    async def send_speech(self, tts_audio):
-        """发送语音数据到前端，先发送 speech_id 头信息用于精确打断控制"""
+    async def send_speech(self, tts_audio, speech_id=None):
+        """发送语音数据到前端，speech_id 写在二进制帧头中用于精确打断控制"""
+        if speech_id is None:
+            speech_id = self.current_speech_id
         try:
             if self.websocket and hasattr(self.websocket, 'client_state') and self.websocket.client_state == self.websocket.client_state.CONNECTED:
-                # 先发送 audio_chunk 头信息，包含 speech_id
-                await self.websocket.send_json({
-                    "type": "audio_chunk",
-                    "speech_id": self.current_speech_id
-                })
-                # 然后发送二进制音频数据
-                await self.websocket.send_bytes(tts_audio)
+                speech_id_bytes = (speech_id or '').encode('utf-8')
+                frame = bytearray(_SPEECH_FRAME_HEADER.size + len(speech_id_bytes) + len(tts_audio))
+                _SPEECH_FRAME_HEADER.pack_into(frame, 0, _SPEECH_FRAME_VERSION, 0, len(speech_id_bytes))
+                offset = _SPEECH_FRAME_HEADER.size
+                frame[offset:offset + len(speech_id_bytes)] = speech_id_bytes
+                frame[offset + len(speech_id_bytes):] = tts_audio
+                await self.websocket.send_bytes(bytes(frame))
 
                 # 同步到同步服务器
                 self.sync_message_queue.put({"type": "binary", "data": tts_audio})
@@ -1926,13 +2048,40 @@ class LLMSessionManager:
             logger.error(f"💥 WS Send Response Error: {e}")
 
     async def tts_response_handler(self):
+        loop = asyncio.get_running_loop()
         while True:
-            while not self.tts_response_queue.empty():
-                data = self.tts_response_queue.get_nowait()
-                # 过滤掉就绪信号（格式为 ("__ready__", True/False)）
+            # worker 写入时唤醒，没有固定的轮询间隔
+            data = await self.tts_response_queue.get()
+            # 过滤掉就绪信号（格式为 ("__ready__", True/False)）
+            if isinstance(data, tuple) and len(data) == 2 and data[0] == "__ready__":
+                # 这是就绪信号，不是音频数据，跳过
+                continue
+            
+            # 合并同一 speech_id 的后续 chunk：已到达的直接取走，不足最小帧长时短暂等待。
+            # speech_id 取 chunk 写入队列时的值，遇到不同 speech_id 的 chunk 时放回并结束本帧
+            speech_id = self.tts_response_queue.last_speech_id
+            frame = bytearray(data)
+            deadline = loop.time() + self.SPEECH_COALESCE_WAIT
+            while len(frame) < self.SPEECH_FRAME_MAX_BYTES:
+                if self.tts_response_queue.empty():
+                    remaining = deadline - loop.time()
+                    if len(frame) >= self.SPEECH_FRAME_MIN_BYTES or remaining <= 0:
+                        break
+                    try:
+                        data = await asyncio.wait_for(self.tts_response_queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    data = self.tts_response_queue.get_nowait()
                 if isinstance(data, tuple) and len(data) == 2 and data[0] == "__ready__":
-                    # 这是就绪信号，不是音频数据，跳过
                     continue
-                await self.send_speech(data)
-            await asyncio.sleep(0.01)
+                if self.tts_response_queue.last_speech_id != speech_id:
+                    self.tts_response_queue.unget(data, self.tts_response_queue.last_speech_id)
+                    break
+                frame += data
+            
+            # chunk 写入之后发生了打断（speech_id 已更新），已合并的旧音频直接丢弃
+            if speech_id != self.current_speech_id:
+                continue
+            await self.send_speech(bytes(frame), speech_id)
 
@@ -9,10 +9,11 @@ import logging
 
 from typing import Optional, Callable, Dict, Any, Awaitable
 from enum import Enum
-from config import NATIVE_IMAGE_MIN_INTERVAL
+from config import NATIVE_IMAGE_MIN_INTERVAL, AUDIO_UPSTREAM_COALESCE_MS
 from utils.config_manager import get_config_manager
 from utils.audio_processor import AudioProcessor
 from utils.frontend_utils import calculate_text_similarity
+from utils.screenshot_utils import FrameRateController, vision_description_cache
 
 # Setup logger for this module
 logger = logging.getLogger(__name__)
@@ -78,7 +79,8 @@ class OmniRealtimeClient:
         on_status_message: Optional[Callable[[str], Awaitable[None]]] = None,
         on_repetition_detected: Optional[Callable[[], Awaitable[None]]] = None,
         extra_event_handlers: Optional[Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]]] = None,
-        api_type: Optional[str] = None
+        api_type: Optional[str] = None,
+        audio_coalesce_ms: int = AUDIO_UPSTREAM_COALESCE_MS
     ):
         self.base_url = base_url
         self.api_key = api_key
@@ -159,8 +161,8 @@ class OmniRealtimeClient:
         # Interruption state - suppress output after user interruption until next response
         self._interrupted = False  # 打断状态标志，防止重复消息块
         
-        # Native image input rate limiting
-        self._last_native_image_time = 0.0  # 上次原生图片输入时间戳
+        # Native image input rate limiting: 静止画面不重复发送，变化频繁时自适应降频
+        self._frame_controller = FrameRateController(min_interval=NATIVE_IMAGE_MIN_INTERVAL)
         
         # 防止log刷屏机制（当websocket关闭后）
         self._last_ws_none_warning_time = 0.0  # 上次websocket为None警告的时间戳
@@ -171,6 +173,13 @@ class OmniRealtimeClient:
         
         # Audio processing lock to ensure sequential processing in thread pool
         self._audio_processing_lock = asyncio.Lock()
+        
+        # 上行音频合并：处理后的 16kHz PCM 先累积到 audio_coalesce_ms 再发送一次 append，
+        # 在 VAD 结束、打断、clear_audio_buffer 时提前刷新；输入中断时由定时器兜底刷新
+        self._audio_coalesce_seconds = max(0, int(audio_coalesce_ms)) / 1000.0
+        self._audio_coalesce_bytes = int(AudioProcessor.API_SAMPLE_RATE * 2 * self._audio_coalesce_seconds) // 2 * 2
+        self._audio_out_buffer = bytearray()
+        self._audio_flush_handle = None
 
     async def process_audio_chunk_async(self, audio_chunk: bytes) -> bytes:
         """
@@ -232,8 +241,36 @@ class OmniRealtimeClient:
         """当音频处理器检测到4秒静音并重置缓存时调用。标记待发送clear事件。"""
         self._silence_reset_pending = True
     
+    def _take_audio_out_buffer(self) -> bytes:
+        if self._audio_flush_handle is not None:
+            self._audio_flush_handle.cancel()
+            self._audio_flush_handle = None
+        data = bytes(self._audio_out_buffer)
+        self._audio_out_buffer.clear()
+        return data
+
+    async def _send_audio_append(self, audio: bytes) -> None:
+        append_event = {
+            "type": "input_audio_buffer.append",
+            "audio": base64.b64encode(audio).decode()
+        }
+        await self.send_event(append_event)
+
+    async def flush_audio(self) -> None:
+        """立即发送合并缓冲中尚未发送的音频。"""
+        if not self._audio_out_buffer:
+            return
+        await self._send_audio_append(self._take_audio_out_buffer())
+
+    def _on_audio_flush_timer(self):
+        self._audio_flush_handle = None
+        if self._audio_out_buffer and self.ws:
+            asyncio.create_task(self.flush_audio())
+
     async def clear_audio_buffer(self):
         """发送 input_audio_buffer.clear 事件清空服务端缓存。"""
+        # 先把清空前的音频按序发出去，保持与不合并时相同的语义
+        await self.flush_audio()
         clear_event = {
             "type": "input_audio_buffer.clear"
         }
@@ -453,16 +490,28 @@ class OmniRealtimeClient:
                 self._silence_reset_pending = False
                 await self.clear_audio_buffer()
         
-        audio_b64 = base64.b64encode(audio_chunk).decode()
+        if self._audio_coalesce_bytes <= 0:
+            await self._send_audio_append(audio_chunk)
+            return
 
-        append_event = {
-            "type": "input_audio_buffer.append",
-            "audio": audio_b64
-        }
-        await self.send_event(append_event)
+        was_empty = not self._audio_out_buffer
+        self._audio_out_buffer += audio_chunk
+        if len(self._audio_out_buffer) >= self._audio_coalesce_bytes:
+            await self.flush_audio()
+        elif was_empty:
+            self._audio_flush_handle = asyncio.get_running_loop().call_later(
+                self._audio_coalesce_seconds, self._on_audio_flush_timer
+            )
 
-    async def _analyze_image_with_vision_model(self, image_b64: str) -> str:
+    async def _analyze_image_with_vision_model(self, image_b64: str, frame_signature=None) -> str:
         """Use VISION_MODEL to analyze image and return description."""
+        # 画面与已分析过的帧相同（或仅有微小变化）时直接复用描述，不再调用视觉模型
+        cached = vision_description_cache.get(frame_signature)
+        if cached:
+            self._image_description = f"[实时屏幕截图或相机画面]: {cached}"
+            logger.debug("Image description served from cache.")
+            self._image_recognized_this_turn = True
+            return cached
         try:
             # 使用统一的视觉分析函数
             from utils.screenshot_utils import analyze_image_with_vision_model
@@ -473,6 +522,7 @@ class OmniRealtimeClient:
             )
             
             if description:
+                vision_description_cache.put(frame_signature, description)
                 self._image_description = f"[实时屏幕截图或相机画面]: {description}"
                 logger.info("✅ Image analysis complete.")
                 self._image_recognized_this_turn = True
@@ -495,27 +545,27 @@ class OmniRealtimeClient:
                     await self.on_status_message("⚠️ 图片内容被审查系统拦截，请尝试更换图片或内容。")
             return "图片识别发生严重错误！"
     
-    async def stream_image(self, image_b64: str) -> None:
-        """Stream raw image data to the API."""
+    async def stream_image(self, image_b64: str, frame_signature=None) -> None:
+        """Stream raw image data to the API.
+
+        frame_signature 由 utils.screenshot_utils.process_screen_frame 计算，用于跳过静止画面和复用视觉描述。
+        """
 
         try:
             if '实时屏幕截图或相机画面正在分析中' in self._image_description and self.model in ['step', 'free']:
-                await self._analyze_image_with_vision_model(image_b64)
+                await self._analyze_image_with_vision_model(image_b64, frame_signature)
                 return
             
             # Check if model supports native image input
             supports_native_image = any(m in self.model for m in ["qwen", "glm", "gpt"])
-            
-            # Rate limiting for native image input
-            if supports_native_image:
-                current_time = time.time()
-                elapsed = current_time - self._last_native_image_time
-                if elapsed < NATIVE_IMAGE_MIN_INTERVAL:
-                    # Skip this image frame due to rate limiting
-                    return
-                self._last_native_image_time = current_time
 
             if self._audio_in_buffer:
+                # Rate limiting for native image input; only frames that are actually sent update the controller
+                if supports_native_image:
+                    if not self._frame_controller.should_send(frame_signature):
+                        # Skip unchanged or rate-limited image frame
+                        return
+
                 if "qwen" in self.model:
                     append_event = {
                         "type": "input_image_buffer.append" ,
@@ -562,7 +612,7 @@ class OmniRealtimeClient:
                                 }
                                 logger.info("Sending image description before recognition.")
                                 await self.send_event(text_event)
-                                await self._analyze_image_with_vision_model(image_b64)
+                                await self._analyze_image_with_vision_model(image_b64, frame_signature)
                         elif not self._image_sent_this_turn:
                             self._image_sent_this_turn = True
                             text_event = {
@@ -743,6 +793,8 @@ class OmniRealtimeClient:
                     self._output_transcript_buffer = ""
                     self._image_recognized_this_turn = False
                     self._image_sent_this_turn = False
+                    # 新一轮至少发送一次当前画面，即使画面与上一轮相同
+                    self._frame_controller.new_turn()
                     if self.on_response_done:
                         await self.on_response_done()
                 elif event_type == "response.created":
@@ -763,9 +815,11 @@ class OmniRealtimeClient:
                     self._last_speech_time = time.time()
                     if self._is_responding:
                         logger.info("Handling interruption")
+                        await self.flush_audio()
                         await self.handle_interruption()
                 elif event_type == "input_audio_buffer.speech_stopped":
                     logger.info("Speech ended")
+                    await self.flush_audio()
                     if self.on_new_message:
                         await self.on_new_message()
                     self._audio_in_buffer = False
@@ -832,6 +886,7 @@ class OmniRealtimeClient:
 
     async def close(self) -> None:
         """Close the WebSocket connection."""
+        self._take_audio_out_buffer()
         # 取消静默检测任务
         if self._silence_check_task:
             self._silence_check_task.cancel()
@@ -13,8 +13,11 @@ import io
 import wave
 import aiohttp
 import asyncio
+from collections import deque
 from functools import partial
+from config import TTS_PREFETCH_SENTENCES
 from utils.config_manager import get_config_manager
+from utils.frontend_utils import split_paragraph
 logger = logging.getLogger(__name__)
 
 
@@ -49,6 +52,38 @@ def _resample_audio(audio_int16: np.ndarray, src_rate: int, dst_rate: int,
     return resampled_int16.tobytes()
 
 
+class TTSSentenceSegmenter:
+    """
+    tts_request_queue 前的分句器：把 LLM 的文本增量攒成完整句子（utils.frontend_utils.split_paragraph）再交给 TTS worker，
+    使支持并行连接的后端可以按句预取合成。
+    
+    feed() 返回可以立即发送的 (speech_id, 句子) 列表；speech_id 变化视为打断，丢弃上一轮未成句的残余文本。
+    """
+    
+    def __init__(self, lang="zh"):
+        self.lang = lang
+        self._speech_id = None
+        self._buffer = ""
+    
+    def feed(self, speech_id, text):
+        if speech_id != self._speech_id:
+            self._speech_id = speech_id
+            self._buffer = ""
+        self._buffer += text
+        ready, self._buffer = split_paragraph(self._buffer, lang=self.lang)
+        return [(speech_id, ready)] if ready else []
+    
+    def flush(self):
+        """回复结束：残余文本不再等待标点，强制作为最后一句发送"""
+        rest, self._buffer = self._buffer, ""
+        if not rest.strip():
+            return []
+        return [(self._speech_id, rest)]
+    
+    def reset(self):
+        self._buffer = ""
+
+
 def step_realtime_tts_worker(request_queue, response_queue, audio_api_key, voice_id, free_mode=False):
     """
     StepFun实时TTS worker（用于默认音色）
@@ -1049,15 +1084,15 @@ def local_cosyvoice_worker(request_queue, response_queue, audio_api_key, voice_i
     本地 CosyVoice WebSocket Worker（OpenAI 兼容 bistream 版本）
     适配 openai_server.py 定义的 /v1/audio/speech/stream 接口
     
-    协议流程：
+    协议流程（每句一个连接）：
     1. 连接后发送 config: {"voice": ..., "speed": ...}
     2. 发送文本: {"text": ...}
     3. 发送结束信号: {"event": "end"}
-    4. 接收 bytes 音频数据（16-bit PCM, 22050Hz）
+    4. 接收 bytes 音频数据（16-bit PCM, 22050Hz），直到服务器关闭连接
     
     特性：
-    - 双工流：发送和接收独立运行，互不阻塞
-    - 打断支持：speech_id 变化时关闭旧连接，打断旧语音
+    - 句级预取：core 侧 TTSSentenceSegmenter 按句送入，最多 TTS_PREFETCH_SENTENCES 句并行合成，按顺序播放
+    - 打断支持：speech_id 变化时取消旧语音所有句子的连接，丢弃已缓存音频
     - 非阻塞：异步架构，不会卡住主循环
     
     注意：audio_api_key 参数未使用（本地模式不需要 API Key），保留是为了与其他 worker 保持统一签名
@@ -1102,80 +1137,74 @@ def local_cosyvoice_worker(request_queue, response_queue, audio_api_key, voice_i
     SRC_RATE = 22050
 
     async def async_worker():
-        ws = None
-        receive_task = None
         current_speech_id = None
-        
+        # 当前 speech 已提交的句子：[(合成任务, 音频 chunk 队列), ...]，按提交顺序播放
+        jobs = deque()
+        job_ready = asyncio.Event()
+        # 同时合成的句子数上限（本地服务器每个连接独立推理）
+        slots = asyncio.Semaphore(max(1, TTS_PREFETCH_SENTENCES))
         resampler = soxr.ResampleStream(SRC_RATE, 48000, 1, dtype='float32')
 
-        async def receive_loop(ws_conn):
-            """独立接收任务，处理音频流"""
+        async def synthesize(tts_text, chunks):
+            """单句合成：独立连接，发送 config + 文本 + end，接收音频直到服务器关闭连接"""
             try:
-                async for message in ws_conn:
-                    if isinstance(message, bytes):
-                        # 服务器返回 16-bit PCM @ 22050Hz
-                        audio_array = np.frombuffer(message, dtype=np.int16)
-                        resampled_bytes = _resample_audio(audio_array, SRC_RATE, 48000, resampler)
-                        response_queue.put(resampled_bytes)
+                async with slots:
+                    async with websockets.connect(WS_URL, ping_interval=None) as ws:
+                        await ws.send(json.dumps({"voice": voice_name, "speed": speech_speed}))
+                        await ws.send(json.dumps({"text": tts_text}))
+                        await ws.send(json.dumps({"event": "end"}))
+                        logger.debug(f"发送合成片段: {tts_text}")
+                        async for message in ws:
+                            if isinstance(message, bytes):
+                                chunks.put_nowait(message)
             except websockets.exceptions.ConnectionClosed:
                 logger.debug("本地 WebSocket 连接已关闭")
-            except asyncio.CancelledError:
-                pass
             except Exception as e:
-                logger.error(f"接收循环异常: {e}")
+                logger.error(f"[LocalTTS] 句子合成失败: {e}")
+            finally:
+                chunks.put_nowait(None)
 
-        async def send_end_signal(ws_conn):
-            """发送结束信号（文本已在主循环中实时发送，此处只需发送 end）"""
-            try:
-                await ws_conn.send(json.dumps({"event": "end"}))
-                logger.debug("发送结束信号")
-            except Exception as e:
-                logger.error(f"发送结束信号失败: {e}")
+        async def playback_loop():
+            """按提交顺序输出音频：队首句子边合成边输出，后续句子的音频先缓存在各自队列中"""
+            while True:
+                while not jobs:
+                    job_ready.clear()
+                    await job_ready.wait()
+                _, chunks = jobs[0]
+                while True:
+                    message = await chunks.get()
+                    if message is None:
+                        break
+                    # 服务器返回 16-bit PCM @ 22050Hz；重采样器按播放顺序连续使用，句子衔接处不产生断点
+                    audio_array = np.frombuffer(message, dtype=np.int16)
+                    response_queue.put(_resample_audio(audio_array, SRC_RATE, 48000, resampler))
+                jobs.popleft()
 
-        async def create_connection():
-            """创建新连接并发送配置"""
-            nonlocal ws, receive_task, resampler
-            
-            # 清理旧连接
-            if receive_task and not receive_task.done():
-                receive_task.cancel()
-                try:
-                    await receive_task
-                except asyncio.CancelledError:
-                    pass
-            if ws:
-                try:
-                    await ws.close()
-                except Exception:
-                    pass
-            
-            # 重置 resampler
+        playback_task = asyncio.create_task(playback_loop())
+
+        async def interrupt():
+            """打断：取消仍在合成/等待播放的句子，丢弃已缓存的音频"""
+            nonlocal playback_task, resampler
+            playback_task.cancel()
+            for task, _ in jobs:
+                task.cancel()
+            await asyncio.gather(playback_task, *(task for task, _ in jobs), return_exceptions=True)
+            jobs.clear()
             resampler = soxr.ResampleStream(SRC_RATE, 48000, 1, dtype='float32')
-            
-            logger.info(f"🔄 [LocalTTS] 正在连接: {WS_URL}")
-            ws = await websockets.connect(WS_URL, ping_interval=None)
-            logger.info("✅ [LocalTTS] 连接成功")
-            
-            # 发送配置
-            config = {
-                "voice": voice_name,
-                "speed": speech_speed,
-            }
-            await ws.send(json.dumps(config))
-            logger.debug(f"发送配置: {config}")
-            
-            # 启动接收任务
-            receive_task = asyncio.create_task(receive_loop(ws))
-            return ws
+            playback_task = asyncio.create_task(playback_loop())
 
-        # 初始连接
+        # 探测服务器是否可用
+        logger.info(f"🔄 [LocalTTS] 正在连接: {WS_URL}")
         try:
-            await create_connection()
+            async with websockets.connect(WS_URL, ping_interval=None):
+                pass
+            logger.info(f"✅ [LocalTTS] 连接成功 (句级预取: {max(1, TTS_PREFETCH_SENTENCES)})")
             response_queue.put(("__ready__", True))
         except Exception as e:
             logger.error(f"❌ [LocalTTS] 初始连接失败: {e}")
             logger.error("请确保服务器已运行且端口正确")
             response_queue.put(("__ready__", False))
+            playback_task.cancel()
             return
 
         # 主循环
@@ -1187,51 +1216,28 @@ def local_cosyvoice_worker(request_queue, response_queue, audio_api_key, voice_i
                 logger.error(f'队列获取异常: {e}')
                 break
 
-            # speech_id 变化 -> 打断旧语音，建立新连接
-            if sid != current_speech_id and sid is not None:
-                # 发送结束信号（文本已在实时流中发送过了）
-                if ws:
-                    await send_end_signal(ws)
-                
-                current_speech_id = sid
-                try:
-                    await create_connection()
-                except Exception as e:
-                    logger.error(f"重连失败: {e}")
-                    ws = None
-                    continue
-
             if sid is None:
-                # 终止信号：发送结束信号
-                if ws:
-                    await send_end_signal(ws)
-                current_speech_id = None
+                # 回复结束信号：已提交的句子继续合成并播放完毕
                 continue
 
+            # speech_id 变化 -> 打断旧语音
+            if sid != current_speech_id:
+                if jobs:
+                    await interrupt()
+                current_speech_id = sid
+
             if not tts_text or not tts_text.strip():
                 continue
-            
-            # 同时发送（bistream 模式允许边发边收）
-            if ws:
-                try:
-                    await ws.send(json.dumps({"text": tts_text}))
-                    logger.debug(f"发送合成片段: {tts_text}")
-                except Exception as e:
-                    logger.error(f"发送失败: {e}")
-                    ws = None
+
+            chunks = asyncio.Queue()
+            jobs.append((asyncio.create_task(synthesize(tts_text, chunks)), chunks))
+            job_ready.set()
 
         # 清理
-        if receive_task and not receive_task.done():
-            receive_task.cancel()
-            try:
-                await receive_task
-            except asyncio.CancelledError:
-                pass
-        if ws:
-            try:
-                await ws.close()
-            except Exception:
-                pass
+        playback_task.cancel()
+        for task, _ in jobs:
+            task.cancel()
+        await asyncio.gather(playback_task, *(task for task, _ in jobs), return_exceptions=True)
 
     # 运行 Asyncio 循环
     try:
@@ -0,0 +1,211 @@
+"""
+TTS 音频回传通道
+
+TTS worker 线程把合成好的音频 chunk 写入预分配环形缓冲区（单生产者单消费者），
+就绪信号等控制消息走一个小的控制队列。事件循环侧的 tts_response_handler 通过
+`await get()` 等待数据：写入方只在读取方正在等待时调用一次 call_soon_threadsafe 唤醒，
+不再需要每 10ms 轮询一次队列。
+
+对 worker 暴露与 queue.Queue 相同的 put()，因此 tts_client 中的各个 worker 无需改动。
+控制消息在环形缓冲区中写入一个占位记录，读取时与音频 chunk 保持写入顺序。
+每个音频 chunk 在写入时打上当时的 speech_id，读取方据此合并和丢弃，而不是读取时的 speech_id。
+环形缓冲区写满时（前端长时间不取），新消息进入溢出队列，读取顺序保持不变。
+"""
+
+import asyncio
+import logging
+import struct
+from collections import deque
+from queue import Empty
+
+logger = logging.getLogger(__name__)
+
+_LEN = struct.Struct('<I')
+# 长度字段取该值表示“下一条控制消息”的占位记录，实际对象在 _control 中
+_CONTROL_MARK = 0xFFFFFFFF
+_SID_LEN = struct.Struct('<B')
+
+
+class TTSResponseRing:
+    """SPSC 环形缓冲区：生产者为 TTS worker 线程，消费者为事件循环。
+
+    _head 只由生产者推进，_tail 只由消费者推进（均为单调递增的字节计数），
+    每条记录为 4 字节长度前缀 + 1 字节 speech_id 长度 + speech_id + PCM/音频字节；
+    控制消息只写 4 字节占位记录。speech_id 由构造时传入的 speech_id_getter 在写入时取得。
+    消费者放回的消息存放在独立的 _unget 槽中，不写入缓冲区，避免出现第二个生产者。
+    """
+
+    DEFAULT_CAPACITY = 2 * 1024 * 1024  # 48kHz int16 单声道约 21 秒
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, speech_id_getter=None):
+        self.capacity = capacity
+        self._speech_id_getter = speech_id_getter
+        # 最近一次 get 返回的音频 chunk 写入时的 speech_id
+        self.last_speech_id = None
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._head = 0
+        self._tail = 0
+        self._overflow = deque()
+        self._control = deque()
+        self._unget = deque()
+        self._loop = None
+        self._event = None
+        self._waiting = False
+        self.chunks_written = 0
+        self.bytes_written = 0
+        self.overflow_chunks = 0
+        self.max_fill = 0
+
+    # ---- 生产者（worker 线程） ----
+
+    def put(self, item):
+        """与 queue.Queue.put 兼容：bytes 类数据进入环形缓冲区，其它（如 ("__ready__", ok)）作为控制消息，按写入顺序读取"""
+        if isinstance(item, (bytes, bytearray, memoryview)):
+            self._put_audio(item)
+        else:
+            self._put_control(item)
+        self._notify()
+
+    def _put_control(self, item):
+        if self._overflow or self._head - self._tail + _LEN.size > self.capacity:
+            self._overflow.append((False, item, None))
+            return
+        # 先放入对象再推进 _head，消费者读到占位记录时对象一定已就绪
+        self._control.append(item)
+        self._write(self._head, _LEN.pack(_CONTROL_MARK))
+        self._head += _LEN.size
+
+    def _put_audio(self, data):
+        speech_id = self._speech_id_getter() if self._speech_id_getter is not None else None
+        sid = (speech_id or '').encode('utf-8')[:255]
+        size = len(data)
+        need = _LEN.size + _SID_LEN.size + len(sid) + size
+        fill = self._head - self._tail
+        if self._overflow or fill + need > self.capacity:
+            # 溢出队列非空时也必须继续排在其后，保证顺序
+            self._overflow.append((True, bytes(data), speech_id))
+            self.overflow_chunks += 1
+        else:
+            pos = self._head
+            self._write(pos, _LEN.pack(need - _LEN.size))
+            pos += _LEN.size
+            self._write(pos, _SID_LEN.pack(len(sid)) + sid)
+            pos += _SID_LEN.size + len(sid)
+            self._write(pos, data)
+            self._head += need
+            fill += need
+            if fill > self.max_fill:
+                self.max_fill = fill
+        self.chunks_written += 1
+        self.bytes_written += size
+
+    def _write(self, pos, data):
+        start = pos % self.capacity
+        first = min(len(data), self.capacity - start)
+        self._view[start:start + first] = data[:first]
+        if first < len(data):
+            self._view[:len(data) - first] = data[first:]
+
+    def _notify(self):
+        if not self._waiting:
+            return
+        self._waiting = False
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
+    # ---- 消费者（事件循环） ----
+
+    def _read(self, pos, size):
+        start = pos % self.capacity
+        first = min(size, self.capacity - start)
+        if first == size:
+            return bytes(self._view[start:start + size])
+        return bytes(self._view[start:]) + bytes(self._view[:size - first])
+
+    def empty(self):
+        return not self._unget and self._head == self._tail and not self._overflow
+
+    def get_nowait(self):
+        """按写入顺序返回音频 chunk 与控制消息（放回的消息最先返回）；无数据时抛出 queue.Empty
+
+        返回音频 chunk 时，其写入时的 speech_id 记录在 last_speech_id 中。
+        """
+        if self._unget:
+            item, self.last_speech_id = self._unget.popleft()
+            return item
+        tail = self._tail
+        if self._head != tail:
+            size = _LEN.unpack(self._read(tail, _LEN.size))[0]
+            if size == _CONTROL_MARK:
+                self._tail = tail + _LEN.size
+                return self._control.popleft()
+            pos = tail + _LEN.size
+            sid_len = self._read(pos, _SID_LEN.size)[0]
+            sid = self._read(pos + _SID_LEN.size, sid_len).decode('utf-8', errors='replace') if sid_len else None
+            offset = _SID_LEN.size + sid_len
+            data = self._read(pos + offset, size - offset)
+            self._tail = pos + size
+            self.last_speech_id = sid
+            return data
+        if self._overflow:
+            is_audio, item, speech_id = self._overflow.popleft()
+            if is_audio:
+                self.last_speech_id = speech_id
+            return item
+        raise Empty
+
+    def unget(self, item, speech_id=None):
+        """把刚取出的消息放回队首（仅限消费者侧），下一次 get 时最先返回；音频 chunk 需带回其 speech_id"""
+        self._unget.appendleft((item, speech_id))
+
+    async def get(self):
+        """等待下一条消息；写入方在数据到达时唤醒，无轮询"""
+        if self._event is None:
+            self._loop = asyncio.get_running_loop()
+            self._event = asyncio.Event()
+        while True:
+            try:
+                return self.get_nowait()
+            except Empty:
+                pass
+            self._event.clear()
+            self._waiting = True
+            # 设置等待标志后再检查一次，避免与写入方之间丢失唤醒
+            if not self.empty():
+                self._waiting = False
+                continue
+            try:
+                await self._event.wait()
+            finally:
+                self._waiting = False
+
+    def clear(self):
+        """丢弃所有待发送的音频和控制消息（打断时调用，仅限消费者侧）"""
+        self._unget.clear()
+        self._overflow.clear()
+        head = self._head
+        # 只丢弃 [tail, head) 内占位记录对应的控制消息；之后写入的仍与其占位记录对应
+        pos = self._tail
+        while pos != head:
+            size = _LEN.unpack(self._read(pos, _LEN.size))[0]
+            if size == _CONTROL_MARK:
+                self._control.popleft()
+                pos += _LEN.size
+            else:
+                pos += _LEN.size + size
+        self._tail = head
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'fill': self._head - self._tail,
+            'max_fill': self.max_fill,
+            'chunks_written': self.chunks_written,
+            'bytes_written': self.bytes_written,
+            'overflow_chunks': self.overflow_chunks,
+            'overflow_pending': len(self._overflow),
+        }
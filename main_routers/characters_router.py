@@ -1029,6 +1029,7 @@ async def delete_catgirl(name: str):
             f'time_indexed_{name}',     # 时间索引数据库文件
             f'settings_{name}.json',    # 设置文件
             f'recent_{name}.json',      # 最近聊天记录文件
+            f'recent_{name}.json.journal',  # 最近聊天记录追加日志
         ]
         
         for base_dir in memory_paths:
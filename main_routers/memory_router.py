@@ -186,8 +186,9 @@ async def get_recent_file(filename: str):
     if not resolved_path.exists():
         return JSONResponse({"success": False, "error": "文件不存在"}, status_code=404)
     
-    with open(resolved_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    # 合并快照与追加日志，得到与 memory_server 一致的完整历史
+    from memory.journal import read_history_dicts
+    content = json.dumps(read_history_dicts(str(resolved_path)), ensure_ascii=False, indent=2)
     return {"content": content}
 
 
@@ -238,8 +239,9 @@ async def save_recent_file(request: Request):
             }
         })
     try:
-        with open(resolved_path, 'w', encoding='utf-8') as f:
-            json.dump(arr, f, ensure_ascii=False, indent=2)
+        # 写入完整快照，同时清空 memory_server 的追加日志
+        from memory.journal import write_history_snapshot
+        write_history_snapshot(str(resolved_path), arr)
         
         # 从文件名提取猫娘名 (recent_XXX.json -> XXX)
         match = re.match(r'^recent_(.+)\.json$', filename)
@@ -316,16 +318,11 @@ async def update_catgirl_name(request: Request):
             logger.warning(f"记忆文件不存在: {old_file_path}")
             return JSONResponse({"success": False, "error": f"记忆文件不存在: {old_filename}"}, status_code=404)
         
-        # 如果新文件已存在，先删除
-        if os.path.exists(new_file_path):
-            os.remove(new_file_path)
-        
-        # 重命名文件
-        os.rename(old_file_path, new_file_path)
+        # 读取快照与追加日志合并后的完整历史
+        from memory.journal import read_history_dicts, write_history_snapshot, journal_path_for
+        file_content = read_history_dicts(str(old_file_path))
         
         # 2. 更新文件内容中的猫娘名称引用
-        with open(new_file_path, 'r', encoding='utf-8') as f:
-            file_content = json.load(f)
         
         # 遍历所有消息，仅在特定字段中更新猫娘名称
         for item in file_content:
@@ -371,9 +368,12 @@ async def update_catgirl_name(request: Request):
                         
                         data['content'] = content
         
-        # 保存更新后的内容
-        with open(new_file_path, 'w', encoding='utf-8') as f:
-            json.dump(file_content, f, ensure_ascii=False, indent=2)
+        # 保存更新后的内容到新文件（会覆盖已存在的新文件），再删除旧文件及其日志
+        write_history_snapshot(str(new_file_path), file_content)
+        if old_file_path != new_file_path:
+            for stale_path in (str(old_file_path), journal_path_for(str(old_file_path))):
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
         
         logger.info(f"已更新猫娘名称从 '{old_name}' 到 '{new_name}' 的记忆文件")
         return {"success": True}
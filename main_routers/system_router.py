@@ -610,6 +610,15 @@ async def proxy_image(image_path: str):
         logger.error(f"代理图片访问失败: {str(e)}")
         return JSONResponse(content={"success": False, "error": f"访问图片失败: {str(e)}"}, status_code=500)
 
+@router.get('/input_pipeline_stats/{lanlan_name}')
+async def input_pipeline_stats(lanlan_name: str):
+    """输入流水线状态：队列深度、丢弃数以及各阶段（排队/处理）延迟"""
+    mgr = get_session_manager().get(lanlan_name)
+    if not mgr:
+        return JSONResponse({"success": False, "error": f"角色 {lanlan_name} 不存在"}, status_code=404)
+    return {"success": True, "stats": mgr.get_input_pipeline_stats()}
+
+
 @router.post('/proactive_chat')
 async def proactive_chat(request: Request):
     """主动搭话：根据模式选择使用图片、首页推荐或窗口搜索，让AI决定是否主动发起对话"""
@@ -10,9 +10,11 @@ Handles WebSocket endpoints including:
 
 import json
 import uuid
+import struct
 import asyncio
 import logging
 
+import numpy as np
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from .shared_state import (
@@ -27,6 +29,30 @@ logger = logging.getLogger("Main")
 # Lock for session management
 _lock = asyncio.Lock()
 
+# 二进制音频帧（与 static/app.js 中 encodeAudioFrame 保持一致），小端：
+#   u8 version | u8 input_type | u16 reserved | u32 sample_rate | u32 seq | PCM16 samples...
+# 与 JSON 文本消息并存；stream_data 之外的控制消息仍走文本帧
+_AUDIO_FRAME_HEADER = struct.Struct('<BBHII')
+_AUDIO_FRAME_VERSION = 1
+_AUDIO_FRAME_INPUT_TYPES = {1: 'audio'}
+
+
+def _decode_audio_frame(data: bytes):
+    """把二进制音频帧解析为与 JSON stream_data 等价的消息，data 为 np.frombuffer 零拷贝视图"""
+    if len(data) < _AUDIO_FRAME_HEADER.size or (len(data) - _AUDIO_FRAME_HEADER.size) % 2:
+        return None
+    version, type_code, _reserved, sample_rate, seq = _AUDIO_FRAME_HEADER.unpack_from(data)
+    input_type = _AUDIO_FRAME_INPUT_TYPES.get(type_code)
+    if version != _AUDIO_FRAME_VERSION or input_type is None:
+        return None
+    return {
+        "action": "stream_data",
+        "input_type": input_type,
+        "data": np.frombuffer(data, dtype='<i2', offset=_AUDIO_FRAME_HEADER.size),
+        "sample_rate": sample_rate,
+        "seq": seq,
+    }
+
 
 @router.websocket("/ws/{lanlan_name}")
 async def websocket_endpoint(websocket: WebSocket, lanlan_name: str):
@@ -70,9 +96,12 @@ async def websocket_endpoint(websocket: WebSocket, lanlan_name: str):
     session_manager[lanlan_name].websocket = websocket
     logger.info(f"✅ 已设置 {lanlan_name} 的WebSocket连接")
 
+    last_audio_seq = None
     try:
         while True:
-            data = await websocket.receive_text()
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
             # 安全检查：如果角色已被重命名或删除，lanlan_name 可能不再存在
             if lanlan_name not in session_id or lanlan_name not in session_manager:
                 logger.info(f"角色 {lanlan_name} 已被重命名或删除，关闭旧连接")
@@ -82,7 +111,17 @@ async def websocket_endpoint(websocket: WebSocket, lanlan_name: str):
                 await session_manager[lanlan_name].send_status("{lanlan_name}正在前往另一个终端...")
                 await websocket.close()
                 break
-            message = json.loads(data)
+            if frame.get("bytes") is not None:
+                message = _decode_audio_frame(frame["bytes"])
+                if message is None:
+                    logger.warning(f"Invalid binary frame received ({len(frame['bytes'])} bytes)")
+                    continue
+                seq = message["seq"]
+                if last_audio_seq is not None and seq != (last_audio_seq + 1) & 0xFFFFFFFF:
+                    logger.debug(f"Audio frame seq gap: {last_audio_seq} -> {seq}")
+                last_audio_seq = seq
+            else:
+                message = json.loads(frame.get("text") or "")
             action = message.get("action")
             
             # 处理语言设置（可以在任何消息中携带）
@@ -105,7 +144,8 @@ async def websocket_endpoint(websocket: WebSocket, lanlan_name: str):
                     await session_manager[lanlan_name].send_status(f"Invalid input type: {input_type}")
 
             elif action == "stream_data":
-                asyncio.create_task(session_manager[lanlan_name].stream_data(message))
+                # 有序输入队列 + 单消费者，替代每个chunk一个task
+                session_manager[lanlan_name].enqueue_stream_data(message)
 
             elif action == "end_session":
                 session_manager[lanlan_name].active_session_is_idle = False
@@ -0,0 +1,186 @@
+"""
+recent_<name>.json 的追加式日志存储
+
+磁盘布局：
+- ``recent_<name>.json``          压缩快照（与旧版格式相同，messages_to_dict 列表）
+- ``recent_<name>.json.journal``  追加日志（JSON Lines，首行为头部，之后每行一条消息）
+
+日志头部记录了日志创建时快照文件的 (mtime_ns, size)。如果快照被外部改写
+（例如记忆编辑页面保存或重命名），头部与快照不再匹配，旧日志会被视为失效并丢弃，
+避免把已经被用户删掉的消息重新追加回来。
+
+写入一条消息只需要一次 append；只有在压缩（或日志过长）时才整体重写快照。
+快照文件在角色首次写入时即创建，因此只按 recent*.json 查找文件的记忆接口总能看到该角色。
+读取时以两个文件的 stat 作为缓存键，文件未变化时直接返回内存中的消息列表。
+"""
+
+import json
+import os
+import logging
+import threading
+
+from langchain_core.messages import messages_to_dict, messages_from_dict
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = '.journal'
+JOURNAL_VERSION = 1
+
+
+def journal_path_for(snapshot_path):
+    """返回快照文件对应的日志文件路径"""
+    return f"{snapshot_path}{JOURNAL_SUFFIX}"
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_snapshot(snapshot_path):
+    try:
+        with open(snapshot_path, encoding='utf-8') as f:
+            content = json.load(f)
+    except FileNotFoundError:
+        return []
+    return content or []
+
+
+def _read_journal(snapshot_path, snapshot_key):
+    """读取日志中的消息字典；日志不存在或已失效时返回 (None, [])"""
+    path = journal_path_for(snapshot_path)
+    try:
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return None, []
+    if not lines:
+        return None, []
+
+    try:
+        header = json.loads(lines[0])
+    except json.JSONDecodeError:
+        logger.warning(f"[Journal] 日志头部损坏，忽略: {path}")
+        return None, []
+    base = header.get('base')
+    if (tuple(base) if base is not None else None) != snapshot_key:
+        # 快照在日志创建后被外部改写，日志内容已过期
+        logger.info(f"[Journal] 快照已被外部修改，丢弃过期日志: {path}")
+        return None, []
+
+    records = []
+    for line in lines[1:]:
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            # 进程在写入中途退出时最后一行可能不完整
+            logger.warning(f"[Journal] 跳过无法解析的日志记录: {path}")
+    return header, records
+
+
+def read_history_dicts(snapshot_path):
+    """读取快照与日志合并后的完整历史（messages_to_dict 格式）"""
+    snapshot_key = _stat_key(snapshot_path)
+    records = _read_snapshot(snapshot_path)
+    _, journal_records = _read_journal(snapshot_path, snapshot_key)
+    return records + journal_records
+
+
+def write_history_snapshot(snapshot_path, records):
+    """原子地写入完整快照并清空日志"""
+    directory = os.path.dirname(snapshot_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{snapshot_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, snapshot_path)
+    try:
+        os.remove(journal_path_for(snapshot_path))
+    except FileNotFoundError:
+        pass
+
+
+class HistoryJournal:
+    """单个角色的追加式近期历史存储，带基于 mtime 的内存缓存"""
+
+    def __init__(self, snapshot_path, max_journal_records=64):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path_for(snapshot_path)
+        self.max_journal_records = max_journal_records
+        self._lock = threading.Lock()
+        self._messages = None
+        self._cache_key = None
+        self._journal_records = 0
+
+    def _current_key(self):
+        return (_stat_key(self.snapshot_path), _stat_key(self.journal_path))
+
+    def load(self):
+        """返回当前完整历史的副本；文件未变化时不会触碰磁盘内容"""
+        with self._lock:
+            key = self._current_key()
+            if self._messages is not None and key == self._cache_key:
+                return list(self._messages)
+            snapshot_key = key[0]
+            records = _read_snapshot(self.snapshot_path)
+            header, journal_records = _read_journal(self.snapshot_path, snapshot_key)
+            self._messages = messages_from_dict(records + journal_records)
+            self._journal_records = len(journal_records) if header is not None else 0
+            if header is None and key[1] is not None:
+                # 日志已失效，删除后下一次 append 会基于当前快照重建
+                try:
+                    os.remove(self.journal_path)
+                except FileNotFoundError:
+                    pass
+                key = (snapshot_key, None)
+            elif snapshot_key is None and header is not None:
+                # 只有日志、没有快照（例如快照被删除）：落地快照，保证 recent_<name>.json 存在
+                write_history_snapshot(self.snapshot_path, records + journal_records)
+                self._journal_records = 0
+                key = self._current_key()
+            self._cache_key = key
+            return list(self._messages)
+
+    def append(self, messages):
+        """追加消息：一次文件 append，并同步更新内存缓存"""
+        if not messages:
+            return
+        current = self.load()
+        if self._cache_key[0] is None:
+            # 新角色首次写入：直接写出快照而不是只建日志，记忆列表/读取/重命名接口都依赖快照文件存在
+            self.compact(current + list(messages))
+            return
+        records = messages_to_dict(messages)
+        with self._lock:
+            directory = os.path.dirname(self.journal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            lines = []
+            if self._cache_key[1] is None:
+                header = {"v": JOURNAL_VERSION, "base": self._cache_key[0]}
+                lines.append(json.dumps(header))
+            lines.extend(json.dumps(r, ensure_ascii=False) for r in records)
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+            self._messages = current + list(messages)
+            self._journal_records += len(records)
+            self._cache_key = self._current_key()
+            needs_compaction = self._journal_records > self.max_journal_records
+        if needs_compaction:
+            self.compact(self._messages)
+
+    def compact(self, messages):
+        """把给定的完整历史写成新快照，并清空日志"""
+        with self._lock:
+            messages = list(messages)
+            write_history_snapshot(self.snapshot_path, messages_to_dict(messages))
+            self._messages = messages
+            self._journal_records = 0
+            self._cache_key = self._current_key()
@@ -0,0 +1,90 @@
+"""
+本地检索排序：BM25（中日韩字符二元组 + 英文单词）与倒数排名融合（RRF）
+
+用于 SemanticMemory.hybrid_search 的热路径，纯 Python 实现，
+对几十个候选片段的排序耗时在微秒到毫秒级，不需要任何模型调用。
+"""
+
+import math
+import re
+from collections import Counter
+
+# 中日韩统一表意文字、平假名、片假名、韩文音节
+_CJK_RUN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+')
+_WORD = re.compile(r'[0-9a-z]+')
+
+
+def tokenize(text):
+    """把文本切分为检索词项
+
+    中日韩连续字符切成重叠的二元组（单字时保留单字），其余部分按字母数字单词切分并转小写。
+    """
+    text = text.lower()
+    tokens = []
+    last = 0
+    for m in _CJK_RUN.finditer(text):
+        tokens.extend(_WORD.findall(text, last, m.start()))
+        run = m.group()
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        last = m.end()
+    tokens.extend(_WORD.findall(text, last))
+    return tokens
+
+
+def bm25_scores(query, documents, k1=1.5, b=0.75):
+    """对 documents（字符串列表）计算相对 query 的 BM25 分数"""
+    if not documents:
+        return []
+    query_terms = set(tokenize(query))
+    if not query_terms:
+        return [0.0] * len(documents)
+
+    doc_terms = [Counter(tokenize(d)) for d in documents]
+    doc_lens = [sum(c.values()) for c in doc_terms]
+    avg_len = (sum(doc_lens) / len(doc_lens)) or 1.0
+    n_docs = len(documents)
+
+    idf = {}
+    for term in query_terms:
+        df = sum(1 for c in doc_terms if term in c)
+        idf[term] = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+    scores = []
+    for counts, length in zip(doc_terms, doc_lens):
+        norm = k1 * (1.0 - b + b * length / avg_len)
+        score = 0.0
+        for term in query_terms:
+            tf = counts.get(term)
+            if tf:
+                score += idf[term] * tf * (k1 + 1.0) / (tf + norm)
+        scores.append(score)
+    return scores
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """融合多个排名列表（每个列表为按相关度降序排列的下标），返回融合后的下标顺序"""
+    fused = {}
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking):
+            fused[idx] = fused.get(idx, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused, key=lambda idx: fused[idx], reverse=True)
+
+
+def rank_documents(query, documents, vector_scores=None, top_k=5):
+    """本地排序：BM25，若提供向量分数则与向量排名做 RRF 融合
+
+    :param documents: 候选片段文本列表
+    :param vector_scores: 与 documents 对齐的向量相似度（可选）
+    :return: 排序后的前 top_k 个候选下标
+    """
+    lexical = bm25_scores(query, documents)
+    lexical_order = sorted(range(len(documents)), key=lambda i: lexical[i], reverse=True)
+    if vector_scores is None:
+        return lexical_order[:top_k]
+    vector_order = sorted(range(len(documents)), key=lambda i: vector_scores[i], reverse=True)
+    # 词项完全不匹配的片段不参与词法排名，避免给它们平白加分
+    lexical_order = [i for i in lexical_order if lexical[i] > 0]
+    return reciprocal_rank_fusion([lexical_order, vector_order])[:top_k]
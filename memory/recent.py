@@ -2,14 +2,17 @@ from datetime import datetime
 from config import get_extra_body
 from utils.config_manager import get_config_manager
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, messages_to_dict, messages_from_dict, HumanMessage, AIMessage
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 import json
 import os
 import asyncio
 import logging
+import time
 from openai import APIConnectionError, InternalServerError, RateLimitError
 
 from config.prompts_sys import recent_history_manager_prompt, detailed_recent_history_manager_prompt, further_summarize_prompt, history_review_prompt
+from memory.journal import HistoryJournal
+from memory.summary_cache import SummaryCache, summary_cache_key
 
 # Setup logger
 from utils.logger_config import setup_logging
@@ -24,12 +27,27 @@ class CompressedRecentHistoryManager:
         self.log_file_path = recent_log
         self.name_mapping = name_mapping
         self.user_histories = {}
+        self._journals = {}
+        # 每个角色的后台压缩状态（任务、积压、耗时统计）
+        self._compaction_state = {}
+        # 摘要结果缓存（持久化在 memory 目录下）与进行中的摘要请求
+        self._summary_cache = SummaryCache(os.path.join(str(self._config_manager.memory_dir), 'summary_cache.json'))
+        self._summary_inflight = {}
         for ln in self.log_file_path:
-            if os.path.exists(self.log_file_path[ln]):
-                with open(self.log_file_path[ln], encoding='utf-8') as f:
-                    self.user_histories[ln] = messages_from_dict(json.load(f))
-            else:
+            try:
+                self.user_histories[ln] = self._get_journal(ln).load()
+            except (json.JSONDecodeError, Exception) as e:
+                logger.warning(f"读取 {ln} 的历史记录文件失败: {e}，使用空列表")
                 self.user_histories[ln] = []
+
+    def _get_journal(self, lanlan_name):
+        """获取角色对应的追加式历史存储（路径变化时重建）"""
+        path = self.log_file_path[lanlan_name]
+        journal = self._journals.get(lanlan_name)
+        if journal is None or journal.snapshot_path != path:
+            journal = HistoryJournal(path, max_journal_records=max(4 * self.max_history_length, 32))
+            self._journals[lanlan_name] = journal
+        return journal
     
     def _get_llm(self):
         """动态获取LLM实例以支持配置热重载"""
@@ -87,56 +105,119 @@ class CompressedRecentHistoryManager:
         if lanlan_name not in self.user_histories:
             self.user_histories[lanlan_name] = []
         
-        # 如果文件存在，加载历史记录
-        if lanlan_name in self.log_file_path and os.path.exists(self.log_file_path[lanlan_name]):
-            try:
-                with open(self.log_file_path[lanlan_name], encoding='utf-8') as f:
-                    file_content = json.load(f)
-                    if file_content:
-                        self.user_histories[lanlan_name] = messages_from_dict(file_content)
-            except (json.JSONDecodeError, Exception) as e:
-                logger.warning(f"读取 {lanlan_name} 的历史记录文件失败: {e}，使用空列表")
-                self.user_histories[lanlan_name] = []
+        # 加载历史记录（文件未变化时直接命中内存缓存）
+        journal = self._get_journal(lanlan_name)
+        try:
+            self.user_histories[lanlan_name] = journal.load()
+        except (json.JSONDecodeError, Exception) as e:
+            logger.warning(f"读取 {lanlan_name} 的历史记录文件失败: {e}，使用空列表")
+            self.user_histories[lanlan_name] = []
 
         try:
-            self.user_histories[lanlan_name].extend(new_messages)
+            # 新消息只追加到日志，不再整体重写文件
+            journal.append(new_messages)
+            self.user_histories[lanlan_name] = journal.load()
             logger.info(f"[RecentHistory] {lanlan_name} 添加了 {len(new_messages)} 条新消息，当前共 {len(self.user_histories[lanlan_name])} 条")
 
-            # 确保文件目录存在
-            file_path = self.log_file_path[lanlan_name]
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            
-            with open(file_path, "w", encoding='utf-8') as f:  # Save the updated history to file before compressing
-                json.dump(messages_to_dict(self.user_histories[lanlan_name]), f, indent=2, ensure_ascii=False)
-
             if len(self.user_histories[lanlan_name]) > self.max_history_length:
-                # 压缩旧消息
-                to_compress = self.user_histories[lanlan_name][:-self.max_history_length+1]
-                compressed = [(await self.compress_history(to_compress, lanlan_name, detailed))[0]]
-
-                # 只保留最近的max_history_length条消息
-                self.user_histories[lanlan_name] = compressed + self.user_histories[lanlan_name][-self.max_history_length+1:]
+                # 压缩交给后台队列，追加操作立即返回
+                self._schedule_compaction(lanlan_name, detailed)
         except Exception as e:
             logger.error(f"[RecentHistory] 更新历史记录时出错: {e}", exc_info=True)
             # 即使出错，也尝试保存当前状态
             try:
-                file_path = self.log_file_path[lanlan_name]
-                os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                with open(file_path, "w", encoding='utf-8') as f:
-                    json.dump(messages_to_dict(self.user_histories.get(lanlan_name, [])), f, indent=2, ensure_ascii=False)
+                journal.compact(self.user_histories.get(lanlan_name, []))
             except Exception as save_error:
                 logger.error(f"[RecentHistory] 保存历史记录失败: {save_error}", exc_info=True)
-            return
 
-        # 最终保存
+    def _schedule_compaction(self, lanlan_name, detailed=False):
+        """登记一次待压缩请求；每个角色最多只有一个后台压缩任务"""
+        state = self._compaction_state.setdefault(lanlan_name, {
+            'task': None,
+            'detailed': False,
+            'pending_requests': 0,
+            'pending_since': None,
+            'runs': 0,
+            'failures': 0,
+            'last_duration': 0.0,
+            'last_finished': None,
+        })
+        state['detailed'] = state['detailed'] or detailed
+        state['pending_requests'] += 1
+        if state['pending_since'] is None:
+            state['pending_since'] = time.monotonic()
+        if state['task'] is None or state['task'].done():
+            state['task'] = asyncio.create_task(self._compaction_worker(lanlan_name))
+
+    async def _compaction_worker(self, lanlan_name):
+        """后台压缩：把当前所有超出部分合并成一次摘要调用
+
+        摘要期间新追加的消息不会丢失：提交前确认被压缩的前缀没有被其他写入者
+        （例如 review_history 或记忆编辑页面）替换，否则放弃本轮结果并重新读取。
+        """
+        state = self._compaction_state[lanlan_name]
         try:
-            file_path = self.log_file_path[lanlan_name]
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, "w", encoding='utf-8') as f:
-                json.dump(messages_to_dict(self.user_histories[lanlan_name]), f, indent=2, ensure_ascii=False)
-            logger.info(f"[RecentHistory] {lanlan_name} 历史记录已保存到文件: {file_path}")
+            while True:
+                journal = self._get_journal(lanlan_name)
+                history = journal.load()
+                if len(history) <= self.max_history_length:
+                    break
+
+                detailed = state['detailed']
+                state['detailed'] = False
+                state['pending_requests'] = 0
+                to_compress = history[:-self.max_history_length+1]
+                started = time.monotonic()
+                summary_message, summary_text = await self.compress_history(to_compress, lanlan_name, detailed)
+                state['last_duration'] = time.monotonic() - started
+                state['runs'] += 1
+                if not summary_text:
+                    # 摘要失败时保留原始消息，等待下一次追加再重试
+                    state['failures'] += 1
+                    logger.warning(f"[RecentHistory] {lanlan_name} 的后台压缩失败，保留原始消息")
+                    break
+
+                current = journal.load()
+                if current[:len(to_compress)] != to_compress:
+                    logger.info(f"[RecentHistory] {lanlan_name} 的历史在压缩期间被改写，重新压缩")
+                    continue
+
+                # 提交：摘要 + 压缩期间及之后的原始消息
+                self.user_histories[lanlan_name] = [summary_message] + current[len(to_compress):]
+                journal.compact(self.user_histories[lanlan_name])
+                logger.info(f"[RecentHistory] {lanlan_name} 历史记录已压缩并保存到文件: {journal.snapshot_path}")
+                if len(self.user_histories[lanlan_name]) > self.max_history_length:
+                    state['pending_since'] = started
         except Exception as e:
-            logger.error(f"[RecentHistory] 最终保存历史记录失败: {e}", exc_info=True)
+            state['failures'] += 1
+            logger.error(f"[RecentHistory] {lanlan_name} 后台压缩出错: {e}", exc_info=True)
+        finally:
+            state['pending_since'] = None
+            state['last_finished'] = time.time()
+
+    async def wait_for_compaction(self, lanlan_name):
+        """等待指定角色当前的后台压缩完成（若有）"""
+        state = self._compaction_state.get(lanlan_name)
+        if state and state['task'] is not None and not state['task'].done():
+            await asyncio.shield(state['task'])
+
+    def get_compaction_metrics(self):
+        """各角色后台压缩队列的状态：积压消息数、待处理请求数、压缩滞后时间等"""
+        now = time.monotonic()
+        metrics = {}
+        for lanlan_name, state in self._compaction_state.items():
+            history = self.user_histories.get(lanlan_name, [])
+            metrics[lanlan_name] = {
+                'running': state['task'] is not None and not state['task'].done(),
+                'queue_depth': max(0, len(history) - self.max_history_length),
+                'pending_requests': state['pending_requests'],
+                'lag_seconds': (now - state['pending_since']) if state['pending_since'] is not None else 0.0,
+                'runs': state['runs'],
+                'failures': state['failures'],
+                'last_duration_seconds': state['last_duration'],
+                'last_finished': state['last_finished'],
+            }
+        return metrics
 
 
     # detailed: 保留尽可能多的细节
@@ -163,11 +244,42 @@ class CompressedRecentHistoryManager:
                 line = f"{role} | {joined}"
             lines.append(line)
         messages_text = "\n".join(lines)
-        if not detailed:
-            prompt = recent_history_manager_prompt % messages_text
-        else:
-            prompt = detailed_recent_history_manager_prompt % messages_text
+        template = detailed_recent_history_manager_prompt if detailed else recent_history_manager_prompt
+        prompt = template % messages_text
+
+        # 相同输入（对话文本 + 提示词模板 + 模型）直接复用已有摘要
+        model = self._config_manager.get_model_api_config('summary').get('model')
+        key = summary_cache_key(messages_text, template, model)
+        cached = self._summary_cache.get(key)
+        if cached is not None:
+            logger.info(f"[RecentHistory] 摘要缓存命中 ({lanlan_name})")
+            return SystemMessage(content=cached['content']), cached['raw']
+
+        # 同一输入已有请求在进行中时，等待其结果而不是重复调用LLM
+        inflight = self._summary_inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._summary_inflight[key] = future
+        try:
+            result = await self._request_summary(prompt)
+            if result[1]:
+                self._summary_cache.put(key, {'content': result[0].content, 'raw': result[1]})
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._summary_inflight.pop(key, None)
 
+    async def _request_summary(self, prompt):
         retries = 0
         max_retries = 3
         while retries < max_retries:
@@ -278,13 +390,10 @@ class CompressedRecentHistoryManager:
         if lanlan_name not in self.user_histories:
             self.user_histories[lanlan_name] = []
         
-        # 如果文件存在，加载历史记录
-        if lanlan_name in self.log_file_path and os.path.exists(self.log_file_path[lanlan_name]):
+        # 加载历史记录（文件未变化时直接命中内存缓存）
+        if lanlan_name in self.log_file_path:
             try:
-                with open(self.log_file_path[lanlan_name], encoding='utf-8') as f:
-                    file_content = json.load(f)
-                    if file_content:
-                        self.user_histories[lanlan_name] = messages_from_dict(file_content)
+                self.user_histories[lanlan_name] = self._get_journal(lanlan_name).load()
             except (json.JSONDecodeError, Exception) as e:
                 logger.warning(f"读取 {lanlan_name} 的历史记录文件失败: {e}，使用空列表")
                 self.user_histories[lanlan_name] = []
@@ -405,8 +514,7 @@ class CompressedRecentHistoryManager:
                     self.user_histories[lanlan_name] = corrected_messages
                     
                     # 保存到文件
-                    with open(self.log_file_path[lanlan_name], "w", encoding='utf-8') as f:
-                        json.dump(messages_to_dict(corrected_messages), f, indent=2, ensure_ascii=False)
+                    self._get_journal(lanlan_name).compact(corrected_messages)
                     
                     print(f"✅ {lanlan_name} 的记忆已修正并保存")
                     return True
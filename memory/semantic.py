@@ -1,9 +1,11 @@
-# from langchain_chroma import Chroma
-# ↑ 这个库引入了Chroma和onnx依赖，显著增大了一键包体积，暂时注释掉
+# 不再使用 langchain_chroma：Chroma和onnx依赖显著增大了一键包体积，
+# 改用 memory/vectorstore.py 中基于 NumPy 的本地向量库
 from typing import List
 from langchain_core.documents import Document
 from datetime import datetime
 from memory.recent import CompressedRecentHistoryManager
+from memory.vectorstore import LocalVectorStore
+from memory.ranking import rank_documents
 from config import SEMANTIC_MODEL, RERANKER_MODEL, get_extra_body
 from utils.config_manager import get_config_manager
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
@@ -13,7 +15,7 @@ import asyncio
 from openai import APIConnectionError, InternalServerError, RateLimitError
 
 class SemanticMemory:
-    def __init__(self, recent_history_manager: CompressedRecentHistoryManager, persist_directory=None):
+    def __init__(self, recent_history_manager: CompressedRecentHistoryManager, persist_directory=None, embedding_function=None):
         self._config_manager = get_config_manager()
         # 通过get_character_data获取相关变量
         _, _, _, _, name_mapping, _, semantic_store, _, _, _ = self._config_manager.get_character_data()
@@ -22,8 +24,8 @@ class SemanticMemory:
         if persist_directory is None:
             persist_directory = semantic_store
         for i in persist_directory:
-            self.original_memory[i] = SemanticMemoryOriginal(persist_directory, i, name_mapping)
-            self.compressed_memory[i] = SemanticMemoryCompressed(persist_directory, i, recent_history_manager, name_mapping)
+            self.original_memory[i] = SemanticMemoryOriginal(persist_directory, i, name_mapping, embedding_function)
+            self.compressed_memory[i] = SemanticMemoryCompressed(persist_directory, i, recent_history_manager, name_mapping, embedding_function)
     
     def _get_reranker(self):
         """动态获取Reranker LLM实例以支持配置热重载"""
@@ -31,19 +33,38 @@ class SemanticMemory:
         return ChatOpenAI(model=RERANKER_MODEL, base_url=api_config['base_url'], api_key=api_config['api_key'], temperature=0.1, extra_body=get_extra_body(RERANKER_MODEL) or None)
 
     async def store_conversation(self, event_id, messages, lanlan_name):
-        self.original_memory[lanlan_name].store_conversation(event_id, messages)
+        await self.original_memory[lanlan_name].store_conversation(event_id, messages)
         await self.compressed_memory[lanlan_name].store_compressed_summary(event_id, messages)
 
-    async def hybrid_search(self, query, lanlan_name, with_rerank=True, k=10):
-        # 从原始和压缩记忆中获取结果
-        original_results = self.original_memory[lanlan_name].retrieve_by_query(query, k)
-        compressed_results = self.compressed_memory[lanlan_name].retrieve_by_query(query, k)
-        combined = original_results + compressed_results
+    async def hybrid_search(self, query, lanlan_name, with_rerank=False, k=10, top_k=5):
+        # 从原始和压缩记忆中获取带向量分数的候选（两次嵌入请求并发，均不阻塞事件循环）
+        original_results, compressed_results = await asyncio.gather(
+            self.original_memory[lanlan_name].aretrieve_by_query_with_score(query, k),
+            self.compressed_memory[lanlan_name].aretrieve_by_query_with_score(query, k),
+        )
+
+        # 同一片段可能同时出现在两个集合中，保留向量分数较高的一份
+        candidates = {}
+        for doc, score in original_results + compressed_results:
+            if doc.page_content not in candidates or score > candidates[doc.page_content][1]:
+                candidates[doc.page_content] = (doc, score)
+        combined = list(candidates.values())
+        if not combined:
+            return []
+
+        # 第一阶段：本地 BM25 + 向量排名融合，微秒级
+        order = rank_documents(
+            query,
+            [doc.page_content for doc, _ in combined],
+            vector_scores=[score for _, score in combined],
+            top_k=top_k,
+        )
+        fused = [combined[i][0] for i in order]
 
+        # 第二阶段（可选）：仅对融合后的 top-k 调用 LLM 重排
         if with_rerank:
-            return await self.rerank_results(query, combined)
-        else:
-            return combined
+            return await self.rerank_results(query, fused, k=top_k) or fused
+        return fused
 
     async def query(self, query, lanlan_name):
         results_text = "\n".join([
@@ -98,21 +119,24 @@ class SemanticMemory:
         return []
 
 
+def _default_embeddings():
+    api_config = get_config_manager().get_model_api_config('summary')
+    return OpenAIEmbeddings(base_url=api_config['base_url'], model=SEMANTIC_MODEL, api_key=api_config['api_key'])
+
+
 class SemanticMemoryOriginal:
-    def __init__(self, persist_directory, lanlan_name, name_mapping):
-        config_manager = get_config_manager()
-        api_config = config_manager.get_model_api_config('summary')
-        self.embeddings = OpenAIEmbeddings(base_url=api_config['base_url'], model=SEMANTIC_MODEL, api_key=api_config['api_key'])
-        # self.vectorstore = Chroma(
-        #     collection_name="Origin",
-        #     persist_directory=persist_directory[lanlan_name],
-        #     embedding_function=self.embeddings
-        # )
-        self.vectorstore = None
+    def __init__(self, persist_directory, lanlan_name, name_mapping, embedding_function=None):
+        # embedding_function 可替换为本地确定性嵌入（例如 memory.vectorstore.HashingEmbedder）
+        self.embeddings = embedding_function if embedding_function is not None else _default_embeddings()
+        self.vectorstore = LocalVectorStore(
+            persist_directory=persist_directory[lanlan_name],
+            collection_name="Origin",
+            embedding_function=self.embeddings
+        )
         self.lanlan_name = lanlan_name
         self.name_mapping = name_mapping
 
-    def store_conversation(self, event_id, messages):
+    async def store_conversation(self, event_id, messages):
         # 将对话转换为文本
         texts = []
         metadatas = []
@@ -144,26 +168,29 @@ class SemanticMemoryOriginal:
             })
 
         # 存储到向量数据库
-        self.vectorstore.add_texts(texts=texts, metadatas=metadatas)
+        await self.vectorstore.aadd_texts(texts=texts, metadatas=metadatas)
 
     def retrieve_by_query(self, query, k=10):
         # 在原始对话上进行精确语义搜索
         return self.vectorstore.similarity_search(query, k=k)
 
+    def retrieve_by_query_with_score(self, query, k=10):
+        return self.vectorstore.similarity_search_with_score(query, k=k)
+
+    async def aretrieve_by_query_with_score(self, query, k=10):
+        return await self.vectorstore.asimilarity_search_with_score(query, k=k)
+
 
 class SemanticMemoryCompressed:
-    def __init__(self, persist_directory, lanlan_name, recent_history_manager: CompressedRecentHistoryManager, name_mapping):
+    def __init__(self, persist_directory, lanlan_name, recent_history_manager: CompressedRecentHistoryManager, name_mapping, embedding_function=None):
         self.lanlan_name = lanlan_name
         self.name_mapping = name_mapping
-        config_manager = get_config_manager()
-        api_config = config_manager.get_model_api_config('summary')
-        self.embeddings = OpenAIEmbeddings(base_url=api_config['base_url'], model=SEMANTIC_MODEL, api_key=api_config['api_key'])
-        self.vectorstore = None
-        # self.vectorstore = Chroma(
-        #     collection_name="Compressed",
-        #     persist_directory=persist_directory[lanlan_name],
-        #     embedding_function=self.embeddings
-        # )
+        self.embeddings = embedding_function if embedding_function is not None else _default_embeddings()
+        self.vectorstore = LocalVectorStore(
+            persist_directory=persist_directory[lanlan_name],
+            collection_name="Compressed",
+            embedding_function=self.embeddings
+        )
         self.recent_history_manager = recent_history_manager
 
     async def store_compressed_summary(self, event_id, messages):
@@ -171,7 +198,7 @@ class SemanticMemoryCompressed:
         _, summary = await self.recent_history_manager.compress_history(messages, self.lanlan_name)
         if not summary:
             return
-        self.vectorstore.add_texts(
+        await self.vectorstore.aadd_texts(
             texts=[summary],
             metadatas=[{
                 "event_id": event_id,
@@ -188,4 +215,10 @@ class SemanticMemoryCompressed:
 
     def retrieve_by_query(self, query, k=10):
         # 在压缩摘要上进行语义搜索
-        return self.vectorstore.similarity_search(query, k=k)
\ No newline at end of file
+        return self.vectorstore.similarity_search(query, k=k)
+
+    def retrieve_by_query_with_score(self, query, k=10):
+        return self.vectorstore.similarity_search_with_score(query, k=k)
+
+    async def aretrieve_by_query_with_score(self, query, k=10):
+        return await self.vectorstore.asimilarity_search_with_score(query, k=k)
@@ -0,0 +1,82 @@
+"""
+摘要结果的内容寻址缓存
+
+同一段对话在一次 /process 请求中会被多个模块（近期记忆、时间索引、语义记忆）重复摘要。
+缓存键为 (提示词变体, 模型, 渲染后的对话文本) 的 SHA-256，命中时无需再调用 LLM。
+缓存采用 LRU 淘汰，并持久化到 memory 目录下的 JSON 文件中，重启后仍然有效。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def summary_cache_key(messages_text, variant, model):
+    digest = hashlib.sha256()
+    for part in (variant, model or '', messages_text):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    def __init__(self, path=None, max_entries=512):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            for key, value in data.get('entries', []):
+                self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        except (json.JSONDecodeError, OSError, ValueError, TypeError) as e:
+            logger.warning(f"[SummaryCache] 读取摘要缓存失败，将重新创建: {e}")
+            self._entries.clear()
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': list(self._entries.items())}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"[SummaryCache] 保存摘要缓存失败: {e}")
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
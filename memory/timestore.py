@@ -0,0 +1,105 @@
+"""
+时间索引记忆的 SQLite 存储层
+
+- 每个数据库文件只创建一个 Engine（进程内复用，重新加载记忆组件时不会重复建连）
+- 连接开启 WAL 模式，读写互不阻塞
+- 一次对话的原始消息与摘要在同一个事务里批量写入，并直接带上时间戳
+- 自动迁移旧数据库：补齐 timestamp 列，并为 session_id / timestamp 建立索引
+
+表结构与 langchain 的 SQLChatMessageHistory 保持兼容（id, session_id, message, timestamp），
+旧数据库无需转换即可继续使用。
+"""
+
+import json
+import logging
+import threading
+
+from langchain_core.messages import message_to_dict
+from sqlalchemy import create_engine, event, text
+
+logger = logging.getLogger(__name__)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_time_store(db_path, table_names):
+    """获取（或创建）数据库文件对应的共享存储实例"""
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = TimeIndexedStore(db_path, table_names)
+            _stores[db_path] = store
+        else:
+            store.ensure_schema(table_names)
+        return store
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+    finally:
+        cursor.close()
+
+
+class TimeIndexedStore:
+    def __init__(self, db_path, table_names):
+        self.db_path = db_path
+        self.engine = create_engine(f"sqlite:///{db_path}")
+        event.listen(self.engine, "connect", _set_sqlite_pragmas)
+        self._ready_tables = set()
+        self.ensure_schema(table_names)
+
+    def ensure_schema(self, table_names):
+        """建表、补列、建索引；对已是最新结构的表是幂等的"""
+        pending = [t for t in table_names if t not in self._ready_tables]
+        if not pending:
+            return
+        with self.engine.begin() as conn:
+            for table in pending:
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    f"id INTEGER NOT NULL PRIMARY KEY, "
+                    f"session_id TEXT, "
+                    f"message TEXT, "
+                    f"timestamp DATETIME)"
+                ))
+                columns = [row[1] for row in conn.execute(text(f"PRAGMA table_info({table})")).fetchall()]
+                if 'timestamp' not in columns:
+                    logger.info(f"[TimeIndexedStore] 迁移 {self.db_path}: 为 {table} 添加 timestamp 列")
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN timestamp DATETIME"))
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{table}_session_id ON {table} (session_id)"))
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table} (timestamp)"))
+        self._ready_tables.update(pending)
+
+    def add_batch(self, rows_by_table, session_id, timestamp):
+        """在单个事务中写入多张表的消息
+
+        rows_by_table: {table_name: [BaseMessage, ...]}
+        """
+        with self.engine.begin() as conn:
+            for table, messages in rows_by_table.items():
+                if not messages:
+                    continue
+                conn.execute(
+                    text(f"INSERT INTO {table} (session_id, message, timestamp) VALUES (:session_id, :message, :timestamp)"),
+                    [
+                        {
+                            "session_id": session_id,
+                            "message": json.dumps(message_to_dict(m)),
+                            "timestamp": timestamp,
+                        }
+                        for m in messages
+                    ],
+                )
+
+    def fetch_by_timeframe(self, table, start_time, end_time):
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                text(f"SELECT session_id, message FROM {table} WHERE timestamp BETWEEN :start_time AND :end_time"),
+                {"start_time": start_time, "end_time": end_time}
+            )
+            return result.fetchall()
@@ -0,0 +1,273 @@
+"""
+轻量级本地向量库（替代 Chroma，无额外依赖、无网络）
+
+磁盘布局（位于每个角色的 semantic_memory_<name> 目录下）：
+- ``<collection>.npy``         float32 向量矩阵（已归一化），以 memmap 方式读写，按容量倍增
+- ``<collection>.meta.jsonl``  元数据边车文件，每行一条记录：
+    {"id": ..., "text": ..., "metadata": {...}}   新增一行向量
+    {"op": "delete", "id": ...}                   墓碑删除
+
+有效行数以边车文件中的新增记录数为准：先写向量再追加元数据，
+进程中途退出时多写的向量行会被忽略。
+
+检索为暴力余弦 top-k：一次 BLAS 矩阵乘 + argpartition，对单个角色的记忆规模足够快。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+_INITIAL_CAPACITY = 256
+
+
+class HashingEmbedder:
+    """确定性的本地嵌入函数：字符 n-gram 特征哈希
+
+    不依赖任何模型或网络，主要用于测试以及没有配置嵌入模型时的兜底。
+    """
+
+    def __init__(self, dim=256, ngram_range=(1, 2)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def _embed(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        text = text.lower()
+        lo, hi = self.ngram_range
+        for n in range(lo, hi + 1):
+            for i in range(len(text) - n + 1):
+                gram = text[i:i + n]
+                if gram.isspace():
+                    continue
+                h = int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'little')
+                vec[h % self.dim] += 1.0 if (h >> 63) == 0 else -1.0
+        return vec.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def _embed_documents(embedding_function, texts):
+    if hasattr(embedding_function, 'embed_documents'):
+        return embedding_function.embed_documents(texts)
+    return embedding_function(texts)
+
+
+def _embed_query(embedding_function, text):
+    if hasattr(embedding_function, 'embed_query'):
+        return embedding_function.embed_query(text)
+    return embedding_function([text])[0]
+
+
+async def _aembed_documents(embedding_function, texts):
+    """异步嵌入：优先使用 aembed_documents，否则放到线程池执行，避免阻塞事件循环"""
+    if hasattr(embedding_function, 'aembed_documents'):
+        return await embedding_function.aembed_documents(texts)
+    return await asyncio.to_thread(_embed_documents, embedding_function, texts)
+
+
+async def _aembed_query(embedding_function, text):
+    if hasattr(embedding_function, 'aembed_query'):
+        return await embedding_function.aembed_query(text)
+    return await asyncio.to_thread(_embed_query, embedding_function, text)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorStore:
+    """基于 NumPy 的持久化向量库，接口与 langchain VectorStore 的常用部分保持一致
+
+    embedding_function 可以是 langchain Embeddings 对象（embed_documents/embed_query），
+    也可以是 ``Callable[[list[str]], list[list[float]]]``。
+    在事件循环中请使用 aadd_texts / asimilarity_search_with_score：嵌入调用通常是网络请求，
+    异步版本走 aembed_*（没有时放到线程池），不会阻塞事件循环。
+    """
+
+    def __init__(self, persist_directory, collection_name, embedding_function):
+        self.persist_directory = persist_directory
+        self.collection_name = collection_name
+        self.embedding_function = embedding_function
+        self.vectors_path = os.path.join(persist_directory, f"{collection_name}.npy")
+        self.meta_path = os.path.join(persist_directory, f"{collection_name}.meta.jsonl")
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._id_to_row = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._load()
+
+    # --- 持久化 ---
+
+    def _load(self):
+        if not os.path.exists(self.meta_path):
+            return
+        deleted = set()
+        with open(self.meta_path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"[VectorStore] 跳过无法解析的元数据记录: {self.meta_path}")
+                    continue
+                if record.get('op') == 'delete':
+                    deleted.add(record['id'])
+                    continue
+                self._id_to_row[record['id']] = len(self._ids)
+                self._ids.append(record['id'])
+                self._texts.append(record.get('text', ''))
+                self._metadatas.append(record.get('metadata') or {})
+
+        if self._ids and os.path.exists(self.vectors_path):
+            self._matrix = np.load(self.vectors_path, mmap_mode='r+')
+        rows = 0 if self._matrix is None else self._matrix.shape[0]
+        if len(self._ids) > rows:
+            logger.warning(f"[VectorStore] 向量文件行数不足，截断元数据: {self.vectors_path}")
+            for stale in self._ids[rows:]:
+                self._id_to_row.pop(stale, None)
+            del self._ids[rows:], self._texts[rows:], self._metadatas[rows:]
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        for doc_id in deleted:
+            row = self._id_to_row.get(doc_id)
+            if row is not None:
+                self._alive[row] = False
+
+    def _ensure_capacity(self, needed, dim):
+        if self._matrix is not None:
+            if self._matrix.shape[1] != dim:
+                raise ValueError(f"embedding 维度不一致: 期望 {self._matrix.shape[1]}，实际 {dim}")
+            if needed <= self._matrix.shape[0]:
+                return
+        os.makedirs(self.persist_directory, exist_ok=True)
+        capacity = _INITIAL_CAPACITY if self._matrix is None else self._matrix.shape[0]
+        while capacity < needed:
+            capacity *= 2
+        tmp_path = f"{self.vectors_path}.tmp.npy"
+        grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(capacity, dim))
+        count = len(self._ids)
+        if self._matrix is not None and count:
+            grown[:count] = self._matrix[:count]
+        grown.flush()
+        del grown
+        # Windows 下必须先释放旧的 memmap 才能替换文件
+        self._matrix = None
+        os.replace(tmp_path, self.vectors_path)
+        self._matrix = np.load(self.vectors_path, mmap_mode='r+')
+
+    def _append_meta(self, records):
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with open(self.meta_path, 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+
+    # --- 写入 / 删除 ---
+
+    def add_texts(self, texts, metadatas=None, ids=None):
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = _embed_documents(self.embedding_function, texts)
+        return self._add_vectors(texts, vectors, metadatas, ids)
+
+    async def aadd_texts(self, texts, metadatas=None, ids=None):
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = await _aembed_documents(self.embedding_function, texts)
+        return await asyncio.to_thread(self._add_vectors, texts, vectors, metadatas, ids)
+
+    def _add_vectors(self, texts, vectors, metadatas, ids):
+        if metadatas is None:
+            metadatas = [{} for _ in texts]
+        if ids is None:
+            ids = [uuid.uuid4().hex for _ in texts]
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(texts):
+            raise ValueError("embedding 函数返回的向量数量与文本数量不一致")
+        vectors = _normalize(vectors)
+
+        with self._lock:
+            start = len(self._ids)
+            self._ensure_capacity(start + len(texts), vectors.shape[1])
+            self._matrix[start:start + len(texts)] = vectors
+            self._matrix.flush()
+            self._append_meta(
+                {"id": doc_id, "text": text, "metadata": meta}
+                for doc_id, text, meta in zip(ids, texts, metadatas)
+            )
+            for offset, (doc_id, text, meta) in enumerate(zip(ids, texts, metadatas)):
+                self._id_to_row[doc_id] = start + offset
+                self._ids.append(doc_id)
+                self._texts.append(text)
+                self._metadatas.append(meta)
+            self._alive = np.concatenate([self._alive, np.ones(len(texts), dtype=bool)])
+        return ids
+
+    def delete(self, ids):
+        """墓碑删除：只标记，不移动向量"""
+        with self._lock:
+            rows = [(doc_id, self._id_to_row[doc_id]) for doc_id in ids
+                    if doc_id in self._id_to_row and self._alive[self._id_to_row[doc_id]]]
+            if not rows:
+                return False
+            self._append_meta({"op": "delete", "id": doc_id} for doc_id, _ in rows)
+            for _, row in rows:
+                self._alive[row] = False
+            return True
+
+    # --- 检索 ---
+
+    def similarity_search_with_score(self, query, k=4):
+        return self._search_vector(_embed_query(self.embedding_function, query), k)
+
+    async def asimilarity_search_with_score(self, query, k=4):
+        return self._search_vector(await _aembed_query(self.embedding_function, query), k)
+
+    def _search_vector(self, query_vec, k):
+        query_vec = np.asarray(query_vec, dtype=np.float32)
+        norm = np.linalg.norm(query_vec)
+        if norm > 0:
+            query_vec = query_vec / norm
+
+        with self._lock:
+            count = len(self._ids)
+            if self._matrix is None or count == 0:
+                return []
+            scores = self._matrix[:count] @ query_vec
+            scores = np.where(self._alive, scores, -np.inf)
+            k = min(k, int(self._alive.sum()))
+            if k <= 0:
+                return []
+            if k < count:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(count)
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [
+                (Document(page_content=self._texts[i], metadata=dict(self._metadatas[i], id=self._ids[i])), float(scores[i]))
+                for i in top
+            ]
+
+    def similarity_search(self, query, k=4):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def __len__(self):
+        return int(self._alive.sum())
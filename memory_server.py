@@ -108,6 +108,8 @@ async def _run_review_in_background(lanlan_name: str):
         correction_cancel_flags[lanlan_name] = cancel_event
     
     try:
+        # 先等待后台压缩完成，避免审阅尚未压缩的原始消息
+        await recent_history_manager.wait_for_compaction(lanlan_name)
         # 直接异步调用review_history方法
         await recent_history_manager.review_history(lanlan_name, cancel_event)
         logger.info(f"✅ {lanlan_name} 的记忆整理任务完成")
@@ -229,6 +231,11 @@ def get_recent_history(lanlan_name: str):
             result += f"{name_mapping[i.type]} | {joined}\n"
     return result
 
+@app.get("/compaction_metrics")
+def get_compaction_metrics():
+    """近期记忆后台压缩队列的积压与滞后情况"""
+    return recent_history_manager.get_compaction_metrics()
+
 @app.get("/search_for_memory/{lanlan_name}/{query}")
 async def get_memory(query: str, lanlan_name:str):
     return await semantic_manager.query(query, lanlan_name)
@@ -7,6 +7,7 @@ import contextlib
 import contextvars
 import asyncio
 import base64
+import os
 import time
 try:
     import tomllib
@@ -18,6 +19,10 @@ import functools
 
 # 模块级初始化锁，用于 _push_lock 的双检初始化
 _PUSH_LOCK_INIT = threading.Lock()
+# 模块级初始化锁，用于响应读取线程的双检初始化
+_RESPONSE_READER_INIT = threading.Lock()
+# 无人认领的响应（请求已超时或尚未注册）保留时间（秒）
+_UNCLAIMED_RESPONSE_TTL = 30.0
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -36,6 +41,8 @@ from fastapi import FastAPI
 from plugin.api.exceptions import PluginError
 from plugin.core.state import state
 from plugin.settings import (
+    BLOB_STORE_DIR,
+    BLOB_UPLOAD_MAX_BYTES,
     EVENT_META_ATTR,
     EXPORT_INLINE_BINARY_MAX_BYTES,
     PLUGIN_LOG_CTX_MESSAGE_PUSH,
@@ -86,6 +93,141 @@ class _BusHub:
         return LifecycleClient(self._ctx)
 
 
+class BinaryExportStream:
+    """流式二进制导出：分块写入 BlobStore 目录，结束时按引用推送一次 EXPORT_PUSH。
+
+    数据直接落盘，插件进程和主进程都不需要在内存中持有完整内容。
+    同步代码使用 ``with`` / close()，事件循环中使用 ``async with`` / aclose()；
+    块内抛出异常时自动 abort() 并删除已写入的数据。
+    """
+
+    def __init__(
+        self,
+        ctx: "PluginContext",
+        *,
+        run_id: str,
+        mime: Optional[str] = None,
+        description: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        timeout: float = 5.0,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        self._ctx = ctx
+        self.run_id = run_id
+        self.mime = mime
+        self.description = description
+        self.metadata = metadata
+        self.timeout = float(timeout)
+        limit = int(BLOB_UPLOAD_MAX_BYTES)
+        if max_bytes is not None and int(max_bytes) > 0:
+            limit = min(limit, int(max_bytes))
+        self.max_bytes = limit
+        self.blob_id = str(uuid.uuid4())
+        # 与 BlobStore 的目录布局一致：写入 <id>.upload，完成后原子改名为 <id>.blob
+        base = Path(str(BLOB_STORE_DIR)).expanduser().resolve()
+        base.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = base / f"{self.blob_id}.upload"
+        self._final_path = base / f"{self.blob_id}.blob"
+        self._file: Optional[Any] = open(self._tmp_path, "wb")
+        self._done = False
+        self.size = 0
+        self.result: Optional[Dict[str, Any]] = None
+
+    def write(self, data: Any) -> int:
+        if self._file is None:
+            raise RuntimeError("binary export stream is closed")
+        n = memoryview(data).nbytes
+        if self.size + n > self.max_bytes:
+            self.abort()
+            raise ValueError("binary export too large")
+        self._file.write(data)
+        self.size += n
+        return n
+
+    def _commit(self) -> None:
+        if self._file is None:
+            raise RuntimeError("binary export stream is closed")
+        f, self._file = self._file, None
+        f.close()
+        os.replace(str(self._tmp_path), str(self._final_path))
+
+    def _push(self):
+        return self._ctx._export_push_blob_async(
+            run_id=self.run_id,
+            blob_id=self.blob_id,
+            size=self.size,
+            mime=self.mime,
+            description=self.description,
+            metadata=self.metadata,
+            timeout=self.timeout,
+        )
+
+    def close(self) -> Dict[str, Any]:
+        """完成写入并推送导出（同步）"""
+        if self._done:
+            return self.result or {}
+        if self._ctx._is_in_event_loop():
+            raise RuntimeError("BinaryExportStream.close() cannot be used inside a running event loop; use 'await stream.aclose()' instead")
+        self._commit()
+        self._done = True
+        try:
+            self.result = self._ctx._run_coro_sync(self._push(), operation="export_push_binary_stream")
+        except RuntimeError:
+            # 主进程明确拒绝（未登记引用），删除已落盘的数据；超时则保留，可能已被登记
+            self._unlink()
+            raise
+        return self.result
+
+    async def aclose(self) -> Dict[str, Any]:
+        """完成写入并推送导出（异步）"""
+        if self._done:
+            return self.result or {}
+        self._commit()
+        self._done = True
+        try:
+            self.result = await self._push()
+        except RuntimeError:
+            self._unlink()
+            raise
+        return self.result
+
+    def abort(self) -> None:
+        """放弃导出并删除已写入的数据"""
+        self._done = True
+        if self._file is not None:
+            f, self._file = self._file, None
+            try:
+                f.close()
+            except Exception:
+                pass
+        self._unlink()
+
+    def _unlink(self) -> None:
+        for p in (self._tmp_path, self._final_path):
+            try:
+                p.unlink(missing_ok=True)
+            except Exception:
+                pass
+
+    def __enter__(self) -> "BinaryExportStream":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    async def __aenter__(self) -> "BinaryExportStream":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            await self.aclose()
+
+
 @dataclass
 class PluginContext:
     """插件运行时上下文"""
@@ -100,7 +242,8 @@ class PluginContext:
     _cmd_queue: Optional[Any] = None  # 命令队列（用于在等待期间处理命令）
     _res_queue: Optional[Any] = None  # 结果队列（用于在等待期间处理响应）
     _response_queue: Optional[Any] = None
-    _response_pending: Optional[Dict[str, Any]] = None
+    _response_pending: Optional[Dict[str, Any]] = None  # 兼容字段：乱序响应现由 state.plugin_response_router 暂存
+    _response_reader: Optional[Any] = None
     _entry_map: Optional[Dict[str, Any]] = None  # 入口映射（用于处理命令）
     _instance: Optional[Any] = None  # 插件实例（用于处理命令）
     _push_seq: int = 0
@@ -117,6 +260,9 @@ class PluginContext:
 
         This is safe to call multiple times.
         """
+        # 响应读取线程在下一次 get 超时后退出
+        self._response_reader = None
+
         batcher = getattr(self, "_push_batcher", None)
         if batcher is not None:
             try:
@@ -509,29 +655,105 @@ class PluginContext:
         metadata: Optional[Dict[str, Any]] = None,
         timeout: float = 5.0,
     ) -> Dict[str, Any]:
-        if not isinstance(binary_data, (bytes, bytearray)):
+        if not isinstance(binary_data, (bytes, bytearray, memoryview)):
             raise TypeError("binary_data must be bytes")
-        data = bytes(binary_data)
-        limit = int(EXPORT_INLINE_BINARY_MAX_BYTES) if EXPORT_INLINE_BINARY_MAX_BYTES is not None else 0
-        if limit > 0 and len(data) > limit:
-            raise ValueError("binary_data too large")
-        b64 = base64.b64encode(data).decode("ascii")
+        view = memoryview(binary_data)
         rid = run_id if isinstance(run_id, str) and run_id.strip() else self.require_run_id()
+        limit = int(EXPORT_INLINE_BINARY_MAX_BYTES) if EXPORT_INLINE_BINARY_MAX_BYTES is not None else 0
+        if limit > 0 and view.nbytes > limit:
+            # 超过内联上限：写入 BlobStore 后按引用推送
+            stream = BinaryExportStream(
+                self, run_id=rid, mime=mime, description=description, metadata=metadata, timeout=timeout
+            )
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, stream.write, view)
+            except BaseException:
+                stream.abort()
+                raise
+            return await stream.aclose()
+
+        request_data: Dict[str, Any] = {
+            "run_id": rid,
+            "export_type": "binary",
+            "mime": mime,
+            "description": description,
+            "metadata": metadata or {},
+        }
+        if self._zmq_ipc_client is not None:
+            # 二进制数据作为独立 ZeroMQ 帧发送，不做 base64 也不进入 msgpack
+            request_data["binary_frame"] = 0
+            return await self._send_zmq_request_async(
+                request_type="EXPORT_PUSH",
+                request_data=request_data,
+                frames=[view],
+                timeout=float(timeout),
+            )
+        request_data["binary_base64"] = base64.b64encode(view).decode("ascii")
         return await self._send_request_and_wait_async(
             method_name="export_push_binary",
             request_type="EXPORT_PUSH",
-            request_data={
-                "run_id": rid,
-                "export_type": "binary",
-                "binary_base64": b64,
-                "mime": mime,
-                "description": description,
-                "metadata": metadata or {},
-            },
+            request_data=request_data,
+            timeout=float(timeout),
+            wrap_result=True,
+        )
+
+    async def _export_push_blob_async(
+        self,
+        *,
+        run_id: str,
+        blob_id: str,
+        size: int,
+        mime: Optional[str] = None,
+        description: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        timeout: float = 5.0,
+    ) -> Dict[str, Any]:
+        request_data: Dict[str, Any] = {
+            "run_id": run_id,
+            "export_type": "blob",
+            "blob_id": blob_id,
+            "size": int(size),
+            "mime": mime,
+            "description": description,
+            "metadata": metadata or {},
+        }
+        if self._zmq_ipc_client is not None:
+            return await self._send_zmq_request_async(
+                request_type="EXPORT_PUSH", request_data=request_data, timeout=float(timeout)
+            )
+        return await self._send_request_and_wait_async(
+            method_name="export_push_binary_stream",
+            request_type="EXPORT_PUSH",
+            request_data=request_data,
             timeout=float(timeout),
             wrap_result=True,
         )
 
+    def export_push_binary_stream(
+        self,
+        *,
+        run_id: Optional[str] = None,
+        mime: Optional[str] = None,
+        description: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        max_bytes: Optional[int] = None,
+        timeout: float = 5.0,
+    ) -> BinaryExportStream:
+        """流式二进制导出：返回 BinaryExportStream，分块 write() 后 close()/aclose() 推送。
+
+        适合图片、音频等大文件：数据直接写入 BlobStore 目录，导出项以 binary_url 引用。
+        """
+        rid = run_id if isinstance(run_id, str) and run_id.strip() else self.require_run_id()
+        return BinaryExportStream(
+            self,
+            run_id=rid,
+            mime=mime,
+            description=description,
+            metadata=metadata,
+            timeout=timeout,
+            max_bytes=max_bytes,
+        )
+
     def export_push_binary(
         self,
         *,
@@ -985,6 +1207,46 @@ class PluginContext:
             fast_mode=fast_mode,
         )
 
+    def _ensure_response_reader(self) -> None:
+        """Start the single thread draining this plugin's response queue into the router.
+
+        One blocking reader per plugin process replaces per-request executor
+        polling; responses whose waiter is not registered are parked briefly.
+        """
+        response_queue = self._response_queue
+        if response_queue is None or self._response_reader is not None:
+            return
+        with _RESPONSE_READER_INIT:
+            if self._response_reader is not None:
+                return
+            t = threading.Thread(
+                target=self._response_reader_loop,
+                args=(response_queue,),
+                name=f"plugin-response-reader-{self.plugin_id}",
+                daemon=True,
+            )
+            self._response_reader = t
+            t.start()
+
+    def _response_reader_loop(self, response_queue: Any) -> None:
+        router = state.plugin_response_router
+        me = threading.current_thread()
+        while self._response_reader is me:
+            try:
+                msg = response_queue.get(timeout=1.0)
+            except Empty:
+                router.expire()
+                continue
+            except Exception:
+                # 队列已关闭
+                break
+            rid = msg.get("request_id") if isinstance(msg, dict) else None
+            if rid:
+                router.resolve(str(rid), msg, keep_for=_UNCLAIMED_RESPONSE_TTL)
+            router.expire()
+        if self._response_reader is me:
+            self._response_reader = None
+
     def _send_request_and_wait(
         self,
         *,
@@ -1020,6 +1282,43 @@ class PluginContext:
             "Use _send_request_and_wait_async(...) instead."
         )
 
+    async def _send_zmq_request_async(
+        self,
+        *,
+        request_type: str,
+        request_data: Dict[str, Any],
+        timeout: float,
+        frames: Optional[list] = None,
+        wrap_result: bool = True,
+    ) -> Any:
+        """经 ZeroMQ IPC 发送请求；frames 作为附加二进制帧原样发送"""
+        zmq_client = self._zmq_ipc_client
+        if zmq_client is None:
+            raise RuntimeError(f"ZeroMQ IPC not available for plugin {self.plugin_id}")
+        request_id = str(uuid.uuid4())
+        payload = dict(request_data or {})
+        for _k in ("type", "from_plugin", "request_id", "timeout"):
+            payload.pop(_k, None)
+        request: Dict[str, Any] = {
+            **payload,
+            "type": request_type,
+            "from_plugin": self.plugin_id,
+            "request_id": request_id,
+            "timeout": timeout,
+        }
+        loop = asyncio.get_running_loop()
+        resp = await loop.run_in_executor(
+            None, lambda: zmq_client.request(request, timeout=float(timeout), frames=frames)
+        )
+        if not isinstance(resp, dict):
+            raise TimeoutError(f"{request_type} over ZeroMQ timed out or failed after {timeout}s")
+        if resp.get("error"):
+            raise RuntimeError(str(resp.get("error")))
+        result = resp.get("result")
+        if wrap_result:
+            return result if isinstance(result, dict) else {"result": result}
+        return result
+
     async def _send_request_and_wait_async(
         self,
         *,
@@ -1053,6 +1352,11 @@ class PluginContext:
             "timeout": timeout,
         }
 
+        # 先注册等待方再发送请求，响应无论多快到达都不会丢失
+        router = state.plugin_response_router
+        self._ensure_response_reader()
+        fut = router.register(request_id)
+
         deadline = time.time() + timeout
         try:
             loop = asyncio.get_running_loop()
@@ -1072,6 +1376,7 @@ class PluginContext:
                 except Exception:
                     pass
         except Exception as e:
+            router.discard(request_id)
             if error_log_template:
                 try:
                     self.logger.exception(error_log_template.format(error=e))
@@ -1079,69 +1384,18 @@ class PluginContext:
                     pass
             raise RuntimeError(f"Failed to send {request_type} request: {e}") from e
 
-        response_queue = getattr(self, "_response_queue", None)
-        pending = getattr(self, "_response_pending", None)
-        if pending is None:
-            pending = {}
-            try:
-                object.__setattr__(self, "_response_pending", pending)
-            except Exception:
-                self._response_pending = pending
-
-        if isinstance(pending, dict) and request_id in pending:
-            response = pending.pop(request_id)
-            if isinstance(response, dict) and response.get("error"):
-                raise RuntimeError(str(response.get("error")))
-            result = response.get("result") if isinstance(response, dict) else None
-            if wrap_result:
-                return result if isinstance(result, dict) else {"result": result}
-            return result
-
-        if response_queue is not None:
-            loop = asyncio.get_running_loop()
-            while time.time() < deadline:
-                remaining = deadline - time.time()
-                if remaining <= 0:
-                    break
-                try:
-                    msg = await loop.run_in_executor(
-                        None,
-                        lambda r=remaining: response_queue.get(timeout=min(0.05, r)),
-                    )
-                except Empty:
-                    continue
-                except Exception:
-                    break
-                if not isinstance(msg, dict):
-                    continue
-                rid = msg.get("request_id")
-                if rid == request_id:
-                    if msg.get("error"):
-                        raise RuntimeError(str(msg.get("error")))
-                    result = msg.get("result")
-                    if wrap_result:
-                        return result if isinstance(result, dict) else {"result": result}
-                    return result
-                if isinstance(pending, dict) and rid:
-                    try:
-                        if len(pending) > 1024:
-                            keys_to_remove = list(pending.keys())[:512]
-                            for k in keys_to_remove:
-                                pending.pop(k, None)
-                        pending[str(rid)] = msg
-                    except Exception:
-                        pass
-
-        check_interval = 0.01
-        while time.time() < deadline:
-            response = state.get_plugin_response(request_id)
-            if not isinstance(response, dict):
-                await asyncio.sleep(check_interval)
-                continue
+        # 响应由读取线程（响应队列）或 state 的 watcher 线程（共享响应映射）通过 Future 送达
+        state.ensure_response_watcher()
+        try:
+            response = await asyncio.wait_for(fut, timeout=max(0.0, deadline - time.time()))
+        except asyncio.TimeoutError:
+            response = None
+        finally:
+            router.discard(request_id)
 
+        if isinstance(response, dict):
             if response.get("error"):
                 raise RuntimeError(str(response.get("error")))
-
             result = response.get("result")
             if wrap_result:
                 return result if isinstance(result, dict) else {"result": result}
@@ -4,6 +4,7 @@
 提供插件系统的全局运行时状态管理。
 """
 import asyncio
+import heapq
 import itertools
 import threading
 import time
@@ -116,6 +117,133 @@ class BusChangeHub:
                 continue
 
 
+def _resolve_future(fut: "asyncio.Future[Any]", value: Any) -> None:
+    if not fut.done():
+        fut.set_result(value)
+
+
+class PluginResponseRouter:
+    """Deliver plugin-to-plugin responses to per-request ``asyncio.Future`` waiters.
+
+    ``register()`` is called on the waiter's event loop; ``resolve()`` may be
+    called from any thread and wakes the waiter via ``loop.call_soon_threadsafe``,
+    so a pending request costs one Future instead of an executor thread polling
+    an Event. Responses that arrive before their waiter registers are parked
+    (``keep_for``) and expire through a min-heap instead of a full scan.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, Tuple[asyncio.AbstractEventLoop, "asyncio.Future[Any]"]] = {}
+        self._unclaimed: Dict[str, Tuple[float, Any]] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self.resolved = 0
+        self.parked = 0
+        self.expired = 0
+
+    def register(self, request_id: str) -> "asyncio.Future[Any]":
+        """Create the Future for ``request_id`` on the running loop (must be called from it)."""
+        rid = str(request_id)
+        loop = asyncio.get_running_loop()
+        fut: "asyncio.Future[Any]" = loop.create_future()
+        with self._lock:
+            parked = self._unclaimed.pop(rid, None)
+            if parked is None:
+                self._waiters[rid] = (loop, fut)
+        if parked is not None:
+            fut.set_result(parked[1])
+        return fut
+
+    def resolve(self, request_id: str, response: Any, keep_for: Optional[float] = None) -> bool:
+        """Hand ``response`` to its waiter; returns False when nobody is waiting.
+
+        With ``keep_for`` an unclaimed response is parked for that many seconds so
+        a waiter registering late still receives it.
+        """
+        rid = str(request_id)
+        with self._lock:
+            entry = self._waiters.pop(rid, None)
+            if entry is None:
+                if keep_for is not None:
+                    expire_at = time.monotonic() + max(0.0, float(keep_for))
+                    self._unclaimed[rid] = (expire_at, response)
+                    heapq.heappush(self._expiry, (expire_at, rid))
+                    self.parked += 1
+                return False
+            self.resolved += 1
+        loop, fut = entry
+        try:
+            loop.call_soon_threadsafe(_resolve_future, fut, response)
+        except RuntimeError:
+            # 等待方的事件循环已关闭
+            return False
+        return True
+
+    def discard(self, request_id: str) -> None:
+        """Forget the waiter for ``request_id`` (timeout / cancellation)."""
+        with self._lock:
+            self._waiters.pop(str(request_id), None)
+
+    def pending_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._waiters)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop parked responses whose deadline passed; O(k log n) for k expired entries."""
+        now = time.monotonic() if now is None else now
+        dropped = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expire_at, rid = heapq.heappop(self._expiry)
+                parked = self._unclaimed.get(rid)
+                # 同一 request_id 被重新暂存时，旧的堆条目不再有效
+                if parked is not None and parked[0] == expire_at:
+                    del self._unclaimed[rid]
+                    dropped += 1
+            self.expired += dropped
+        return dropped
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "waiting": len(self._waiters),
+                "unclaimed": len(self._unclaimed),
+                "resolved": self.resolved,
+                "parked": self.parked,
+                "expired": self.expired,
+            }
+
+
+class ResponseNotifier:
+    """Cross-process "a response arrived" signal that nobody has to clear.
+
+    Writers bump a shared sequence number and wake all waiters; each process
+    remembers the last sequence it handled and waits for it to change. Unlike a
+    shared ``Event`` that every watcher ``clear()``s, one process can never
+    swallow another process's wakeup. Must be created before plugin processes
+    fork so all of them share the same counter and condition.
+    """
+
+    def __init__(self) -> None:
+        self._cond = multiprocessing.Condition()
+        self._seq = multiprocessing.RawValue("Q", 0)
+
+    def notify(self) -> None:
+        with self._cond:
+            self._seq.value += 1
+            self._cond.notify_all()
+
+    def current(self) -> int:
+        with self._cond:
+            return int(self._seq.value)
+
+    def wait(self, last_seq: int, timeout: Optional[float] = None) -> int:
+        """Block until the sequence differs from ``last_seq`` or ``timeout`` elapses; return the current one."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq.value != last_seq, timeout=timeout)
+            return int(self._seq.value)
+
+
 class GlobalState:
     def __init__(self) -> None:
         self._lock = threading.Lock()
@@ -153,13 +281,20 @@ class GlobalState:
         self._plugin_response_map: Optional[Any] = None
         self._plugin_response_map_manager: Optional[Any] = None
         self._plugin_response_event_map: Optional[Any] = None
-        self._plugin_response_notify_event: Optional[Any] = None
+        self._plugin_response_notifier: Optional[ResponseNotifier] = None
         # 保护跨进程通信资源懒加载的锁
         self._plugin_comm_lock = threading.Lock()
 
         self._plugin_response_queues: Dict[str, Any] = {}
         self._plugin_response_queues_lock = threading.Lock()
 
+        # 进程内异步等待方 + 响应过期堆（替代对共享响应映射的全量扫描）
+        self._response_router = PluginResponseRouter()
+        self._response_expiry: List[Tuple[float, str]] = []
+        self._response_expiry_lock = threading.Lock()
+        self._response_watcher: Optional[threading.Thread] = None
+        self._response_watcher_lock = threading.Lock()
+
         self._bus_store_lock = threading.Lock()
         self._message_store: Deque[Dict[str, Any]] = deque(maxlen=MESSAGE_QUEUE_MAX)
         self._event_store: Deque[Dict[str, Any]] = deque(maxlen=EVENT_QUEUE_MAX)
@@ -534,18 +669,74 @@ class GlobalState:
         return self._plugin_response_event_map
 
     @property
-    def plugin_response_notify_event(self) -> Any:
-        """Single cross-process event used to wake waiters when any response arrives.
+    def plugin_response_notifier(self) -> ResponseNotifier:
+        """Single cross-process notifier used to wake watchers when any response arrives.
 
         This avoids per-request Event creation which is expensive and can diverge across processes.
         Important: on Linux (fork), this must be created in the parent before plugin processes start.
         """
-        if self._plugin_response_notify_event is None:
+        if self._plugin_response_notifier is None:
             with self._plugin_comm_lock:
-                if self._plugin_response_notify_event is None:
-                    # multiprocessing.Event is backed by a shared semaphore/pipe and works across fork.
-                    self._plugin_response_notify_event = multiprocessing.Event()
-        return self._plugin_response_notify_event
+                if self._plugin_response_notifier is None:
+                    # Condition/RawValue are backed by shared semaphores/memory and work across fork.
+                    self._plugin_response_notifier = ResponseNotifier()
+        return self._plugin_response_notifier
+
+    @property
+    def plugin_response_router(self) -> PluginResponseRouter:
+        """In-process router resolving async waiters of plugin responses."""
+        return self._response_router
+
+    def ensure_response_watcher(self) -> None:
+        """Start the per-process thread that hands map-delivered responses to async waiters.
+
+        Responses written by another process only reach this one through the
+        shared response map; a single thread waits on the shared notifier's
+        sequence number and resolves whichever registered waiters have a
+        response, so waiters themselves never poll.
+        """
+        if self._response_watcher is not None:
+            return
+        with self._response_watcher_lock:
+            if self._response_watcher is not None:
+                return
+            t = threading.Thread(target=self._response_watcher_loop, name="plugin-response-watcher", daemon=True)
+            self._response_watcher = t
+            t.start()
+
+    def _response_watcher_loop(self) -> None:
+        try:
+            notifier = self.plugin_response_notifier
+            seq = notifier.current()
+        except Exception:
+            notifier, seq = None, 0
+        # 先扫描一次：覆盖 watcher 启动前已写入共享映射的响应
+        changed = True
+        while True:
+            pending = self._response_router.pending_ids() if changed else None
+            if pending:
+                try:
+                    arrived = set(self.plugin_response_map.keys())
+                except Exception:
+                    arrived = set()
+                for rid in pending:
+                    if rid not in arrived:
+                        continue
+                    response = self.get_plugin_response(rid)
+                    if response is not None:
+                        self._response_router.resolve(rid, response)
+            if notifier is None:
+                # 通知器不可用时退化为低频轮询
+                time.sleep(0.1)
+                continue
+            try:
+                # 只在序号变化（确有响应写入）时才访问共享映射，等待期间不轮询
+                new_seq = notifier.wait(seq, timeout=1.0)
+            except Exception:
+                notifier = None
+                continue
+            changed = new_seq != seq
+            seq = new_seq
 
     def _get_or_create_response_event(self, request_id: str):
         rid = str(request_id)
@@ -1260,6 +1451,9 @@ class GlobalState:
         rid = str(request_id).strip()
         if not rid:
             return
+        # 本进程内已有异步等待方：直接唤醒其 Future，无需经过共享响应映射
+        if self._response_router.resolve(rid, response):
+            return
         # 存储响应和过期时间（当前时间 + timeout + 缓冲时间）
         # 缓冲时间用于处理网络延迟等情况
         expire_time = time.time() + timeout + 1.0  # 额外1秒缓冲
@@ -1268,6 +1462,8 @@ class GlobalState:
             "response": response,
             "expire_time": expire_time
         }
+        with self._response_expiry_lock:
+            heapq.heappush(self._response_expiry, (expire_time, rid))
 
         try:
             ev = self._get_or_create_response_event(rid)
@@ -1277,7 +1473,7 @@ class GlobalState:
             pass
 
         try:
-            self.plugin_response_notify_event.set()
+            self.plugin_response_notifier.notify()
         except Exception:
             pass
     
@@ -1332,10 +1528,10 @@ class GlobalState:
         return response_data.get("response")
 
     async def wait_for_plugin_response_async(self, request_id: str, timeout: float) -> Optional[Dict[str, Any]]:
-        """异步版本:等待响应到达,完全消除轮询,使用纯事件驱动
-        
-        相比同步版本,异步版本完全避免了 time.sleep 轮询,
-        使用 asyncio.Event 实现零延迟响应。
+        """异步版本:等待响应到达,纯事件驱动
+
+        为请求注册一个 asyncio.Future：本进程内 set_plugin_response 直接唤醒它，
+        其它进程写入共享映射的响应由 watcher 线程转交。等待期间不占用线程池线程、不轮询。
         """
         rid = str(request_id).strip()
         if not rid:
@@ -1346,55 +1542,20 @@ class GlobalState:
         if got is not None:
             return got
         
-        # 创建异步事件用于等待
-        async_event = asyncio.Event()
-        
-        # 注册回调:响应到达时立即通知
-        def check_and_notify():
-            response = self.get_plugin_response(rid)
-            if response is not None:
-                async_event.set()
-                return response
-            return None
-        
-        # 使用 asyncio.wait_for 实现超时
+        router = self._response_router
+        fut = router.register(rid)
         try:
-            # 启动后台任务轮询(但使用很短的间隔)
-            async def wait_with_polling():
-                # 先检查一次
-                result = check_and_notify()
-                if result is not None:
-                    return result
-                
-                # 等待事件或使用短轮询作为后备
-                while True:
-                    # 尝试等待同步事件(如果可用)
-                    per_req_ev = None
-                    try:
-                        per_req_ev = self._get_or_create_response_event(rid)
-                    except Exception:
-                        pass
-                    
-                    if per_req_ev is not None:
-                        # 使用线程事件等待(在线程池中执行)
-                        loop = asyncio.get_event_loop()
-                        ev = per_req_ev  # 捕获变量避免 None 类型问题
-                        await loop.run_in_executor(
-                            None,
-                            lambda: ev.wait(timeout=0.01)
-                        )
-                    else:
-                        # 后备:短暂休眠
-                        await asyncio.sleep(0.001)  # 1ms,比同步版本的 10ms 快 10 倍
-                    
-                    # 检查响应
-                    result = check_and_notify()
-                    if result is not None:
-                        return result
-            
-            return await asyncio.wait_for(wait_with_polling(), timeout=timeout)
+            # 注册后再检查一次，覆盖注册前刚写入映射的响应
+            if not fut.done():
+                got = self.get_plugin_response(rid)
+                if got is not None:
+                    return got
+                self.ensure_response_watcher()
+            return await asyncio.wait_for(fut, timeout=max(0.0, float(timeout)))
         except asyncio.TimeoutError:
             return None
+        finally:
+            router.discard(rid)
     
     def wait_for_plugin_response(self, request_id: str, timeout: float) -> Optional[Dict[str, Any]]:
         """同步版本:Block until response arrives or timeout, then pop and return it.
@@ -1494,32 +1655,45 @@ class GlobalState:
 
         return response_data.get("response")
     
-    def cleanup_expired_responses(self) -> int:
+    def cleanup_expired_responses(self, full_scan: bool = False) -> int:
         """
         清理过期的响应（主进程定期调用）
+
+        本进程写入的响应按过期时间进入最小堆，只弹出已到期的条目；
+        full_scan=True 时额外全量扫描共享映射（兜底清理其它进程写入的条目）。
         
         Returns:
             清理的响应数量
         """
         current_time = time.time()
         expired_ids = []
-        
-        # 找出所有过期的响应
-        try:
-            # 使用快照避免迭代时字典被修改导致 RuntimeError
-            resp_map = self.plugin_response_map
-            for request_id, response_data in list(resp_map.items()):
-                expire_time = response_data.get("expire_time", 0)
-                if current_time > expire_time:
-                    expired_ids.append(request_id)
-        except Exception as e:
-            # 如果迭代失败，返回已找到的过期ID数量
-            logger.bind(component="server").debug(f"Error iterating expired responses: {e}")
-        
-        # 删除过期的响应
+
+        with self._response_expiry_lock:
+            while self._response_expiry and self._response_expiry[0][0] < current_time:
+                expired_ids.append(heapq.heappop(self._response_expiry)[1])
+
         resp_map = self.plugin_response_map
+        if full_scan:
+            try:
+                # 使用快照避免迭代时字典被修改导致 RuntimeError
+                for request_id, response_data in list(resp_map.items()):
+                    expire_time = response_data.get("expire_time", 0)
+                    if current_time > expire_time:
+                        expired_ids.append(request_id)
+            except Exception as e:
+                logger.bind(component="server").debug(f"Error iterating expired responses: {e}")
+
+        cleaned = 0
         for request_id in expired_ids:
+            response_data = resp_map.get(request_id, None)
+            if response_data is None:
+                # 已被等待方取走
+                continue
+            # 同一 request_id 可能被重新写入，只删除确实过期的条目
+            if current_time <= response_data.get("expire_time", 0):
+                continue
             resp_map.pop(request_id, None)
+            cleaned += 1
             try:
                 event_map = self.plugin_response_event_map
                 rid = str(request_id).strip()
@@ -1529,8 +1703,9 @@ class GlobalState:
                     event_map.pop(request_id, None)
             except Exception:
                 pass
-        
-        return len(expired_ids)
+
+        self._response_router.expire()
+        return cleaned
     
     def close_plugin_resources(self) -> None:
         """
@@ -1558,7 +1733,7 @@ class GlobalState:
                 self._plugin_response_map_manager.shutdown()
                 self._plugin_response_map = None
                 self._plugin_response_event_map = None
-                self._plugin_response_notify_event = None
+                self._plugin_response_notifier = None
                 self._plugin_response_map_manager = None
                 logger.bind(component="server").debug("Plugin response map manager shut down")
             except Exception as e:
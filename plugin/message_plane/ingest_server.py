@@ -7,6 +7,7 @@ import ormsgpack
 import zmq
 from loguru import logger
 
+from plugin.utils.instrumentation import registry as _metrics
 from plugin.settings import (
     MESSAGE_PLANE_INGEST_BACKPRESSURE_SLEEP_SECONDS,
     MESSAGE_PLANE_INGEST_RCVHWM,
@@ -24,6 +25,8 @@ from plugin.settings import (
 from .pub_server import MessagePlanePubServer
 from .stores import StoreRegistry, TopicStore
 
+_INGEST_BATCH_ITEMS = _metrics.histogram("message_plane_ingest_batch_items", "Items per ingested delta batch")
+
 
 def _loads(data: bytes) -> Any:
     return ormsgpack.unpackb(data)
@@ -77,6 +80,7 @@ class MessagePlaneIngestServer:
         if not isinstance(items, list):
             self._stats_dropped += 1
             return
+        _INGEST_BATCH_ITEMS.observe(len(items))
         for it in items:
             if not isinstance(it, dict):
                 self._stats_dropped += 1
@@ -135,7 +139,7 @@ class MessagePlaneIngestServer:
                 self._stats_last_source = None
             if self._pub is not None and bool(MESSAGE_PLANE_PUB_ENABLED):
                 try:
-                    self._pub.publish(f"{st.name}.{topic}", event)
+                    self._pub.publish_event(st.name, topic, event)
                 except Exception:
                     pass
 
@@ -192,7 +196,7 @@ class MessagePlaneIngestServer:
                 self._stats_last_topic = str(topic)
                 if self._pub is not None and bool(MESSAGE_PLANE_PUB_ENABLED):
                     try:
-                        self._pub.publish(f"{st.name}.{topic}", event)
+                        self._pub.publish_event(st.name, topic, event)
                     except Exception:
                         pass
             return
@@ -207,7 +211,7 @@ class MessagePlaneIngestServer:
         if self._pub is not None and bool(MESSAGE_PLANE_PUB_ENABLED):
             for ev in events:
                 try:
-                    self._pub.publish(f"{st.name}.{topic}", ev)
+                    self._pub.publish_event(st.name, topic, ev)
                 except Exception:
                     continue
 
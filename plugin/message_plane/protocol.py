@@ -12,6 +12,7 @@ PROTOCOL_VERSION = 1
 RpcOp = Literal[
     "ping",
     "health",
+    "metrics",
     "bus.list_topics",
     "bus.publish",
     "bus.get_recent",
@@ -1,34 +1,193 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
-from typing import Any, Dict
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+from urllib.parse import parse_qsl
 
+import ormsgpack
 import zmq
 from loguru import logger
 
+from plugin.settings import MESSAGE_PLANE_ZMQ_PUB_EXTRA_ENDPOINTS
+
+
+PUB_WIRES = ("json", "msgpack")
+PUB_TOPIC_FORMATS = ("legacy", "structured")
+
+
+def _segment(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def legacy_pub_topic(store: Any, topic: Any) -> str:
+    """Original PUB topic ``store.topic`` (default endpoint format)."""
+    return f"{_segment(store)}.{_segment(topic)}"
+
+
+def pub_topic(store: Any, topic: Any, plugin_id: Any = None) -> str:
+    """Structured PUB topic ``store/topic/plugin_id/``.
+
+    Every segment is terminated by ``/`` so a subscription prefix always ends on
+    a segment boundary (``messages/all/p1/`` does not match plugin ``p10``).
+    """
+    return f"{_segment(store)}/{_segment(topic)}/{_segment(plugin_id)}/"
+
+
+def pub_topic_prefix(store: Any, topic: Any = None, plugin_id: Any = None) -> str:
+    """Subscription prefix for :func:`pub_topic`; trailing ``None`` segments act as wildcards."""
+    prefix = f"{_segment(store)}/"
+    if topic is None:
+        return prefix
+    prefix += f"{_segment(topic)}/"
+    if plugin_id is None:
+        return prefix
+    return prefix + f"{_segment(plugin_id)}/"
+
+
+def light_event(ev: Dict[str, Any]) -> Dict[str, Any]:
+    idx = ev.get("index")
+    return {
+        "seq": ev.get("seq"),
+        "ts": ev.get("ts"),
+        "store": ev.get("store"),
+        "topic": ev.get("topic"),
+        "index": idx if isinstance(idx, dict) else {},
+    }
+
+
+@dataclass
+class PubChannel:
+    """One bound PUB endpoint and the format it publishes."""
+
+    endpoint: str
+    wire: str = "json"
+    topics: str = "legacy"
+    light: bool = False
+
+    @classmethod
+    def parse(cls, spec: str) -> "PubChannel":
+        """``endpoint[?wire=msgpack&topics=structured&light=1]``; unknown values fall back to the legacy format."""
+        endpoint, _, query = str(spec).partition("?")
+        opts = dict(parse_qsl(query))
+        wire = opts.get("wire", "json").strip().lower()
+        if wire not in PUB_WIRES:
+            logger.warning("[message_plane] unknown pub wire {!r} for {}, falling back to json", wire, endpoint)
+            wire = "json"
+        topics = opts.get("topics", "legacy").strip().lower()
+        if topics not in PUB_TOPIC_FORMATS:
+            logger.warning("[message_plane] unknown pub topic format {!r} for {}, falling back to legacy", topics, endpoint)
+            topics = "legacy"
+        light = opts.get("light", "").strip().lower() in ("1", "true", "yes", "on")
+        return cls(endpoint=endpoint.strip(), wire=wire, topics=topics, light=light)
+
+    def topic_for(self, store: str, topic: str, plugin_id: Any) -> bytes:
+        if self.topics == "structured":
+            return pub_topic(store, topic, plugin_id).encode("utf-8")
+        return legacy_pub_topic(store, topic).encode("utf-8")
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.endpoint,
+            "wire": self.wire,
+            "topic_format": "store/topic/plugin_id/" if self.topics == "structured" else "store.topic",
+            "light": self.light,
+        }
+
+
+def _encode(wire: str, obj: Dict[str, Any]) -> bytes:
+    if wire == "msgpack":
+        return ormsgpack.packb(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
 
 @dataclass
 class MessagePlanePubServer:
+    """PUB fan-out for store events.
+
+    ``endpoint`` keeps the original format (JSON body, ``store.topic`` topic) so
+    existing subscribers keep matching. ``extra_endpoints`` are opt-in channels
+    parsed by :meth:`PubChannel.parse`, each with its own body encoding, topic
+    format and light (index-only) flag. Subscribers pick a channel from the RPC
+    ``health`` op (``result.pub.channels``). Each event is encoded at most once
+    per (wire, light) combination.
+    """
+
     endpoint: str
+    extra_endpoints: Sequence[str] = field(default_factory=lambda: list(MESSAGE_PLANE_ZMQ_PUB_EXTRA_ENDPOINTS))
 
     def __post_init__(self) -> None:
         self._ctx = zmq.Context.instance()
-        self._sock = self._ctx.socket(zmq.PUB)
-        self._sock.linger = 0
-        self._sock.bind(self.endpoint)
-        logger.info("[message_plane] pub server bound: {}", self.endpoint)
+        self._channels: List[Tuple[PubChannel, Any]] = []
+        try:
+            for channel in [PubChannel(endpoint=self.endpoint)] + [PubChannel.parse(s) for s in self.extra_endpoints]:
+                sock = self._ctx.socket(zmq.PUB)
+                sock.linger = 0
+                self._channels.append((channel, sock))
+                sock.bind(channel.endpoint)
+        except Exception:
+            self.close()
+            raise
+        # The PUB sockets are shared by the ingest thread and the RPC workers;
+        # zmq sockets are not thread-safe.
+        self._lock = threading.Lock()
+        logger.info(
+            "[message_plane] pub server bound: {}",
+            ", ".join(f"{c.endpoint} (wire={c.wire}, topics={c.topics}, light={c.light})" for c, _ in self._channels),
+        )
 
-    def publish(self, topic: str, event: Dict[str, Any]) -> None:
-        t = str(topic).encode("utf-8")
-        body = json.dumps(event, ensure_ascii=False).encode("utf-8")
+    def describe(self) -> Dict[str, Any]:
+        main = self._channels[0][0].describe()
+        return {**main, "channels": [c.describe() for c, _ in self._channels]}
+
+    def publish_event(self, store: str, topic: str, event: Dict[str, Any]) -> None:
+        idx = event.get("index")
+        plugin_id = idx.get("plugin_id") if isinstance(idx, dict) else None
+        bodies: Dict[Tuple[str, bool], bytes] = {}
+        frames = []
+        try:
+            for channel, sock in self._channels:
+                key = (channel.wire, channel.light)
+                body = bodies.get(key)
+                if body is None:
+                    body = _encode(channel.wire, light_event(event) if channel.light else event)
+                    bodies[key] = body
+                frames.append((sock, channel.topic_for(store, topic, plugin_id), body))
+        except Exception:
+            return
         try:
-            self._sock.send_multipart([t, body])
+            with self._lock:
+                for sock, t, body in frames:
+                    sock.send_multipart([t, body])
         except Exception:
             pass
 
-    def close(self) -> None:
+    def publish(self, topic: str, event: Dict[str, Any]) -> None:
+        """Raw publish with a caller-supplied topic; skipped on light channels."""
+        t = str(topic).encode("utf-8")
+        bodies: Dict[str, bytes] = {}
+        frames = []
+        try:
+            for channel, sock in self._channels:
+                if channel.light:
+                    continue
+                body = bodies.get(channel.wire)
+                if body is None:
+                    body = bodies[channel.wire] = _encode(channel.wire, event)
+                frames.append((sock, body))
+        except Exception:
+            return
         try:
-            self._sock.close(linger=0)
+            with self._lock:
+                for sock, body in frames:
+                    sock.send_multipart([t, body])
         except Exception:
             pass
+
+    def close(self) -> None:
+        for _, sock in self._channels:
+            try:
+                sock.close(linger=0)
+            except Exception:
+                pass
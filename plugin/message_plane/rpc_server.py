@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import json
+import os
 import re
+import threading
 import time
+from collections import deque
 from typing import Any, Dict, List, Optional, Tuple
 
 import zmq
@@ -14,9 +17,11 @@ try:
 except ImportError:  # pragma: no cover
     safe_regex = None
 
+from plugin.utils.instrumentation import registry as _metrics
 from plugin.settings import (
     MESSAGE_PLANE_GET_RECENT_MAX_LIMIT,
     MESSAGE_PLANE_PAYLOAD_MAX_BYTES,
+    MESSAGE_PLANE_RPC_WORKERS,
     MESSAGE_PLANE_STORE_MAXLEN,
     MESSAGE_PLANE_TOPIC_MAX,
     MESSAGE_PLANE_TOPIC_NAME_MAX_LEN,
@@ -32,7 +37,7 @@ from .protocol import (
     err_response,
     ok_response,
 )
-from .pub_server import MessagePlanePubServer
+from .pub_server import MessagePlanePubServer, light_event
 from .stores import StoreRegistry, TopicStore
 from .validation import validate_rpc_envelope
 
@@ -42,6 +47,8 @@ _MAX_REGEX_TEXT_LEN = 1024
 _REGEX_TIMEOUT_SECONDS = 0.02
 _MAX_PLAN_DEPTH = 16
 
+_WORKER_READY = b"READY"
+
 
 def _validate_regex_pattern(pattern: str, *, strict: bool) -> Optional[bool]:
     if not isinstance(pattern, str) or not pattern:
@@ -88,6 +95,32 @@ def _maybe_match_regex(pattern: str, value: Any, *, strict: bool) -> Optional[bo
         return False if strict else None
 
 
+# Ops exported to /metrics by name; anything else is folded into "<other>" so a
+# misbehaving client cannot blow up label cardinality.
+_KNOWN_OPS = frozenset(
+    ("ping", "health", "metrics", "bus.list_topics", "bus.publish", "bus.get_recent", "bus.get_since", "bus.query", "bus.replay")
+)
+_RPC_SECONDS = _metrics.histogram(
+    "message_plane_rpc_seconds", "Message plane RPC handling latency by op", labels=("op",), unit="seconds"
+)
+
+
+def _latency_snapshot() -> Dict[str, Any]:
+    """Per-op latency reported by the ``health`` op, read from ``_RPC_SECONDS``."""
+    ops: Dict[str, Any] = {}
+    for (op,), st in _RPC_SECONDS.summary().items():
+        count = st["count"]
+        p50, p99 = st["quantiles"][0.5], st["quantiles"][0.99]
+        ops[op] = {
+            "count": count,
+            "avg_ms": round(st["sum"] * 1000.0 / count, 4) if count else 0.0,
+            # Upper bound of the bucket holding the quantile; None means "above the last bucket".
+            "p50_le_ms": None if p50 is None else round(p50 * 1000.0, 4),
+            "p99_le_ms": None if p99 is None else round(p99 * 1000.0, 4),
+        }
+    return {"ops": ops}
+
+
 class MessagePlaneRpcServer:
     def __init__(
         self,
@@ -96,8 +129,10 @@ class MessagePlaneRpcServer:
         pub_server: Optional[MessagePlanePubServer] = None,
         store_maxlen: int = MESSAGE_PLANE_STORE_MAXLEN,
         stores: Optional[StoreRegistry] = None,
+        workers: int = MESSAGE_PLANE_RPC_WORKERS,
     ) -> None:
         self.endpoint = endpoint
+        self.workers = max(0, int(workers))
         self._ctx = zmq.Context.instance()
         self._sock = self._ctx.socket(zmq.ROUTER)
         self._sock.linger = 0
@@ -113,6 +148,9 @@ class MessagePlaneRpcServer:
                 self._stores.register(TopicStore(name=name, maxlen=store_maxlen))
         self._pub = pub_server
         self._running = False
+        # Read-only ops run concurrently against the (internally locked) stores;
+        # bus.publish is serialized so seq order matches PUB order.
+        self._write_lock = threading.Lock()
 
     def _resolve_store(self, args: Dict[str, Any]) -> Optional[TopicStore]:
         store = args.get("store")
@@ -521,6 +559,9 @@ class MessagePlaneRpcServer:
             parts = self._sock.recv_multipart()
         except Exception:
             return None
+        return self._decode(parts)
+
+    def _decode(self, parts: list[bytes]) -> Optional[Tuple[list[bytes], Dict[str, Any], str]]:
         if len(parts) < 2:
             return None
         raw = parts[-1]
@@ -536,22 +577,16 @@ class MessagePlaneRpcServer:
         envelope = parts[:-1]
         return envelope, msg, enc
 
-    def _send(self, envelope: list[bytes], msg: Dict[str, Any], *, enc: str) -> None:
+    def _encode(self, msg: Dict[str, Any], *, enc: str) -> bytes:
         if enc == "msgpack":
-            payload = ormsgpack.packb(msg)
-        else:
-            payload = json.dumps(msg, ensure_ascii=False).encode("utf-8")
-        self._sock.send_multipart([*envelope, payload])
+            return ormsgpack.packb(msg)
+        return json.dumps(msg, ensure_ascii=False).encode("utf-8")
+
+    def _send(self, envelope: list[bytes], msg: Dict[str, Any], *, enc: str) -> None:
+        self._sock.send_multipart([*envelope, self._encode(msg, enc=enc)])
 
     def _light_item(self, ev: Dict[str, Any]) -> Dict[str, Any]:
-        idx = ev.get("index")
-        return {
-            "seq": ev.get("seq"),
-            "ts": ev.get("ts"),
-            "store": ev.get("store"),
-            "topic": ev.get("topic"),
-            "index": idx if isinstance(idx, dict) else {},
-        }
+        return light_event(ev)
 
     def _handle(self, req: Dict[str, Any]) -> Dict[str, Any]:
         if not isinstance(req, dict):
@@ -576,9 +611,25 @@ class MessagePlaneRpcServer:
 
         validate_mode = str(MESSAGE_PLANE_VALIDATE_MODE or "off")
 
-        if op in ("ping", "health"):
+        if op == "ping":
             return ok_response(req_id, {"ok": True, "ts": time.time()})
 
+        if op == "health":
+            return ok_response(
+                req_id,
+                {
+                    "ok": True,
+                    "ts": time.time(),
+                    "workers": self.workers,
+                    "latency": _latency_snapshot(),
+                    "pub": self._pub.describe() if self._pub is not None else None,
+                },
+            )
+
+        if op == "metrics":
+            # external 模式下本进程的指标注册表与主进程隔离，主进程的 /metrics 通过该 op 拉取并拼接
+            return ok_response(req_id, {"pid": os.getpid(), "text": _metrics.render()})
+
         if op == "bus.list_topics":
             st = self._resolve_store(args)
             if st is None:
@@ -620,9 +671,10 @@ class MessagePlaneRpcServer:
             if len(payload_bytes) > MESSAGE_PLANE_PAYLOAD_MAX_BYTES:
                 return err_response(req_id, "payload too large")
 
-            event = st.publish(topic, payload)
-            if self._pub is not None:
-                self._pub.publish(f"{st.name}.{topic}", event)
+            with self._write_lock:
+                event = st.publish(topic, payload)
+                if self._pub is not None:
+                    self._pub.publish_event(st.name, topic, event)
             return ok_response(req_id, {"accepted": True, "event": event})
 
         if op == "bus.get_recent":
@@ -817,8 +869,23 @@ class MessagePlaneRpcServer:
 
         return err_response(req_id, f"unknown op: {op}")
 
+    def _dispatch(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        op = str(req.get("op") or "") if isinstance(req, dict) else ""
+        try:
+            resp = self._handle(req)
+        except Exception:
+            req_id = str(req.get("req_id") or "") if isinstance(req, dict) else ""
+            logger.exception("[message_plane] rpc handler error for req_id={}", req_id)
+            resp = err_response(req_id, "internal error")
+        _RPC_SECONDS.labels(op if op in _KNOWN_OPS else "<other>").observe(time.perf_counter() - started)
+        return resp
+
     def serve_forever(self) -> None:
         self._running = True
+        if self.workers > 0:
+            self._serve_pool()
+            return
         poller = zmq.Poller()
         poller.register(self._sock, zmq.POLLIN)
         logger.info("[message_plane] rpc server bound: {}", self.endpoint)
@@ -837,16 +904,153 @@ class MessagePlaneRpcServer:
             if recvd is None:
                 continue
             envelope, req, enc = recvd
-            try:
-                resp = self._handle(req)
-            except Exception:
-                req_id = str(req.get("req_id") or "") if isinstance(req, dict) else ""
-                logger.exception("[message_plane] rpc handler error for req_id={}", req_id)
-                resp = err_response(req_id, "internal error")
+            resp = self._dispatch(req)
             try:
                 self._send(envelope, resp, enc=enc)
             except Exception:
                 logger.warning("[message_plane] failed to send response")
 
+    def _serve_pool(self) -> None:
+        """ROUTER frontend + inproc worker pool (load-balancing broker).
+
+        Each worker is a DEALER socket that announces itself with a READY frame
+        and is only handed a request while idle, so a slow ``bus.replay`` never
+        queues other requests behind it. The broker thread only shuffles frames;
+        decoding, handling and encoding all happen in the workers.
+        """
+        backend_ep = f"inproc://message-plane-rpc-workers-{id(self):x}"
+        backend = self._ctx.socket(zmq.ROUTER)
+        backend.linger = 0
+        backend.bind(backend_ep)
+
+        threads: List[threading.Thread] = [self._start_worker(backend_ep, i, 0) for i in range(self.workers)]
+        generations = [0] * self.workers
+
+        idle: deque[bytes] = deque()
+        poller = zmq.Poller()
+        poller.register(backend, zmq.POLLIN)
+        frontend_polled = False
+        logger.info("[message_plane] rpc server bound: {} (workers={})", self.endpoint, self.workers)
+        try:
+            while self._running:
+                # Only accept new requests while some worker is free; zmq buffers the rest.
+                if idle and not frontend_polled:
+                    poller.register(self._sock, zmq.POLLIN)
+                    frontend_polled = True
+                elif not idle and frontend_polled:
+                    poller.unregister(self._sock)
+                    frontend_polled = False
+                try:
+                    events = dict(poller.poll(timeout=250))
+                except (KeyboardInterrupt, SystemExit):
+                    raise
+                except Exception:
+                    if not self._running:
+                        break
+                    continue
+
+                # A worker whose socket broke exits; replace it so the pool never shrinks.
+                for i, t in enumerate(threads):
+                    if not t.is_alive() and self._running:
+                        generations[i] += 1
+                        logger.warning("[message_plane] rpc worker {} exited, restarting", i)
+                        threads[i] = self._start_worker(backend_ep, i, generations[i])
+
+                if backend in events:
+                    while True:
+                        try:
+                            parts = backend.recv_multipart(zmq.NOBLOCK)
+                        except zmq.Again:
+                            break
+                        except Exception:
+                            break
+                        if not parts:
+                            continue
+                        idle.append(parts[0])
+                        if len(parts) > 2:
+                            try:
+                                self._sock.send_multipart(parts[1:])
+                            except Exception:
+                                logger.warning("[message_plane] failed to send response")
+
+                if self._sock in events:
+                    while idle:
+                        try:
+                            parts = self._sock.recv_multipart(zmq.NOBLOCK)
+                        except zmq.Again:
+                            break
+                        except Exception:
+                            break
+                        if len(parts) < 2:
+                            continue
+                        backend.send_multipart([idle.popleft(), *parts])
+        finally:
+            self._running = False
+            for t in threads:
+                t.join(timeout=1.0)
+            try:
+                backend.close(linger=0)
+            except Exception:
+                pass
+
+    def _start_worker(self, endpoint: str, index: int, generation: int) -> threading.Thread:
+        t = threading.Thread(
+            target=self._worker_loop,
+            args=(endpoint, index, generation),
+            daemon=True,
+            name=f"message-plane-rpc-worker-{index}",
+        )
+        t.start()
+        return t
+
+    def _worker_loop(self, endpoint: str, index: int, generation: int = 0) -> None:
+        sock = self._ctx.socket(zmq.DEALER)
+        sock.linger = 0
+        # A restarted worker gets a fresh identity so the broker never routes to the old peer.
+        sock.setsockopt(zmq.IDENTITY, f"w{index}.{generation}".encode("ascii"))
+        sock.connect(endpoint)
+        poller = zmq.Poller()
+        poller.register(sock, zmq.POLLIN)
+        try:
+            sock.send(_WORKER_READY)
+            while self._running:
+                try:
+                    if not poller.poll(timeout=250):
+                        continue
+                    parts = sock.recv_multipart()
+                except Exception:
+                    if not self._running:
+                        break
+                    continue
+                try:
+                    decoded = self._decode(parts)
+                    if decoded is None:
+                        sock.send(_WORKER_READY)
+                        continue
+                    envelope, req, enc = decoded
+                    resp = self._dispatch(req)
+                    try:
+                        payload = self._encode(resp, enc=enc)
+                    except Exception:
+                        logger.warning("[message_plane] failed to encode response")
+                        req_id = str(req.get("req_id") or "") if isinstance(req, dict) else ""
+                        payload = self._encode(err_response(req_id, "internal error"), enc=enc)
+                    sock.send_multipart([*envelope, payload])
+                except Exception:
+                    if not self._running:
+                        break
+                    logger.exception("[message_plane] rpc worker {} failed to reply", index)
+                    # The reply doubles as the READY signal; without it the broker never hands
+                    # this worker another request. If even that fails, exit and get restarted.
+                    try:
+                        sock.send(_WORKER_READY)
+                    except Exception:
+                        break
+        finally:
+            try:
+                sock.close(linger=0)
+            except Exception:
+                pass
+
     def stop(self) -> None:
         self._running = False
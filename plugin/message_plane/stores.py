@@ -1,12 +1,163 @@
 from __future__ import annotations
 
-import logging
+import heapq
 import time
 import threading
-from collections import defaultdict, deque
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
-from itertools import islice
-from typing import Any, Deque, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# Index fields that get a per-topic secondary index (value -> seq-ordered postings).
+_INDEXED_FIELDS: Tuple[str, ...] = ("plugin_id", "source", "kind", "type")
+
+# Compact the backing lists once this many evicted slots have accumulated at the head.
+_COMPACT_MIN = 1024
+
+# Wide (multi-topic) scans drop the store lock after this many merge steps so that
+# concurrent publishers are not stalled behind a long query.
+_MERGE_CHUNK = 512
+
+
+class _SeqList:
+    """Append-only, seq-ordered event list with O(1) amortized eviction from the head.
+
+    Evicted slots are skipped via ``base`` and reclaimed in bulk, so ``seqs`` stays a plain
+    monotonic list that ``bisect`` can search directly.
+    """
+
+    __slots__ = ("events", "seqs", "base", "gen")
+
+    def __init__(self) -> None:
+        self.events: List[Optional[Dict[str, Any]]] = []
+        self.seqs: List[int] = []
+        self.base = 0
+        # Bumped whenever positions shift (compaction), so cursors know to re-seek.
+        self.gen = 0
+
+    def __len__(self) -> int:
+        return len(self.events) - self.base
+
+    def append(self, ev: Dict[str, Any]) -> None:
+        self.events.append(ev)
+        self.seqs.append(int(ev["seq"]))
+
+    def popleft(self) -> Dict[str, Any]:
+        ev = self.events[self.base]
+        self.events[self.base] = None
+        self.base += 1
+        if self.base >= _COMPACT_MIN and self.base * 2 >= len(self.events):
+            del self.events[: self.base]
+            del self.seqs[: self.base]
+            self.base = 0
+            self.gen += 1
+        return ev  # type: ignore[return-value]
+
+    def head_seq(self) -> Optional[int]:
+        if self.base >= len(self.seqs):
+            return None
+        return self.seqs[self.base]
+
+    def tail(self, n: int) -> List[Dict[str, Any]]:
+        start = max(self.base, len(self.events) - int(n))
+        return self.events[start:]  # type: ignore[return-value]
+
+    def since(self, after_seq: int, limit: int) -> List[Dict[str, Any]]:
+        pos = bisect_right(self.seqs, after_seq, lo=self.base)
+        return self.events[pos : pos + int(limit)]  # type: ignore[return-value]
+
+
+
+class _Cursor:
+    """Resumable cursor over a _SeqList that survives the store lock being released.
+
+    The position is tracked by seq: the cached index is reused while the list has not been
+    compacted, otherwise the cursor re-seeks with bisect. Evicted events are simply skipped.
+    Caller must hold the store lock while calling ``next``.
+    """
+
+    __slots__ = ("plist", "seq", "pos", "gen", "newest_first")
+
+    def __init__(self, plist: _SeqList, start_seq: int, *, newest_first: bool) -> None:
+        # newest_first: yield seqs < start_seq in descending order; else seqs > start_seq ascending.
+        self.plist = plist
+        self.seq = int(start_seq)
+        self.pos: Optional[int] = None
+        self.gen = plist.gen
+        self.newest_first = newest_first
+
+    def next(self) -> Optional[Dict[str, Any]]:
+        pl = self.plist
+        if self.pos is not None and self.gen == pl.gen:
+            pos = self.pos - 1 if self.newest_first else self.pos + 1
+        elif self.newest_first:
+            pos = bisect_left(pl.seqs, self.seq, lo=pl.base) - 1
+        else:
+            pos = bisect_right(pl.seqs, self.seq, lo=pl.base)
+        if pos < pl.base or pos >= len(pl.seqs):
+            return None
+        self.pos = pos
+        self.gen = pl.gen
+        self.seq = pl.seqs[pos]
+        return pl.events[pos]
+
+
+class _TopicLog:
+    """Bounded per-topic event log plus its secondary indexes."""
+
+    __slots__ = ("capacity", "log", "postings")
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = int(capacity)
+        self.log = _SeqList()
+        self.postings: Dict[str, Dict[str, _SeqList]] = {f: {} for f in _INDEXED_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.log)
+
+    def add(self, ev: Dict[str, Any]) -> None:
+        self.log.append(ev)
+        idx = ev.get("index") or {}
+        for field in _INDEXED_FIELDS:
+            value = idx.get(field)
+            if value is None:
+                continue
+            plist = self.postings[field].get(value)
+            if plist is None:
+                plist = _SeqList()
+                self.postings[field][value] = plist
+            plist.append(ev)
+        while len(self.log) > self.capacity:
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        old = self.log.popleft()
+        seq = int(old["seq"])
+        idx = old.get("index") or {}
+        for field in _INDEXED_FIELDS:
+            value = idx.get(field)
+            if value is None:
+                continue
+            by_value = self.postings[field]
+            plist = by_value.get(value)
+            # Eviction is FIFO and postings are seq-ordered, so the evicted event is always
+            # the head of each posting list it belongs to.
+            if plist is None or plist.head_seq() != seq:
+                continue
+            plist.popleft()
+            if len(plist) == 0:
+                del by_value[value]
+
+    def candidates(self, eq_filters: List[Tuple[str, str]]) -> Optional[_SeqList]:
+        """Return the smallest seq list covering all equality filters (None if nothing matches)."""
+        best = self.log
+        for field, value in eq_filters:
+            plist = self.postings[field].get(value)
+            if plist is None:
+                return None
+            if len(plist) < len(best):
+                best = plist
+        return best
 
 
 @dataclass
@@ -16,7 +167,7 @@ class TopicStore:
 
     def __post_init__(self) -> None:
         self.maxlen = int(self.maxlen)
-        self.items: Dict[str, Deque[Dict[str, Any]]] = defaultdict(lambda: deque(maxlen=self.maxlen))
+        self.items: Dict[str, _TopicLog] = {}
         self.meta: Dict[str, Dict[str, Any]] = {}
         self._seq: int = 0
         self._lock = threading.RLock()
@@ -26,6 +177,12 @@ class TopicStore:
         self._seq += 1
         return self._seq
 
+    def _topics_for(self, topic_q: Optional[str]) -> List[str]:
+        # Caller is expected to hold _lock.
+        if topic_q is None or topic_q.strip() in ("", "*"):
+            return list(self.items.keys())
+        return [topic_q]
+
     def list_topics(self) -> list[Dict[str, Any]]:
         with self._lock:
             meta_items = list(self.meta.items())
@@ -49,7 +206,11 @@ class TopicStore:
                 "payload": payload,
                 "index": idx,
             }
-            self.items[t].append(event)
+            tl = self.items.get(t)
+            if tl is None:
+                tl = _TopicLog(self.maxlen)
+                self.items[t] = tl
+            tl.add(event)
             m = self.meta.get(t)
             if m is None:
                 self.meta[t] = {"created_at": now, "last_ts": now, "count_total": 1}
@@ -116,35 +277,59 @@ class TopicStore:
         t = str(topic)
         if limit <= 0:
             return []
-
-        # Optimistic fast path: avoid waiting behind the publish lock under heavy ingest.
-        # Deque iteration can raise if mutated concurrently; retry a few times then fall back.
-        dq = self.items.get(t)
-        if not dq:
-            return []
-        limit_i = int(limit)
-        for _ in range(3):
-            try:
-                dq_len = len(dq)
-                if limit_i >= dq_len:
-                    return list(dq)
-                # More efficient: directly slice from the end without multiple reversals
-                start_idx = dq_len - limit_i
-                return [dq[i] for i in range(start_idx, dq_len)]
-            except RuntimeError:
-                continue
-            except Exception:
-                break
-
         with self._lock:
-            dq = self.items.get(t)
-            if not dq:
+            tl = self.items.get(t)
+            if not tl:
                 return []
-            dq_len = len(dq)
-            if limit_i >= dq_len:
-                return list(dq)
-            start_idx = dq_len - limit_i
-            return [dq[i] for i in range(start_idx, dq_len)]
+            return tl.log.tail(int(limit))
+
+    def _merge(
+        self,
+        cursors: List[_Cursor],
+        *,
+        newest_first: bool,
+        limit: int,
+        accept: Callable[[Dict[str, Any]], bool],
+        upper_seq: Optional[int] = None,
+    ) -> list[Dict[str, Any]]:
+        """k-way heap merge over seq-ordered per-topic cursors.
+
+        Stops as soon as ``limit`` accepted items are produced, and releases the lock every
+        _MERGE_CHUNK steps so heavy ingest is not blocked by a wide scan.
+        Caller must not hold _lock.
+        """
+        out: list[Dict[str, Any]] = []
+        heap: list[Tuple[int, int, Dict[str, Any]]] = []
+        lock = self._lock
+        lock.acquire()
+        try:
+            for i, cur in enumerate(cursors):
+                ev = cur.next()
+                if ev is not None:
+                    heap.append((-cur.seq if newest_first else cur.seq, i, ev))
+            heapq.heapify(heap)
+
+            steps = 0
+            while heap and len(out) < limit:
+                _, i, ev = heapq.heappop(heap)
+                if upper_seq is not None and int(ev.get("seq") or 0) > upper_seq:
+                    break
+                if accept(ev):
+                    out.append(ev)
+                cur = cursors[i]
+                nxt = cur.next()
+                if nxt is not None:
+                    heapq.heappush(heap, (-cur.seq if newest_first else cur.seq, i, nxt))
+                steps += 1
+                if steps % _MERGE_CHUNK == 0:
+                    lock.release()
+                    try:
+                        time.sleep(0)
+                    finally:
+                        lock.acquire()
+        finally:
+            lock.release()
+        return out
 
     def get_since(self, *, topic: Optional[str], after_seq: int, limit: int) -> list[Dict[str, Any]]:
         nn = int(limit)
@@ -156,34 +341,51 @@ class TopicStore:
             after = 0
 
         topic_q = None if topic is None else str(topic)
-        out: list[Dict[str, Any]] = []
-        
+
+        if topic_q is not None and topic_q.strip() not in ("", "*"):
+            # Single topic: binary-search the first seq > after and slice at most `limit` items.
+            with self._lock:
+                tl = self.items.get(topic_q)
+                if not tl:
+                    return []
+                return tl.log.since(after, nn)
+
+        # Wildcard: merge the already seq-ordered topic logs instead of collecting and sorting.
         with self._lock:
-            if topic_q is None or topic_q.strip() in ("", "*"):
-                topics = list(self.items.keys())
-            else:
-                topics = [topic_q]
-            
-            # Filter while iterating, avoid copying entire deque
-            for t in topics:
-                dq = self.items.get(t)
-                if not dq:
-                    continue
-                
-                for ev in dq:
-                    try:
-                        if int(ev.get("seq", 0)) > after:
-                            out.append(ev)
-                    except Exception:
-                        logging.getLogger("user_plugin_server").debug(
-                            "[message_plane] skip event due to invalid seq: %r", ev, exc_info=True
-                        )
-                        continue
-
-        out.sort(key=lambda e: int(e.get("seq") or 0))
-        if nn >= len(out):
-            return out
-        return out[:nn]
+            upper = self._seq
+            cursors = [
+                _Cursor(tl.log, after, newest_first=False)
+                for tl in self.items.values()
+                if tl
+            ]
+        return self._merge(cursors, newest_first=False, limit=nn, accept=lambda _ev: True, upper_seq=upper)
+
+    @staticmethod
+    def _match_rest(
+        idx: Dict[str, Any],
+        pmin: Optional[int],
+        s_ts: Optional[float],
+        u_ts: Optional[float],
+    ) -> bool:
+        if pmin is not None:
+            try:
+                if int(idx.get("priority") or 0) < pmin:
+                    return False
+            except Exception:
+                return False
+        if s_ts is not None:
+            try:
+                if float(idx.get("timestamp") or 0.0) < s_ts:
+                    return False
+            except Exception:
+                return False
+        if u_ts is not None:
+            try:
+                if float(idx.get("timestamp") or 0.0) > u_ts:
+                    return False
+            except Exception:
+                return False
+        return True
 
     def query(
         self,
@@ -203,12 +405,12 @@ class TopicStore:
             return []
 
         topic_q = None if topic is None else str(topic)
-        
+
         # Pre-normalize filter values outside the lock
-        pid = str(plugin_id) if isinstance(plugin_id, str) and plugin_id else None
-        src = str(source) if isinstance(source, str) and source else None
-        kd = str(kind) if isinstance(kind, str) and kind else None
-        tp = str(type_) if isinstance(type_, str) and type_ else None
+        eq_filters: List[Tuple[str, str]] = []
+        for field, value in (("plugin_id", plugin_id), ("source", source), ("kind", kind), ("type", type_)):
+            if isinstance(value, str) and value:
+                eq_filters.append((field, str(value)))
         try:
             pmin = int(priority_min) if priority_min is not None else None
         except (ValueError, TypeError):
@@ -222,58 +424,29 @@ class TopicStore:
         except (ValueError, TypeError):
             u_ts = None
 
-        out: list[Dict[str, Any]] = []
-        
+        def _accept(ev: Dict[str, Any]) -> bool:
+            idx = ev.get("index")
+            if not isinstance(idx, dict):
+                return False
+            for f, v in eq_filters:
+                if idx.get(f) != v:
+                    return False
+            return self._match_rest(idx, pmin, s_ts, u_ts)
+
+        # Walk the most selective secondary index of each topic newest-first, merged across
+        # topics by seq, and stop at `limit`.
         with self._lock:
-            if topic_q is None or topic_q.strip() in ("", "*"):
-                topics = list(self.items.keys())
-            else:
-                topics = [topic_q]
-            
-            # Filter while iterating, avoid copying entire deque
-            for t in topics:
-                dq = self.items.get(t)
-                if not dq:
+            bound = self._seq + 1
+            cursors: List[_Cursor] = []
+            for t in self._topics_for(topic_q):
+                tl = self.items.get(t)
+                if not tl:
                     continue
-                
-                for ev in dq:
-                    idx = ev.get("index")
-                    if not isinstance(idx, dict):
-                        continue
-
-                    if pid is not None and idx.get("plugin_id") != pid:
-                        continue
-                    if src is not None and idx.get("source") != src:
-                        continue
-                    if kd is not None and idx.get("kind") != kd:
-                        continue
-                    if tp is not None and idx.get("type") != tp:
-                        continue
-                    if pmin is not None:
-                        try:
-                            if int(idx.get("priority") or 0) < pmin:
-                                continue
-                        except Exception:
-                            continue
-                    if s_ts is not None:
-                        try:
-                            if float(idx.get("timestamp") or 0.0) < s_ts:
-                                continue
-                        except Exception:
-                            continue
-                    if u_ts is not None:
-                        try:
-                            if float(idx.get("timestamp") or 0.0) > u_ts:
-                                continue
-                        except Exception:
-                            continue
-
-                    out.append(ev)
-
-        out.sort(key=lambda e: int(e.get("seq") or 0), reverse=True)
-        if nn >= len(out):
-            return out
-        return out[:nn]
+                cand = tl.candidates(eq_filters)
+                if cand is None or len(cand) == 0:
+                    continue
+                cursors.append(_Cursor(cand, bound, newest_first=True))
+        return self._merge(cursors, newest_first=True, limit=nn, accept=_accept)
 
     def replace_topic(self, topic: str, records: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
         t = str(topic)
@@ -281,9 +454,8 @@ class TopicStore:
         ml = int(self.maxlen)
         if ml <= 0:
             ml = 1
-        dq = deque(maxlen=ml)
         with self._lock:
-            self.items[t] = dq
+            self.items[t] = _TopicLog(ml)
             self.meta[t] = {"created_at": now, "last_ts": now, "count_total": 0}
 
             out: list[Dict[str, Any]] = []
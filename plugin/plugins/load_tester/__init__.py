@@ -11,6 +11,48 @@ from plugin.sdk import ok
 from plugin.sdk.bus.types import BusReplayContext
 
 
+def _legacy_scan_query(events: list[Dict[str, Any]], field: str, value: Any, limit: int) -> list[Dict[str, Any]]:
+    """Baseline: the pre-index TopicStore.query algorithm (full scan + full sort)."""
+    out = [ev for ev in events if (ev.get("index") or {}).get(field) == value]
+    out.sort(key=lambda e: int(e.get("seq") or 0), reverse=True)
+    return out[:limit]
+
+
+def _legacy_scan_since(events: list[Dict[str, Any]], after_seq: int, limit: int) -> list[Dict[str, Any]]:
+    """Baseline: the pre-index TopicStore.get_since algorithm (full scan + full sort)."""
+    out = [ev for ev in events if int(ev.get("seq", 0)) > after_seq]
+    out.sort(key=lambda e: int(e.get("seq") or 0))
+    return out[:limit]
+
+
+async def _legacy_polled_wait(ev: threading.Event, timeout: float) -> bool:
+    """Baseline: the pre-router GlobalState.wait_for_plugin_response_async loop (executor-polled Event)."""
+    loop = asyncio.get_running_loop()
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if await loop.run_in_executor(None, lambda: ev.wait(timeout=0.01)):
+            return True
+    return False
+
+
+def _latency_summary(latencies_ms: list[float]) -> Dict[str, Any]:
+    if not latencies_ms:
+        return {"latency_samples": 0}
+    durs = sorted(latencies_ms)
+
+    def _pct(p: float) -> float:
+        idx = round((float(p) / 100.0) * (len(durs) - 1))
+        return float(durs[min(max(idx, 0), len(durs) - 1)])
+
+    return {
+        "latency_samples": len(durs),
+        "latency_max_ms": float(durs[-1]),
+        "latency_avg_ms": float(sum(durs) / float(len(durs))),
+        "latency_p50_ms": _pct(50.0),
+        "latency_p99_ms": _pct(99.0),
+    }
+
+
 @neko_plugin
 class LoadTestPlugin(NekoPluginBase):
     def __init__(self, ctx):
@@ -336,6 +378,169 @@ class LoadTestPlugin(NekoPluginBase):
             pass
         return workers, log_summary, use_multiprocess
 
+    def _bench_topic_store_indexes(self, *, field: str, limit: int = 50) -> Dict[str, Any]:
+        """Compare indexed TopicStore.query/get_since against the legacy full scan, in-process.
+
+        Config: [load_test.topic_store] maxlens (default [10000, 100000]), samples, enable.
+        Runs against a private TopicStore so numbers are independent of the live bus contents.
+        """
+        from plugin.message_plane.stores import TopicStore
+
+        cfg = self._get_load_test_section("topic_store")
+        if not bool(cfg.get("enable", True)):
+            return {}
+        try:
+            maxlens = [int(x) for x in cfg.get("maxlens", [10000, 100000])]
+        except Exception:
+            maxlens = [10000, 100000]
+        try:
+            samples = max(1, int(cfg.get("samples", 20)))
+        except Exception:
+            samples = 20
+
+        def _avg_ms(fn) -> float:
+            t0 = time.perf_counter()
+            for _ in range(samples):
+                fn()
+            return (time.perf_counter() - t0) * 1000.0 / float(samples)
+
+        results: Dict[str, Any] = {}
+        for maxlen in maxlens:
+            if self._stop_event.is_set():
+                break
+            store = TopicStore(name="bench", maxlen=maxlen)
+            for i in range(maxlen):
+                store.publish(
+                    "bench",
+                    {
+                        "plugin_id": f"plugin_{i % 50}",
+                        "source": f"source_{i % 10}",
+                        "kind": "message",
+                        "type": "text",
+                        "priority": i % 5,
+                    },
+                )
+            events = store.get_recent("bench", maxlen)
+            value = "plugin_7" if field == "plugin_id" else "source_7"
+            after = int(events[len(events) // 2]["seq"]) if events else 0
+            kwargs = {"type_" if field == "type" else field: value}
+
+            query_scan = _avg_ms(lambda: _legacy_scan_query(events, field, value, limit))
+            query_idx = _avg_ms(lambda: store.query(topic="bench", limit=limit, **kwargs))
+            since_scan = _avg_ms(lambda: _legacy_scan_since(events, after, limit))
+            since_idx = _avg_ms(lambda: store.get_since(topic="bench", after_seq=after, limit=limit))
+            results[str(maxlen)] = {
+                "query_scan_ms": query_scan,
+                "query_indexed_ms": query_idx,
+                "query_speedup": query_scan / query_idx if query_idx > 0 else None,
+                "get_since_scan_ms": since_scan,
+                "get_since_indexed_ms": since_idx,
+                "get_since_speedup": since_scan / since_idx if since_idx > 0 else None,
+            }
+            try:
+                self.logger.info(
+                    "[load_tester] topic_store maxlen={} filter={} query scan={:.3f}ms indexed={:.3f}ms get_since scan={:.3f}ms indexed={:.3f}ms",
+                    maxlen,
+                    field,
+                    query_scan,
+                    query_idx,
+                    since_scan,
+                    since_idx,
+                )
+            except Exception:
+                pass
+        return {"topic_store": results}
+
+    def _bench_response_router(self) -> Dict[str, Any]:
+        """Compare Future-based response delivery against the legacy executor-polled wait, in-process.
+
+        Config: [load_test.response_router] concurrency (default [100, 1000]), spread_ms, enable.
+        N waiters are parked at once; a responder thread releases them one by one over
+        spread_ms. Latency is measured from release to waiter wake-up, and the peak thread
+        count shows what the waiters cost while parked.
+        """
+        from plugin.core.state import PluginResponseRouter
+
+        cfg = self._get_load_test_section("response_router")
+        if not bool(cfg.get("enable", True)):
+            return {}
+        try:
+            levels = [int(x) for x in cfg.get("concurrency", [100, 1000])]
+        except Exception:
+            levels = [100, 1000]
+        try:
+            spread = max(0.0, float(cfg.get("spread_ms", 500))) / 1000.0
+        except Exception:
+            spread = 0.5
+
+        def _run(n: int, legacy: bool) -> Dict[str, Any]:
+            set_at = [0.0] * n
+            woke = [0.0] * n
+            peak_threads = [threading.active_count()]
+
+            async def _main() -> None:
+                router = PluginResponseRouter()
+                events = [threading.Event() for _ in range(n)] if legacy else []
+
+                async def _waiter(i: int) -> None:
+                    if legacy:
+                        await _legacy_polled_wait(events[i], 30.0)
+                    else:
+                        try:
+                            await asyncio.wait_for(router.register(str(i)), 30.0)
+                        except asyncio.TimeoutError:
+                            pass
+                    woke[i] = time.perf_counter()
+
+                tasks = [asyncio.create_task(_waiter(i)) for i in range(n)]
+                await asyncio.sleep(0.05)
+
+                def _responder() -> None:
+                    for i in range(n):
+                        time.sleep(spread / n)
+                        set_at[i] = time.perf_counter()
+                        if legacy:
+                            events[i].set()
+                        else:
+                            router.resolve(str(i), {"result": i})
+
+                th = threading.Thread(target=_responder, daemon=True)
+                th.start()
+                while not all(t.done() for t in tasks):
+                    peak_threads[0] = max(peak_threads[0], threading.active_count())
+                    await asyncio.sleep(0.01)
+                th.join()
+
+            asyncio.run(_main())
+            lat = [(w - s0) * 1000.0 for s0, w in zip(set_at, woke) if w and s0]
+            return {"peak_threads": int(peak_threads[0]), **_latency_summary(lat)}
+
+        results: Dict[str, Any] = {}
+        for n in levels:
+            if self._stop_event.is_set() or n <= 0:
+                break
+            polled = _run(n, legacy=True)
+            routed = _run(n, legacy=False)
+            p99_polled = polled.get("latency_p99_ms")
+            p99_routed = routed.get("latency_p99_ms")
+            results[str(n)] = {
+                "polled": polled,
+                "router": routed,
+                "p99_speedup": p99_polled / p99_routed if p99_polled and p99_routed else None,
+            }
+            try:
+                self.logger.info(
+                    "[load_tester] response_router concurrency={} p99 polled={:.3f}ms router={:.3f}ms threads polled={} router={}",
+                    n,
+                    float(p99_polled or 0.0),
+                    float(p99_routed or 0.0),
+                    polled.get("peak_threads"),
+                    routed.get("peak_threads"),
+                )
+            except Exception:
+                pass
+        return {"response_router": results}
+
     def _get_incremental_diagnostics(self, expr) -> Dict[str, Any]:
         """Get incremental reload diagnostics from a BusList expression.
 
@@ -697,6 +902,9 @@ class LoadTestPlugin(NekoPluginBase):
                 stats.get("workers", workers),
             )
 
+        def _extra_data_builder(_stats: Dict[str, Any], _duration: float, _workers: int) -> Dict[str, Any]:
+            return self._bench_topic_store_indexes(field="plugin_id", limit=int(max_count))
+
         stats = self._run_benchmark(
             test_name="bench_bus_messages_get",
             root_cfg=root_cfg,
@@ -707,6 +915,7 @@ class LoadTestPlugin(NekoPluginBase):
                 "[load_tester] bench_bus_messages_get duration={}s iterations={} qps={} errors={} max_count={} plugin_id={} timeout={} workers={}"
             ),
             build_log_args=_build_log_args,
+            extra_data_builder=_extra_data_builder,
         )
         return ok(data=stats)
 
@@ -922,7 +1131,7 @@ class LoadTestPlugin(NekoPluginBase):
             _ = base_list.filter(strict=False, **flt_kwargs)
 
         def _extra_data_builder(_stats: Dict[str, Any], _duration: float, _workers: int) -> Dict[str, Any]:
-            return {"base_size": len(base_list)}
+            return {"base_size": len(base_list), **self._bench_topic_store_indexes(field="source")}
 
         def _build_log_args(duration: float, stats: Dict[str, Any], workers: int):
             return (
@@ -971,6 +1180,7 @@ class LoadTestPlugin(NekoPluginBase):
                     "default": [10.0, 50.0, 100.0],
                 },
                 "timeout": {"type": "number", "default": 2.0},
+                "concurrency": {"type": "integer", "default": 0},
             },
             "required": ["target_plugin_id", "event_type", "event_id"],
         },
@@ -984,6 +1194,7 @@ class LoadTestPlugin(NekoPluginBase):
         duration_seconds: float = 5.0,
         qps_targets: Optional[list[float]] = None,
         timeout: float = 2.0,
+        concurrency: int = 0,
         **_: Any,
     ):
         if args is None:
@@ -1149,6 +1360,40 @@ class LoadTestPlugin(NekoPluginBase):
             else:
                 overall_latency = {"latency_samples": 0}
 
+            # Burst of N in-flight async calls: each waits on a response Future, so
+            # p99 reflects delivery rather than executor-thread availability.
+            concurrent: Dict[str, Any] = {}
+            n_conc = int(concurrency or 0)
+            if n_conc > 0 and not self._stop_event.is_set():
+                burst_latencies: list[float] = []
+                burst_errors = [0]
+
+                async def _burst() -> None:
+                    async def _one() -> None:
+                        t0 = time.perf_counter()
+                        try:
+                            await self.ctx.trigger_plugin_event_async(
+                                target_plugin_id=target_plugin_id,
+                                event_type=event_type,
+                                event_id=event_id,
+                                args=dict(local_args),
+                                timeout=float(timeout),
+                            )
+                        except Exception:
+                            burst_errors[0] += 1
+                        burst_latencies.append((time.perf_counter() - t0) * 1000.0)
+
+                    await asyncio.gather(*(_one() for _ in range(n_conc)))
+
+                t_burst = time.perf_counter()
+                asyncio.run(_burst())
+                concurrent = {
+                    "concurrency": n_conc,
+                    "errors": int(burst_errors[0]),
+                    "elapsed_ms": (time.perf_counter() - t_burst) * 1000.0,
+                    **_latency_summary(burst_latencies),
+                }
+
             result = {
                 "test": "bench_plugin_event_qps",
                 "target_plugin_id": target_plugin_id,
@@ -1161,6 +1406,8 @@ class LoadTestPlugin(NekoPluginBase):
                 "total_calls": int(total_calls),
                 "total_errors": int(total_errors),
                 **overall_latency,
+                "concurrent": concurrent,
+                **self._bench_response_router(),
             }
 
             # Standalone summary log (do not integrate into run_all_benchmarks)
@@ -1650,6 +1897,15 @@ class LoadTestPlugin(NekoPluginBase):
                     extra_parts.append(f"latest_rev={v.get('latest_rev')}")
                 if "workers" in v:
                     extra_parts.append(f"workers={v.get('workers')}")
+                store_stats = v.get("topic_store")
+                if isinstance(store_stats, dict):
+                    for ml, st in store_stats.items():
+                        try:
+                            extra_parts.append(
+                                f"store@{ml}=query x{float(st['query_speedup']):.1f}/since x{float(st['get_since_speedup']):.1f}"
+                            )
+                        except Exception:
+                            pass
                 lat_avg = v.get("latency_avg_ms")
                 lat_p95 = v.get("latency_p95_ms")
                 lat_p99 = v.get("latency_p99_ms")
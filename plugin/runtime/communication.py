@@ -9,11 +9,12 @@ import asyncio
 import time
 import traceback
 import uuid
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from queue import Empty, Queue
-from typing import Any, Dict, Optional
+from typing import Any, Deque, Dict, Optional
 
 from loguru import logger as loguru_logger
 
@@ -28,11 +29,20 @@ from plugin.settings import (
     PLUGIN_MESSAGE_FORWARD_LOG_DEDUP_WINDOW_SECONDS,
 )
 from plugin.api.exceptions import PluginExecutionError
+from plugin.utils.instrumentation import registry as _metrics
 from plugin.utils.logging import format_log_text as _format_log_text
 
 
 _SHUTDOWN_SENTINEL: Dict[str, Any] = {"_type": "__shutdown__"}
 
+# 插件进程内测得的入口执行耗时（随 TRIGGER 结果回传），不含 IPC 与排队
+_ENTRY_SECONDS = _metrics.histogram(
+    "plugin_entry_seconds",
+    "Plugin entry execution time measured in the plugin process",
+    labels=("plugin_id", "entry_id", "outcome"),
+    unit="seconds",
+)
+
 
 @dataclass
 class PluginCommunicationResourceManager:
@@ -52,6 +62,8 @@ class PluginCommunicationResourceManager:
     status_queue: Queue
     message_queue: Queue
     logger: Any = field(default_factory=lambda: loguru_logger.bind(component="communication"))
+    # ZeroMQ 传输层（plugin.zeromq_ipc.PluginHostTransport）；为 None 时使用上面的 multiprocessing 队列
+    transport: Optional[Any] = None
     
     # 异步相关资源
     _pending_futures: Dict[str, asyncio.Future] = field(default_factory=dict)
@@ -61,6 +73,7 @@ class PluginCommunicationResourceManager:
     _executor: Optional[ThreadPoolExecutor] = None
     _message_target_queue: Optional[asyncio.Queue] = None  # 主进程的消息队列
     _background_tasks: set[asyncio.Task] = field(default_factory=set)
+    _status_inbox: Deque[Dict[str, Any]] = field(default_factory=lambda: deque(maxlen=10000))
     _last_forward_log_key: Optional[tuple] = field(default=None, init=False, repr=False)
     _last_forward_log_time: float = field(default=0.0, init=False, repr=False)
     _last_forward_log_repeat_count: int = field(default=0, init=False, repr=False)
@@ -87,6 +100,13 @@ class PluginCommunicationResourceManager:
             message_target_queue: 主进程的消息队列，用于接收插件推送的消息
         """
         self._message_target_queue = message_target_queue
+        if self.transport is not None:
+            # 单个接收任务处理全部上行通道
+            self.transport.attach_loop(asyncio.get_running_loop())
+            if self._result_consumer_task is None or self._result_consumer_task.done():
+                self._result_consumer_task = asyncio.create_task(self._consume_transport())
+                self.logger.debug(f"Started transport consumer for plugin {self.plugin_id}")
+            return
         if self._result_consumer_task is None or self._result_consumer_task.done():
             self._result_consumer_task = asyncio.create_task(self._consume_results())
             self.logger.debug(f"Started result consumer for plugin {self.plugin_id}")
@@ -109,23 +129,31 @@ class PluginCommunicationResourceManager:
         if shutdown_event is not None:
             shutdown_event.set()
 
+        if self.transport is not None:
+            # 传输层接收任务阻塞在 recv 上，直接取消即可
+            if self._result_consumer_task and not self._result_consumer_task.done():
+                self._result_consumer_task.cancel()
+                await asyncio.gather(self._result_consumer_task, return_exceptions=True)
+            self.transport.close()
+
         # 主动唤醒阻塞在 multiprocessing.Queue.get 的后台线程，避免 shutdown 卡在 queue.get 超时上。
         # 注意：put 也可能阻塞，因此放到 executor 里并带超时。
-        try:
-            await asyncio.to_thread(self.res_queue.put, _SHUTDOWN_SENTINEL, True, QUEUE_GET_TIMEOUT)
-        except Exception as e:
-            # shutdown 需要尽力而为：即使唤醒失败也继续走超时等待/取消逻辑
-            self.logger.debug(
-                "Failed to awake res_queue during shutdown for plugin {}: {}",
-                self.plugin_id, e
-            )
-        try:
-            await asyncio.to_thread(self.message_queue.put, _SHUTDOWN_SENTINEL, True, QUEUE_GET_TIMEOUT)
-        except Exception as e:
-            self.logger.debug(
-                "Failed to awake message_queue during shutdown for plugin {}: {}",
-                self.plugin_id, e
-            )
+        if self.transport is None:
+            try:
+                await asyncio.to_thread(self.res_queue.put, _SHUTDOWN_SENTINEL, True, QUEUE_GET_TIMEOUT)
+            except Exception as e:
+                # shutdown 需要尽力而为：即使唤醒失败也继续走超时等待/取消逻辑
+                self.logger.debug(
+                    "Failed to awake res_queue during shutdown for plugin {}: {}",
+                    self.plugin_id, e
+                )
+            try:
+                await asyncio.to_thread(self.message_queue.put, _SHUTDOWN_SENTINEL, True, QUEUE_GET_TIMEOUT)
+            except Exception as e:
+                self.logger.debug(
+                    "Failed to awake message_queue during shutdown for plugin {}: {}",
+                    self.plugin_id, e
+                )
 
         # 给消费者一个很短的“自然退出”窗口，避免 shutdown 被拖慢。
         # 之后直接 cancel，以确保在 timeout 内尽快结束。
@@ -195,6 +223,19 @@ class PluginCommunicationResourceManager:
         if count > 0:
             self.logger.debug(f"Cleaned up {count} pending futures for plugin {self.plugin_id}")
 
+    async def _put_command(self, msg: dict) -> None:
+        """向插件进程发送一条命令"""
+        if self.transport is not None:
+            await self.transport.send("cmd", msg)
+            return
+        # multiprocessing.Queue.put 可能在子进程异常/管道阻塞时卡住。
+        # 这里必须避免在事件循环线程中执行阻塞 put。
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self._executor,
+            lambda: self.cmd_queue.put(msg, timeout=QUEUE_GET_TIMEOUT),
+        )
+
     async def _send_command_and_wait(
         self,
         req_id: str,
@@ -208,14 +249,8 @@ class PluginCommunicationResourceManager:
         future = asyncio.Future()
         self._pending_futures[req_id] = future
 
-        # multiprocessing.Queue.put 可能在子进程异常/管道阻塞时卡住。
-        # 这里必须避免在事件循环线程中执行阻塞 put。
-        loop = asyncio.get_running_loop()
         try:
-            await loop.run_in_executor(
-                self._executor,
-                lambda: self.cmd_queue.put(msg, timeout=QUEUE_GET_TIMEOUT),
-            )
+            await self._put_command(msg)
         except Exception as e:
             self._pending_futures.pop(req_id, None)
             raise RuntimeError(
@@ -395,17 +430,20 @@ class PluginCommunicationResourceManager:
             "delta": dict(delta or {}),
         }
 
-        loop = asyncio.get_running_loop()
         try:
-            await loop.run_in_executor(
-                self._executor,
-                lambda: self.cmd_queue.put(msg, timeout=QUEUE_GET_TIMEOUT),
-            )
+            await self._put_command(msg)
         except Exception as e:
             raise RuntimeError(f"Failed to push BUS_CHANGE to plugin {self.plugin_id}: {e}") from e
     
     async def send_stop_command(self) -> None:
         """发送停止命令到插件进程"""
+        if self.transport is not None:
+            try:
+                await asyncio.wait_for(self.transport.send("cmd", {"type": "STOP"}), timeout=QUEUE_GET_TIMEOUT)
+                self.logger.debug(f"Sent STOP command to plugin {self.plugin_id}")
+            except Exception as e:
+                self.logger.warning(f"Failed to send STOP command to plugin {self.plugin_id}: {e}")
+            return
         try:
             # cmd_queue 可能被高频消息挤满；并且本类内部 executor 可能被 queue.get 占满。
             # STOP 投递用 asyncio.to_thread（默认线程池），避免被 self._executor 饥饿。
@@ -450,42 +488,7 @@ class PluginCommunicationResourceManager:
                 if isinstance(res, dict) and res.get("_type") == "__shutdown__":
                     break
                 
-                req_id = res.get("req_id")
-                if not req_id:
-                    self.logger.warning(f"Received result without req_id from plugin {self.plugin_id}")
-                    continue
-                
-                # 记录收到响应的时间
-                self.logger.debug(
-                    f"Received result for req_id {req_id} from plugin {self.plugin_id}, "
-                    f"success={res.get('success')}"
-                )
-                
-                future = self._pending_futures.get(req_id)
-                if future:
-                    if not future.done():
-                        # Future 还未完成，设置结果
-                        self.logger.debug(
-                            f"Setting result for req_id {req_id}, Future is not done yet"
-                        )
-                        # 始终回传结果，让调用方统一处理成功/失败
-                        future.set_result(res)
-                        # 设置结果后，从字典中移除
-                        self._pending_futures.pop(req_id, None)
-                        self.logger.debug(f"Result set and Future removed for req_id {req_id}")
-                    else:
-                        # Future 已经完成（可能因为超时），忽略延迟到达的响应
-                        self.logger.warning(
-                            f"Received delayed result for req_id {req_id} from plugin {self.plugin_id}, "
-                            f"but Future is already done (likely timed out). Ignoring."
-                        )
-                        # 清理已完成的 Future
-                        self._pending_futures.pop(req_id, None)
-                else:
-                    self.logger.warning(
-                        f"Received result for unknown req_id {req_id} from plugin {self.plugin_id}. "
-                        f"Available req_ids: {list(self._pending_futures.keys())[:5]}"
-                    )
+                self._handle_result(res)
                     
             except Empty:
                 # 队列为空，继续等待
@@ -504,6 +507,171 @@ class PluginCommunicationResourceManager:
                 # 短暂休眠避免 CPU 占用过高
                 await asyncio.sleep(RESULT_CONSUMER_SLEEP_INTERVAL)
     
+    def _handle_result(self, res: Any) -> None:
+        """把插件返回的结果交给对应请求的 Future"""
+        if not isinstance(res, dict):
+            return
+        req_id = res.get("req_id")
+        if not req_id:
+            self.logger.warning(f"Received result without req_id from plugin {self.plugin_id}")
+            return
+
+        # 记录收到响应的时间
+        self.logger.debug(
+            f"Received result for req_id {req_id} from plugin {self.plugin_id}, "
+            f"success={res.get('success')}"
+        )
+
+        timing = res.get("entry_timing")
+        if isinstance(timing, dict):
+            seconds = timing.get("seconds")
+            if isinstance(seconds, (int, float)):
+                outcome = "ok" if res.get("success") else "error"
+                _ENTRY_SECONDS.labels(self.plugin_id, str(timing.get("entry_id")), outcome).observe(float(seconds))
+
+        future = self._pending_futures.get(req_id)
+        if future:
+            if not future.done():
+                # Future 还未完成，设置结果
+                self.logger.debug(
+                    f"Setting result for req_id {req_id}, Future is not done yet"
+                )
+                # 始终回传结果，让调用方统一处理成功/失败
+                future.set_result(res)
+                # 设置结果后，从字典中移除
+                self._pending_futures.pop(req_id, None)
+                self.logger.debug(f"Result set and Future removed for req_id {req_id}")
+            else:
+                # Future 已经完成（可能因为超时），忽略延迟到达的响应
+                self.logger.warning(
+                    f"Received delayed result for req_id {req_id} from plugin {self.plugin_id}, "
+                    f"but Future is already done (likely timed out). Ignoring."
+                )
+                # 清理已完成的 Future
+                self._pending_futures.pop(req_id, None)
+        else:
+            self.logger.warning(
+                f"Received result for unknown req_id {req_id} from plugin {self.plugin_id}. "
+                f"Available req_ids: {list(self._pending_futures.keys())[:5]}"
+            )
+
+    async def _forward_message(self, msg: Any, shutdown_event: asyncio.Event) -> None:
+        """转发插件推送的一条消息到主进程的消息队列（写入 bus 并按需打印转发日志）"""
+        try:
+            if self._message_target_queue:
+                # shutdown 期间不要在主进程队列上阻塞等待，否则可能导致插件 shutdown 卡住。
+                if shutdown_event.is_set():
+                    return
+                if isinstance(msg, dict) and not msg.get("_bus_stored"):
+                    try:
+                        from plugin.core.state import state
+
+                        msg = dict(msg)
+                        if not isinstance(msg.get("message_id"), str) or not msg.get("message_id"):
+                            msg["message_id"] = str(uuid.uuid4())
+                        if not isinstance(msg.get("time"), str) or not msg.get("time"):
+                            msg["time"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+                        msg["_bus_stored"] = True
+                        state.append_message_record(msg)
+                    except Exception:
+                        self.logger.debug(
+                            "Failed to store message to bus for plugin {}",
+                            self.plugin_id,
+                            exc_info=True,
+                        )
+
+                try:
+                    # 尽量快速转发；如果主进程已进入 shutdown 或队列不再消费，避免无限阻塞。
+                    await asyncio.wait_for(self._message_target_queue.put(msg), timeout=0.05)
+                except asyncio.TimeoutError:
+                    # 主队列可能被阻塞/不再消费，直接丢弃以保证 shutdown 及时。
+                    return
+                if PLUGIN_LOG_MESSAGE_FORWARD:
+                    log_content = _format_log_text(msg.get("content", ""))
+                    window = PLUGIN_MESSAGE_FORWARD_LOG_DEDUP_WINDOW_SECONDS
+                    if window and window > 0:
+                        now_ts = time.monotonic()
+                        key = (
+                            self.plugin_id,
+                            msg.get("source", "unknown"),
+                            msg.get("priority", 0),
+                            msg.get("description", ""),
+                            log_content,
+                        )
+                        last_key = self._last_forward_log_key
+                        last_ts = self._last_forward_log_time
+                        if (
+                            last_key == key
+                            and last_ts > 0.0
+                            and (now_ts - last_ts) <= window
+                        ):
+                            # 在去重时间窗口内的重复日志，累加计数并跳过，避免刷屏和性能损耗
+                            self._last_forward_log_repeat_count += 1
+                            return
+
+                        # 输出上一条日志的重复统计（如果有）
+                        if last_key is not None and self._last_forward_log_repeat_count > 0:
+                            self.logger.info(
+                                "[MESSAGE FORWARD] (suppressed {} duplicate messages for Plugin: {} | Source: {} | Priority: {} | Description: {})",
+                                self._last_forward_log_repeat_count,
+                                last_key[0],
+                                last_key[1],
+                                last_key[2],
+                                last_key[3],
+                            )
+
+                        # 切换到当前日志 key，重置计数
+                        self._last_forward_log_key = key
+                        self._last_forward_log_time = now_ts
+                        self._last_forward_log_repeat_count = 0
+
+                    self.logger.info(
+                        f"[MESSAGE FORWARD] Plugin: {self.plugin_id} | "
+                        f"Source: {msg.get('source', 'unknown')} | "
+                        f"Priority: {msg.get('priority', 0)} | "
+                        f"Description: {msg.get('description', '')} | "
+                        f"Content: {log_content}"
+                    )
+        except asyncio.QueueFull:
+            self.logger.warning(
+                f"Main message queue is full, dropping message from plugin {self.plugin_id}"
+            )
+        except (AttributeError, RuntimeError) as e:
+            self.logger.error(f"Queue error forwarding message from plugin {self.plugin_id}: {e}")
+        except Exception as e:
+            self.logger.exception(
+                f"Unexpected error forwarding message from plugin {self.plugin_id}"
+            )
+
+    async def _consume_transport(self) -> None:
+        """
+        后台任务：从 ZeroMQ 传输层接收 res/status/message 三个通道并分发
+
+        事件循环原生等待，不占用执行器线程；替代 _consume_results 与 _consume_messages。
+        """
+        self._ensure_shutdown_event()
+        shutdown_event = self._shutdown_event
+        transport = self.transport
+        if shutdown_event is None or transport is None:
+            return
+
+        while not shutdown_event.is_set():
+            try:
+                channel, item = await transport.recv()
+                if channel == "res":
+                    self._handle_result(item)
+                elif channel == "status":
+                    self._status_inbox.append(item)
+                elif channel == "message":
+                    if self._message_target_queue is not None:
+                        await self._forward_message(item, shutdown_event)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                if not shutdown_event.is_set():
+                    self.logger.exception(f"Unexpected error consuming transport for plugin {self.plugin_id}")
+                await asyncio.sleep(RESULT_CONSUMER_SLEEP_INTERVAL)
+
     def get_status_messages(self, max_count: int | None = None) -> list[Dict[str, Any]]:
         """
         从状态队列中获取消息（非阻塞）
@@ -519,6 +687,12 @@ class PluginCommunicationResourceManager:
             max_count = STATUS_MESSAGE_DEFAULT_MAX_COUNT
         messages = []
         count = 0
+        if self.transport is not None:
+            inbox = self._status_inbox
+            while count < max_count and inbox:
+                messages.append(inbox.popleft())
+                count += 1
+            return messages
         while count < max_count:
             try:
                 msg = self.status_queue.get_nowait()
@@ -556,91 +730,7 @@ class PluginCommunicationResourceManager:
                     break
                 
                 # 转发消息到主进程的消息队列
-                try:
-                    if self._message_target_queue:
-                        # shutdown 期间不要在主进程队列上阻塞等待，否则可能导致插件 shutdown 卡住。
-                        if shutdown_event.is_set():
-                            continue
-                        if isinstance(msg, dict) and not msg.get("_bus_stored"):
-                            try:
-                                from plugin.core.state import state
-
-                                msg = dict(msg)
-                                if not isinstance(msg.get("message_id"), str) or not msg.get("message_id"):
-                                    msg["message_id"] = str(uuid.uuid4())
-                                if not isinstance(msg.get("time"), str) or not msg.get("time"):
-                                    msg["time"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-                                msg["_bus_stored"] = True
-                                state.append_message_record(msg)
-                            except Exception:
-                                self.logger.debug(
-                                    "Failed to store message to bus for plugin {}",
-                                    self.plugin_id,
-                                    exc_info=True,
-                                )
-
-                        try:
-                            # 尽量快速转发；如果主进程已进入 shutdown 或队列不再消费，避免无限阻塞。
-                            await asyncio.wait_for(self._message_target_queue.put(msg), timeout=0.05)
-                        except asyncio.TimeoutError:
-                            # 主队列可能被阻塞/不再消费，直接丢弃以保证 shutdown 及时。
-                            continue
-                        if PLUGIN_LOG_MESSAGE_FORWARD:
-                            log_content = _format_log_text(msg.get("content", ""))
-                            window = PLUGIN_MESSAGE_FORWARD_LOG_DEDUP_WINDOW_SECONDS
-                            if window and window > 0:
-                                now_ts = time.monotonic()
-                                key = (
-                                    self.plugin_id,
-                                    msg.get("source", "unknown"),
-                                    msg.get("priority", 0),
-                                    msg.get("description", ""),
-                                    log_content,
-                                )
-                                last_key = self._last_forward_log_key
-                                last_ts = self._last_forward_log_time
-                                if (
-                                    last_key == key
-                                    and last_ts > 0.0
-                                    and (now_ts - last_ts) <= window
-                                ):
-                                    # 在去重时间窗口内的重复日志，累加计数并跳过，避免刷屏和性能损耗
-                                    self._last_forward_log_repeat_count += 1
-                                    continue
-
-                                # 输出上一条日志的重复统计（如果有）
-                                if last_key is not None and self._last_forward_log_repeat_count > 0:
-                                    self.logger.info(
-                                        "[MESSAGE FORWARD] (suppressed {} duplicate messages for Plugin: {} | Source: {} | Priority: {} | Description: {})",
-                                        self._last_forward_log_repeat_count,
-                                        last_key[0],
-                                        last_key[1],
-                                        last_key[2],
-                                        last_key[3],
-                                    )
-
-                                # 切换到当前日志 key，重置计数
-                                self._last_forward_log_key = key
-                                self._last_forward_log_time = now_ts
-                                self._last_forward_log_repeat_count = 0
-
-                            self.logger.info(
-                                f"[MESSAGE FORWARD] Plugin: {self.plugin_id} | "
-                                f"Source: {msg.get('source', 'unknown')} | "
-                                f"Priority: {msg.get('priority', 0)} | "
-                                f"Description: {msg.get('description', '')} | "
-                                f"Content: {log_content}"
-                            )
-                except asyncio.QueueFull:
-                    self.logger.warning(
-                        f"Main message queue is full, dropping message from plugin {self.plugin_id}"
-                    )
-                except (AttributeError, RuntimeError) as e:
-                    self.logger.error(f"Queue error forwarding message from plugin {self.plugin_id}: {e}")
-                except Exception as e:
-                    self.logger.exception(
-                        f"Unexpected error forwarding message from plugin {self.plugin_id}"
-                    )
+                await self._forward_message(msg, shutdown_event)
             except Empty:
                 # 队列为空，继续等待
                 continue
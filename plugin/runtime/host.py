@@ -36,6 +36,7 @@ from plugin.settings import (
     QUEUE_GET_TIMEOUT,
     PROCESS_SHUTDOWN_TIMEOUT,
     PROCESS_TERMINATE_TIMEOUT,
+    PLUGIN_HOST_TRANSPORT,
 )
 
 
@@ -51,6 +52,14 @@ def _sanitize_plugin_id(raw: Any, max_len: int = 64) -> str:
     return safe
 
 
+def _stamp_entry_timing(payload: Dict[str, Any], entry_id: str, started: float) -> None:
+    """把入口在插件进程内的执行耗时随结果回传。
+
+    插件进程自己的指标注册表没有人采集，由主进程收到结果时记入 plugin_entry_seconds。
+    """
+    payload["entry_timing"] = {"entry_id": str(entry_id), "seconds": time.perf_counter() - started}
+
+
 def _plugin_process_runner(
     plugin_id: str,
     entry_point: str,
@@ -62,9 +71,13 @@ def _plugin_process_runner(
     response_queue: Queue,
     stop_event: Any | None = None,
     plugin_comm_queue: Queue | None = None,
+    transport_endpoints: Dict[str, str] | None = None,
 ) -> None:
     """
     独立进程中的运行函数，负责加载插件、映射入口、处理命令并返回结果。
+
+    transport_endpoints 非空时，cmd/res/status/message/response 五个通道改由
+    PluginProcessTransport（ZeroMQ ipc:// PUSH/PULL 连接）承载，对应的队列参数为 None。
     """
     # 获取项目根目录（假设 config_path 在 plugin/plugins/xxx/plugin.toml）
     # 由于部署/启动方式可能改变工作目录与 sys.path，使用“向上探测”确保能找到仓库根。
@@ -178,6 +191,18 @@ def _plugin_process_runner(
     except Exception as e:
         logger.warning("[Plugin Process] Failed to setup logging interception: {}", e)
 
+    transport = None
+    if transport_endpoints:
+        from plugin.zeromq_ipc import PluginProcessTransport
+
+        transport = PluginProcessTransport(transport_endpoints)
+        cmd_queue = transport.channel("cmd")
+        res_queue = transport.channel("res")
+        status_queue = transport.channel("status")
+        message_queue = transport.channel("message")
+        response_queue = transport.channel("response")
+        logger.info("[Plugin Process] Host transport connected: {}", transport_endpoints)
+
     try:
         # 设置 Python 路径，确保能够导入插件模块
         if str(project_root) not in sys.path:
@@ -620,6 +645,7 @@ def _plugin_process_runner(
                 entry_id = msg["entry_id"]
                 args = msg["args"]
                 req_id = msg["req_id"]
+                entry_started = time.perf_counter()
                 
                 # 关键日志：记录接收到的触发消息
                 logger.info(
@@ -702,6 +728,7 @@ def _plugin_process_runner(
                                 timeout=timeout,
                                 ret_payload=ret_payload,
                                 method=method,
+                                entry_started=entry_started,
                             ):
                                 try:
                                     with ctx._handler_scope(f"plugin_entry.{entry_id}"), ctx._run_scope(run_id):
@@ -724,6 +751,7 @@ def _plugin_process_runner(
                                     ret_payload["error"] = f"Worker error: {str(e)}"
                                 finally:
                                     # 发送响应
+                                    _stamp_entry_timing(ret_payload, entry_id, entry_started)
                                     res_queue.put(ret_payload)
                             
                             # 在单独线程里等待 worker 结果
@@ -740,6 +768,7 @@ def _plugin_process_runner(
                             # 提交失败，立即返回错误
                             logger.exception("Failed to submit worker task {}", entry_id)
                             ret_payload["error"] = f"Failed to submit worker task: {str(e)}"
+                            _stamp_entry_timing(ret_payload, entry_id, entry_started)
                             res_queue.put(ret_payload)
                             continue
                     
@@ -846,6 +875,8 @@ def _plugin_process_runner(
                     logger.exception("Unexpected error executing {}", entry_id)
                     ret_payload["error"] = f"Unexpected error: {str(e)}"
 
+                if method:
+                    _stamp_entry_timing(ret_payload, entry_id, entry_started)
                 res_queue.put(ret_payload)
 
         # 触发生命周期：shutdown（尽力而为），并停止所有定时任务
@@ -899,6 +930,10 @@ def _plugin_process_runner(
         except Exception:
             pass  # 如果队列也坏了，只能放弃
         raise  # 重新抛出，让进程退出
+    finally:
+        # 上行套接字的 LINGER 让已提交的结果（包括崩溃报告）在关闭后仍有时间发出
+        if transport is not None:
+            transport.close()
 
 
 class PluginHost:
@@ -917,12 +952,34 @@ class PluginHost:
         # 使用loguru logger，绑定插件ID
         self.logger = loguru_logger.bind(plugin_id=plugin_id, host=True)
         
-        # 创建队列（由通信资源管理器管理）
-        cmd_queue: Queue = multiprocessing.Queue()
-        res_queue: Queue = multiprocessing.Queue()
-        status_queue: Queue = multiprocessing.Queue()
-        message_queue: Queue = multiprocessing.Queue()
-        response_queue: Queue = multiprocessing.Queue()
+        # 创建通信通道（由通信资源管理器管理）
+        # 默认五个通道走 ZeroMQ（PluginHostTransport）；不可用时回退到 multiprocessing.Queue
+        self.transport: Any = None
+        if PLUGIN_HOST_TRANSPORT == "zmq":
+            try:
+                from plugin.zeromq_ipc import PluginHostTransport
+
+                self.transport = PluginHostTransport(plugin_id)
+            except Exception as e:
+                self.logger.warning(
+                    "Failed to create ZeroMQ host transport for plugin {}, falling back to multiprocessing queues: {}",
+                    plugin_id, e,
+                )
+                self.transport = None
+        if self.transport is not None:
+            cmd_queue: Any = self.transport.channel("cmd")
+            res_queue: Any = self.transport.channel("res")
+            status_queue: Any = self.transport.channel("status")
+            message_queue: Any = self.transport.channel("message")
+            response_queue: Any = self.transport.channel("response")
+            transport_endpoints = self.transport.endpoints
+        else:
+            cmd_queue = multiprocessing.Queue()
+            res_queue = multiprocessing.Queue()
+            status_queue = multiprocessing.Queue()
+            message_queue = multiprocessing.Queue()
+            response_queue = multiprocessing.Queue()
+            transport_endpoints = None
         
         # 创建并启动进程
         # 获取插件间通信队列（从 state 获取）
@@ -946,26 +1003,28 @@ class PluginHost:
                 plugin_id, e
             )
         try:
-            _ = state.plugin_response_notify_event
+            _ = state.plugin_response_notifier
         except Exception as e:
             loguru_logger.warning(
-                "Failed to pre-initialize plugin_response_notify_event for plugin {}: {}",
+                "Failed to pre-initialize plugin_response_notifier for plugin {}: {}",
                 plugin_id, e
             )
         
+        # 使用传输层时子进程自行建立连接，通道适配器不跨进程传递
+        if self.transport is not None:
+            child_queues: tuple = (None, None, None, None, None)
+        else:
+            child_queues = (cmd_queue, res_queue, status_queue, message_queue, response_queue)
         self.process = multiprocessing.Process(
             target=_plugin_process_runner,
             args=(
                 plugin_id,
                 entry_point,
                 config_path,
-                cmd_queue,
-                res_queue,
-                status_queue,
-                message_queue,
-                response_queue,
+                *child_queues,
                 self._process_stop_event,
                 plugin_comm_queue,
+                transport_endpoints,
             ),
             daemon=True,
         )
@@ -985,6 +1044,7 @@ class PluginHost:
             res_queue=res_queue,
             status_queue=status_queue,
             message_queue=message_queue,
+            transport=self.transport,
         )
         
         # 保留队列引用（用于 shutdown_sync 等同步方法）
@@ -1090,6 +1150,8 @@ class PluginHost:
             pass
                 
         self._shutdown_process(timeout=timeout)
+        if self.transport is not None:
+            self.transport.close()
     
     async def trigger(self, entry_id: str, args: dict, timeout: float = PLUGIN_TRIGGER_TIMEOUT) -> Any:
         """
@@ -259,6 +259,19 @@ class PluginContextProtocol(Protocol):
         """推送二进制数据导出(同步)"""
         ...
     
+    def export_push_binary_stream(
+        self,
+        *,
+        run_id: Optional[str] = None,
+        mime: Optional[str] = None,
+        description: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        max_bytes: Optional[int] = None,
+        timeout: float = 5.0,
+    ) -> Any:
+        """流式推送二进制导出：返回可分块 write() 的写入器，close()/aclose() 时推送"""
+        ...
+    
     def export_push_binary_url(
         self,
         *,
@@ -10,6 +10,12 @@ from loguru import logger
 
 from plugin.core.state import state
 from plugin.settings import PLUGIN_LOG_BUS_SUBSCRIPTIONS, PLUGIN_BUS_CHANGE_LOG_DEDUP_WINDOW_SECONDS
+from plugin.utils.instrumentation import registry as _metrics
+
+_PUSH_SECONDS = _metrics.histogram(
+    "bus_change_push_seconds", "bus.change push latency per subscriber", labels=("bus",), unit="seconds"
+)
+_PUSH_FAILURES = _metrics.counter("bus_change_push_failures", "bus.change pushes that failed or timed out", labels=("bus",))
 
 
 @dataclass(frozen=True)
@@ -123,6 +129,7 @@ class BusSubscriptionManager:
                 pass
 
             async with self._dispatch_sem:
+                started = time.perf_counter()
                 try:
                     await asyncio.wait_for(
                         host.push_bus_change(
@@ -134,6 +141,7 @@ class BusSubscriptionManager:
                         timeout=float(self._push_timeout_s),
                     )
                 except Exception:
+                    _PUSH_FAILURES.labels(delta.bus).inc()
                     # Failure tracking + circuit breaker
                     try:
                         nfail = int(self._sub_failures.get(key2, 0)) + 1
@@ -144,6 +152,7 @@ class BusSubscriptionManager:
                     except Exception:
                         pass
                     return
+                _PUSH_SECONDS.labels(delta.bus).observe(time.perf_counter() - started)
 
             # Success -> reset failures
             try:
@@ -202,6 +211,12 @@ class BusSubscriptionManager:
 
 bus_subscription_manager = BusSubscriptionManager()
 
+_metrics.gauge_func(
+    "bus_change_queue_depth",
+    "bus.change deltas waiting to be dispatched",
+    lambda: bus_subscription_manager._queue.qsize(),
+)
+
 
 def new_sub_id() -> str:
     return str(uuid.uuid4())
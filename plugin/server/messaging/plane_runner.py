@@ -76,6 +76,39 @@ def _rpc_health_check(endpoint: str, *, timeout_s: float = 1.0) -> bool:
         return False
 
 
+_metrics_client = None
+_metrics_client_lock = threading.Lock()
+
+
+def fetch_message_plane_metrics(endpoint: str, *, timeout_s: float = 1.0) -> Optional[str]:
+    """通过 ``metrics`` RPC 拉取 message plane 进程的 OpenMetrics 文本
+
+    message plane 在同一进程内运行（embedded）时两者共用同一个注册表，返回 None；
+    不可用或后端不支持该 op（如 rust 后端）时也返回 None。
+    """
+    global _metrics_client
+    try:
+        from plugin.sdk.message_plane_transport import MessagePlaneRpcClient
+    except Exception:
+        return None
+
+    try:
+        with _metrics_client_lock:
+            if _metrics_client is None:
+                _metrics_client = MessagePlaneRpcClient(plugin_id="server", endpoint=str(endpoint))
+            rpc = _metrics_client
+        resp = rpc.request_sync(op="metrics", args={}, timeout=float(timeout_s))
+    except Exception:
+        return None
+    if not isinstance(resp, dict) or not resp.get("ok"):
+        return None
+    result = resp.get("result")
+    if not isinstance(result, dict) or result.get("pid") == os.getpid():
+        return None
+    text = result.get("text")
+    return text if isinstance(text, str) else None
+
+
 def _resolve_rust_message_plane_bin(configured: str) -> str:
     # Priority:
     # 1) Explicit path from settings/env
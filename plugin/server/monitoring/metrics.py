@@ -5,9 +5,13 @@
 """
 import asyncio
 import threading
-from typing import Dict, Any, Optional, List, Callable
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
+
+import numpy as np
 
 try:
     import psutil
@@ -22,6 +26,7 @@ from plugin.settings import PLUGIN_LOG_SERVER_DEBUG
 
 from plugin.core.state import state
 from plugin.server.infrastructure.utils import now_iso
+from plugin.utils.instrumentation import registry as _metrics
 
 
 @dataclass
@@ -48,18 +53,159 @@ class PluginMetrics:
     queue_size: int = 0
 
 
+# 历史环形缓冲区中保存的数值字段（pid 以 float64 保存，2^53 以内无损）
+HISTORY_FIELDS: Tuple[str, ...] = (
+    "pid",
+    "cpu_percent",
+    "memory_mb",
+    "memory_percent",
+    "num_threads",
+    "total_executions",
+    "successful_executions",
+    "failed_executions",
+    "avg_execution_time",
+    "pending_requests",
+    "queue_size",
+)
+
+# 降采样查询中按桶聚合（min/max/avg）的字段
+DOWNSAMPLE_FIELDS: Tuple[str, ...] = (
+    "cpu_percent",
+    "memory_mb",
+    "memory_percent",
+    "num_threads",
+    "pending_requests",
+)
+
+_INT_FIELDS = frozenset({
+    "num_threads",
+    "total_executions",
+    "successful_executions",
+    "failed_executions",
+    "pending_requests",
+    "queue_size",
+})
+
+
+def _iso_from_ts(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _ts_from_iso(value: str) -> float:
+    dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        # 与存储的时间戳一致，无时区的输入按 UTC 处理
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def parse_time_bound(value: Optional[str]) -> Optional[float]:
+    """解析 start_time/end_time 查询参数（ISO 8601）；为空返回 None，格式错误抛出 ValueError"""
+    if not value:
+        return None
+    return _ts_from_iso(value)
+
+
+class MetricsRing:
+    """单个插件的指标历史：每个字段一个固定大小的 NumPy 环形缓冲区。
+
+    写入为 O(1) 且不分配内存；读取时按时间顺序拼出视图后做切片/聚合。
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._ts = np.zeros(self.capacity, dtype=np.float64)
+        self._data = {name: np.zeros(self.capacity, dtype=np.float64) for name in HISTORY_FIELDS}
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, ts: float, values: Dict[str, float]) -> None:
+        i = self._next
+        self._ts[i] = ts
+        for name, arr in self._data.items():
+            arr[i] = values.get(name, 0.0)
+        self._next = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def _ordered(self, arr: np.ndarray) -> np.ndarray:
+        if self._count < self.capacity:
+            return arr[:self._count]
+        return np.concatenate((arr[self._next:], arr[:self._next]))
+
+    def snapshot(self, start_ts: Optional[float] = None, end_ts: Optional[float] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """按时间顺序返回 [start_ts, end_ts] 范围内的时间戳和各字段（副本）"""
+        ts = self._ordered(self._ts)
+        lo = 0 if start_ts is None else int(np.searchsorted(ts, start_ts, side="left"))
+        hi = len(ts) if end_ts is None else int(np.searchsorted(ts, end_ts, side="right"))
+        return ts[lo:hi].copy(), {name: self._ordered(arr)[lo:hi].copy() for name, arr in self._data.items()}
+
+    def latest(self) -> Optional[Tuple[float, Dict[str, float]]]:
+        if self._count == 0:
+            return None
+        i = (self._next - 1) % self.capacity
+        return float(self._ts[i]), {name: float(arr[i]) for name, arr in self._data.items()}
+
+    def downsample(
+        self,
+        buckets: int,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+        fields: Tuple[str, ...] = DOWNSAMPLE_FIELDS,
+    ) -> List[Dict[str, Any]]:
+        """把时间范围等分为 buckets 个桶，返回每个非空桶内各字段的 min/max/avg"""
+        ts, data = self.snapshot(start_ts, end_ts)
+        if len(ts) == 0:
+            return []
+        t0 = float(ts[0]) if start_ts is None else float(start_ts)
+        t1 = float(ts[-1]) if end_ts is None else float(end_ts)
+        edges = np.linspace(t0, t1, max(1, int(buckets)) + 1)
+        # 每个样本所属的桶；最后一个桶为闭区间
+        idx = np.clip(np.searchsorted(edges, ts, side="right") - 1, 0, len(edges) - 2)
+        starts = np.flatnonzero(np.r_[True, idx[1:] != idx[:-1]])
+        counts = np.diff(np.r_[starts, len(ts)])
+        out: List[Dict[str, Any]] = [
+            {
+                "start": _iso_from_ts(float(edges[b])),
+                "end": _iso_from_ts(float(edges[b + 1])),
+                "count": int(n),
+            }
+            for b, n in zip(idx[starts], counts)
+        ]
+        for name in fields:
+            values = data[name]
+            mins = np.minimum.reduceat(values, starts)
+            maxs = np.maximum.reduceat(values, starts)
+            avgs = np.add.reduceat(values, starts) / counts
+            for row, lo, hi, avg in zip(out, mins, maxs, avgs):
+                row[name] = {"min": round(float(lo), 3), "max": round(float(hi), 3), "avg": round(float(avg), 3)}
+        return out
+
+
 class MetricsCollector:
-    """性能指标收集器"""
+    """性能指标收集器
+
+    每轮在一个专用工作线程中对所有插件采样，事件循环只负责收集目标和写入结果。
+    每个插件保留一个持久的 psutil.Process 句柄，cpu_percent 使用 interval=None
+    （相对上一次调用的增量），不再每个插件阻塞 0.1 秒。
+    """
     
     # 每个插件保留的最大历史记录数
     MAX_HISTORY_SIZE = 1000
     
     def __init__(self, interval: float = 5.0):
         self.interval = interval
-        self._metrics_history: Dict[str, List[PluginMetrics]] = {}
+        self._metrics_history: Dict[str, MetricsRing] = {}
         self._lock = threading.Lock()
         self._task: Optional[asyncio.Task] = None
         self._plugin_hosts_getter: Optional[Callable] = None
+        # 仅由采样线程访问
+        self._ps_handles: Dict[str, Any] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.last_pass_seconds = 0.0
     
     async def start(self, plugin_hosts_getter: Callable):
         """启动指标收集任务"""
@@ -68,6 +214,8 @@ class MetricsCollector:
             return
         
         self._plugin_hosts_getter = plugin_hosts_getter
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="metrics-sampler")
         if self._task is None or self._task.done():
             self._task = asyncio.create_task(self._collect_loop())
             logger.info("Metrics collector started")
@@ -81,6 +229,10 @@ class MetricsCollector:
             except asyncio.CancelledError:
                 pass
             logger.info("Metrics collector stopped")
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._ps_handles.clear()
     
     async def _collect_loop(self):
         """定期收集指标"""
@@ -99,33 +251,7 @@ class MetricsCollector:
                 
                 if PLUGIN_LOG_SERVER_DEBUG:
                     logger.debug(f"Collecting metrics for {len(plugin_hosts)} plugins: {list(plugin_hosts.keys())}")
-                for plugin_id, host in plugin_hosts.items():
-                    try:
-                        metrics = await self._collect_plugin_metrics(plugin_id, host)
-                        if metrics:
-                            with self._lock:
-                                if plugin_id not in self._metrics_history:
-                                    self._metrics_history[plugin_id] = []
-                                self._metrics_history[plugin_id].append(metrics)
-                                # 只保留最近 MAX_HISTORY_SIZE 条记录
-                                if len(self._metrics_history[plugin_id]) > self.MAX_HISTORY_SIZE:
-                                    self._metrics_history[plugin_id].pop(0)
-                                if PLUGIN_LOG_SERVER_DEBUG:
-                                    logger.debug(f"Successfully collected and stored metrics for plugin {plugin_id}")
-                        else:
-                            # 记录为什么没有收集到指标
-                            process = getattr(host, "process", None)
-                            if not process:
-                                if PLUGIN_LOG_SERVER_DEBUG:
-                                    logger.debug(f"No process object for plugin {plugin_id}")
-                            elif not process.is_alive():
-                                if PLUGIN_LOG_SERVER_DEBUG:
-                                    logger.debug(f"Process for plugin {plugin_id} is not alive (pid: {process.pid if process else 'N/A'})")
-                            else:
-                                if PLUGIN_LOG_SERVER_DEBUG:
-                                    logger.debug(f"Failed to collect metrics for plugin {plugin_id} (process alive but collection returned None)")
-                    except Exception as e:
-                        logger.warning(f"Exception while collecting metrics for plugin {plugin_id}: {e}", exc_info=True)
+                await self._collect_all(plugin_hosts)
                 
             except asyncio.CancelledError:
                 break
@@ -133,82 +259,146 @@ class MetricsCollector:
                 logger.exception(f"Error in metrics collection loop: {e}")
             
             await asyncio.sleep(self.interval)
-    
-    async def _collect_plugin_metrics(self, plugin_id: str, host: Any) -> Optional[PluginMetrics]:
-        """收集单个插件的性能指标"""
-        if not PSUTIL_AVAILABLE:
-            if PLUGIN_LOG_SERVER_DEBUG:
-                logger.debug(f"psutil not available, cannot collect metrics for {plugin_id}")
-            return None
-        
-        try:
-            # 获取进程信息
+
+    async def _collect_all(self, plugin_hosts: Dict[str, Any]) -> None:
+        """一轮采样：在事件循环中读取队列状态，在采样线程中批量读取进程信息"""
+        targets: List[Tuple[str, Any, int]] = []
+        for plugin_id, host in plugin_hosts.items():
             process = getattr(host, "process", None)
             if not process:
-                logger.debug(f"No process object for plugin {plugin_id}")
-                return None
-            
-            if not process.is_alive():
                 if PLUGIN_LOG_SERVER_DEBUG:
-                    logger.debug(f"Process for plugin {plugin_id} is not alive (pid: {process.pid})")
-                return None
-            
-            pid = process.pid
-            
-            # 使用psutil获取进程信息
+                    logger.debug(f"No process object for plugin {plugin_id}")
+                continue
+            targets.append((plugin_id, process, self._pending_requests(plugin_id, host)))
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        samples = await loop.run_in_executor(self._executor, self._sample_all, targets)
+        self.last_pass_seconds = time.perf_counter() - started
+
+        with self._lock:
+            for metrics in samples:
+                ring = self._metrics_history.get(metrics.plugin_id)
+                if ring is None:
+                    ring = self._metrics_history[metrics.plugin_id] = MetricsRing(self.MAX_HISTORY_SIZE)
+                ring.append(time.time(), self._metrics_values(metrics))
+        if PLUGIN_LOG_SERVER_DEBUG:
+            logger.debug(
+                f"Collected metrics for {len(samples)}/{len(targets)} plugins in {self.last_pass_seconds * 1000:.1f} ms"
+            )
+
+    def _pending_requests(self, plugin_id: str, host: Any) -> int:
+        comm_manager = getattr(host, "comm_manager", None)
+        if not comm_manager:
+            return 0
+        # 使用公共方法获取待处理请求数，保持封装性
+        if hasattr(comm_manager, "get_pending_requests_count"):
             try:
+                return comm_manager.get_pending_requests_count()
+            except Exception as e:
+                if PLUGIN_LOG_SERVER_DEBUG:
+                    logger.debug(f"Failed to get pending requests count for {plugin_id}: {e}")
+                return 0
+        # 向后兼容：如果方法不存在，使用防御性访问
+        pending_futures = getattr(comm_manager, "_pending_futures", None)
+        return len(pending_futures) if pending_futures else 0
+
+    def _sample_all(self, targets: List[Tuple[str, Any, int]]) -> List[PluginMetrics]:
+        """在采样线程中运行：依次读取所有插件进程的信息（不阻塞事件循环）"""
+        samples: List[PluginMetrics] = []
+        seen = set()
+        for plugin_id, process, pending_requests in targets:
+            seen.add(plugin_id)
+            try:
+                metrics = self._sample_process(plugin_id, process, pending_requests)
+            except Exception as e:
+                logger.warning(f"Unexpected error collecting metrics for {plugin_id}: {e}", exc_info=True)
+                metrics = None
+            if metrics:
+                samples.append(metrics)
+        # 释放已不再运行的插件的句柄
+        for plugin_id in list(self._ps_handles):
+            if plugin_id not in seen:
+                self._ps_handles.pop(plugin_id, None)
+        return samples
+
+    def _sample_process(self, plugin_id: str, process: Any, pending_requests: int) -> Optional[PluginMetrics]:
+        """读取单个插件进程的信息；复用 psutil.Process 句柄以获得 cpu_percent 增量"""
+        if not process.is_alive():
+            self._ps_handles.pop(plugin_id, None)
+            if PLUGIN_LOG_SERVER_DEBUG:
+                logger.debug(f"Process for plugin {plugin_id} is not alive (pid: {process.pid})")
+            return None
+
+        pid = process.pid
+        ps_process = self._ps_handles.get(plugin_id)
+        try:
+            if ps_process is None or ps_process.pid != pid:
+                # 新句柄：第一次 cpu_percent(None) 只建立基准并返回 0.0
                 ps_process = psutil.Process(pid)
-                cpu_percent = ps_process.cpu_percent(interval=0.1)
+                ps_process.cpu_percent(interval=None)
+                self._ps_handles[plugin_id] = ps_process
+            with ps_process.oneshot():
+                cpu_percent = ps_process.cpu_percent(interval=None)
                 memory_info = ps_process.memory_info()
                 memory_mb = memory_info.rss / 1024 / 1024
                 memory_percent = ps_process.memory_percent()
                 num_threads = ps_process.num_threads()
-            except psutil.NoSuchProcess:
-                if PLUGIN_LOG_SERVER_DEBUG:
-                    logger.debug(f"Process {pid} for plugin {plugin_id} no longer exists (NoSuchProcess)")
-                return None
-            except psutil.AccessDenied:
-                logger.warning(f"Access denied when collecting metrics for plugin {plugin_id} (pid: {pid})")
-                return None
-            
-            # 获取队列状态
-            comm_manager = getattr(host, "comm_manager", None)
-            pending_requests = 0
-            if comm_manager:
-                # 使用公共方法获取待处理请求数，保持封装性
-                if hasattr(comm_manager, "get_pending_requests_count"):
-                    try:
-                        pending_requests = comm_manager.get_pending_requests_count()
-                    except Exception as e:
-                        if PLUGIN_LOG_SERVER_DEBUG:
-                            logger.debug(f"Failed to get pending requests count for {plugin_id}: {e}")
-                        pending_requests = 0
-                else:
-                    # 向后兼容：如果方法不存在，使用防御性访问
-                    pending_futures = getattr(comm_manager, "_pending_futures", None)
-                    pending_requests = len(pending_futures) if pending_futures else 0
-            
-            return PluginMetrics(
-                plugin_id=plugin_id,
-                timestamp=now_iso(),
-                pid=pid,
-                cpu_percent=cpu_percent,
-                memory_mb=memory_mb,
-                memory_percent=memory_percent,
-                num_threads=num_threads,
-                pending_requests=pending_requests,
-            )
-        except Exception as e:
-            logger.warning(f"Unexpected error collecting metrics for {plugin_id}: {e}", exc_info=True)
+        except psutil.NoSuchProcess:
+            self._ps_handles.pop(plugin_id, None)
+            if PLUGIN_LOG_SERVER_DEBUG:
+                logger.debug(f"Process {pid} for plugin {plugin_id} no longer exists (NoSuchProcess)")
             return None
+        except psutil.AccessDenied:
+            logger.warning(f"Access denied when collecting metrics for plugin {plugin_id} (pid: {pid})")
+            return None
+
+        return PluginMetrics(
+            plugin_id=plugin_id,
+            timestamp=now_iso(),
+            pid=pid,
+            cpu_percent=cpu_percent,
+            memory_mb=memory_mb,
+            memory_percent=memory_percent,
+            num_threads=num_threads,
+            pending_requests=pending_requests,
+        )
+
+    async def _collect_plugin_metrics(self, plugin_id: str, host: Any) -> Optional[PluginMetrics]:
+        """收集单个插件的性能指标"""
+        if not PSUTIL_AVAILABLE:
+            if PLUGIN_LOG_SERVER_DEBUG:
+                logger.debug(f"psutil not available, cannot collect metrics for {plugin_id}")
+            return None
+        process = getattr(host, "process", None)
+        if not process:
+            logger.debug(f"No process object for plugin {plugin_id}")
+            return None
+        pending_requests = self._pending_requests(plugin_id, host)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._sample_process, plugin_id, process, pending_requests
+        )
+
+    @staticmethod
+    def _metrics_values(metrics: PluginMetrics) -> Dict[str, float]:
+        return {name: float(getattr(metrics, name) or 0) for name in HISTORY_FIELDS}
+
+    @staticmethod
+    def _row_to_metrics(plugin_id: str, ts: float, values: Dict[str, float]) -> PluginMetrics:
+        kwargs: Dict[str, Any] = {}
+        for name in HISTORY_FIELDS:
+            v = values[name]
+            kwargs[name] = int(v) if name in _INT_FIELDS or name == "pid" else v
+        return PluginMetrics(plugin_id=plugin_id, timestamp=_iso_from_ts(ts), **kwargs)
     
     def get_current_metrics(self, plugin_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """获取当前性能指标"""
         with self._lock:
             if plugin_id:
-                history = self._metrics_history.get(plugin_id, [])
-                if history:
-                    return [self._metrics_to_dict(history[-1])]
+                ring = self._metrics_history.get(plugin_id)
+                latest = ring.latest() if ring is not None else None
+                if latest:
+                    return [self._metrics_to_dict(self._row_to_metrics(plugin_id, *latest))]
                 # 调试：记录为什么找不到指标
                 available_ids = list(self._metrics_history.keys())
                 logger.debug(
@@ -219,9 +409,10 @@ class MetricsCollector:
             else:
                 # 返回所有插件的最新指标
                 result = []
-                for _plugin_id, history in self._metrics_history.items():
-                    if history:
-                        result.append(self._metrics_to_dict(history[-1]))
+                for _plugin_id, ring in self._metrics_history.items():
+                    latest = ring.latest()
+                    if latest:
+                        result.append(self._metrics_to_dict(self._row_to_metrics(_plugin_id, *latest)))
                 logger.debug(f"get_current_metrics (all): found {len(result)} plugins with metrics")
                 return result
     
@@ -232,21 +423,40 @@ class MetricsCollector:
         start_time: Optional[str] = None,
         end_time: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """获取性能指标历史"""
+        """获取性能指标历史（start_time/end_time 为 ISO 8601 时间，闭区间）"""
+        start_ts = parse_time_bound(start_time)
+        end_ts = parse_time_bound(end_time)
         with self._lock:
-            history = self._metrics_history.get(plugin_id, [])
-            
-            # 时间过滤（简单实现）
-            filtered = history
-            if start_time or end_time:
-                # TODO: 实现时间范围过滤
-                pass
-            
-            # 限制数量
-            if len(filtered) > limit:
-                filtered = filtered[-limit:]
-            
-            return [self._metrics_to_dict(m) for m in filtered]
+            ring = self._metrics_history.get(plugin_id)
+            if ring is None:
+                return []
+            ts, data = ring.snapshot(start_ts, end_ts)
+
+        # 限制数量
+        if len(ts) > limit:
+            ts = ts[-limit:]
+            data = {name: arr[-limit:] for name, arr in data.items()}
+
+        return [
+            self._metrics_to_dict(self._row_to_metrics(plugin_id, float(t), {name: arr[i] for name, arr in data.items()}))
+            for i, t in enumerate(ts)
+        ]
+
+    def get_metrics_history_downsampled(
+        self,
+        plugin_id: str,
+        buckets: int = 60,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """按时间等分桶的降采样历史，每个桶给出各指标的 min/max/avg"""
+        start_ts = parse_time_bound(start_time)
+        end_ts = parse_time_bound(end_time)
+        with self._lock:
+            ring = self._metrics_history.get(plugin_id)
+            if ring is None:
+                return []
+            return ring.downsample(buckets, start_ts, end_ts)
     
     def _metrics_to_dict(self, metrics: PluginMetrics) -> Dict[str, Any]:
         """将指标对象转换为字典"""
@@ -270,3 +480,16 @@ class MetricsCollector:
 # 全局指标收集器实例
 metrics_collector = MetricsCollector()
 
+
+def _pending_requests_by_plugin() -> List[Tuple[Tuple[str], int]]:
+    with state.plugin_hosts_lock:
+        hosts = list(state.plugin_hosts.items())
+    return [((plugin_id,), metrics_collector._pending_requests(plugin_id, host)) for plugin_id, host in hosts]
+
+
+_metrics.gauge_func(
+    "plugin_pending_requests",
+    "Requests sent to a plugin process that are still awaiting a response",
+    _pending_requests_by_plugin,
+    labels=("plugin_id",),
+)
@@ -7,6 +7,7 @@ from typing import Any, Dict, Optional
 
 from plugin.server.requests.typing import SendResponse
 from plugin.server.runs.manager import ExportItem, append_export_item
+from plugin.server.runs.storage import blob_store
 from plugin.settings import EXPORT_INLINE_BINARY_MAX_BYTES
 
 
@@ -27,6 +28,8 @@ async def handle_export_push(request: Dict[str, Any], send_response: SendRespons
     url = request.get("url", None)
     binary_base64 = request.get("binary_base64", None)
     binary_url = request.get("binary_url", None)
+    binary_frames = request.get("_binary_frames", None)
+    blob_id = request.get("blob_id", None)
     mime = request.get("mime", None)
     metadata = request.get("metadata", None)
 
@@ -38,7 +41,7 @@ async def handle_export_push(request: Dict[str, Any], send_response: SendRespons
         return
     
     et = export_type.strip()
-    if et not in ("text", "url", "binary", "binary_url"):
+    if et not in ("text", "url", "binary", "binary_url", "blob"):
         send_response(from_plugin, request_id, None, "unsupported export_type", timeout=float(timeout))
         return
 
@@ -55,15 +58,40 @@ async def handle_export_push(request: Dict[str, Any], send_response: SendRespons
         if not isinstance(binary_url, str) or not binary_url.strip():
             send_response(from_plugin, request_id, None, "binary_url is required", timeout=float(timeout))
             return
-    elif et == "binary":
-        if not isinstance(binary_base64, str) or not binary_base64:
-            send_response(from_plugin, request_id, None, "binary_base64 is required", timeout=float(timeout))
+    elif et == "blob":
+        # 插件进程已把数据写入 BlobStore 目录，这里只登记引用
+        if not isinstance(blob_id, str) or not blob_id.strip():
+            send_response(from_plugin, request_id, None, "blob_id is required", timeout=float(timeout))
+            return
+        blob_size = request.get("size", None)
+        if not isinstance(blob_size, int) or isinstance(blob_size, bool) or blob_size < 0:
+            send_response(from_plugin, request_id, None, "size is required", timeout=float(timeout))
             return
         try:
-            decoded_bytes = base64.b64decode(binary_base64, validate=True)
-        except Exception:
-            send_response(from_plugin, request_id, None, "invalid binary_base64", timeout=float(timeout))
+            adopted = blob_store.adopt_blob(run_id=str(run_id).strip(), blob_id=blob_id.strip(), size=blob_size)
+        except ValueError as e:
+            send_response(from_plugin, request_id, None, str(e), timeout=float(timeout))
+            return
+        if adopted is None:
+            send_response(from_plugin, request_id, None, "blob not found", timeout=float(timeout))
             return
+    elif et == "binary":
+        frame_index = request.get("binary_frame", None)
+        if isinstance(frame_index, int) and isinstance(binary_frames, (list, tuple)):
+            # ZeroMQ IPC：二进制数据作为独立帧到达，未经 base64
+            if not 0 <= frame_index < len(binary_frames):
+                send_response(from_plugin, request_id, None, "binary frame missing", timeout=float(timeout))
+                return
+            decoded_bytes = bytes(binary_frames[frame_index])
+        else:
+            if not isinstance(binary_base64, str) or not binary_base64:
+                send_response(from_plugin, request_id, None, "binary_base64 is required", timeout=float(timeout))
+                return
+            try:
+                decoded_bytes = base64.b64decode(binary_base64, validate=True)
+            except Exception:
+                send_response(from_plugin, request_id, None, "invalid binary_base64", timeout=float(timeout))
+                return
         try:
             if EXPORT_INLINE_BINARY_MAX_BYTES is not None and int(EXPORT_INLINE_BINARY_MAX_BYTES) > 0:
                 if len(decoded_bytes) > int(EXPORT_INLINE_BINARY_MAX_BYTES):
@@ -87,7 +115,7 @@ async def handle_export_push(request: Dict[str, Any], send_response: SendRespons
     item_kwargs: Dict[str, Any] = {
         "export_item_id": export_item_id,
         "run_id": str(run_id).strip(),
-        "type": et,
+        "type": "binary_url" if et == "blob" else et,
         "created_at": created_at,
         "description": str(description) if isinstance(description, str) else None,
         "mime": str(mime) if isinstance(mime, str) and mime else None,
@@ -100,12 +128,24 @@ async def handle_export_push(request: Dict[str, Any], send_response: SendRespons
         item_kwargs["url"] = url
     elif et == "binary_url":
         item_kwargs["binary_url"] = binary_url
+    elif et == "blob":
+        bid = str(blob_id).strip()
+        item_kwargs["blob_id"] = bid
+        item_kwargs["binary_url"] = f"/runs/{item_kwargs['run_id']}/blobs/{bid}"
     elif et == "binary":
-        item_kwargs["binary"] = binary_base64
+        if isinstance(binary_base64, str) and binary_base64:
+            item_kwargs["binary"] = binary_base64
+        elif decoded_bytes is not None:
+            item_kwargs["binary"] = base64.b64encode(decoded_bytes).decode("ascii")
+
+    result: Dict[str, Any] = {"export_item_id": export_item_id}
+    if et == "blob":
+        result["blob_id"] = item_kwargs["blob_id"]
+        result["binary_url"] = item_kwargs["binary_url"]
 
     try:
         item = ExportItem.model_validate(item_kwargs)
         append_export_item(item)
-        send_response(from_plugin, request_id, {"export_item_id": export_item_id}, None, timeout=float(timeout))
+        send_response(from_plugin, request_id, result, None, timeout=float(timeout))
     except Exception as e:
         send_response(from_plugin, request_id, None, str(e), timeout=float(timeout))
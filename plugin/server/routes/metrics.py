@@ -5,19 +5,41 @@ import asyncio
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
 from loguru import logger
 
 from plugin.api.exceptions import PluginError
 from plugin.core.state import state
 from plugin.server.infrastructure.error_handler import handle_plugin_error
-from plugin.server.monitoring.metrics import metrics_collector
+from plugin.server.monitoring.metrics import metrics_collector, parse_time_bound
+from plugin.server.messaging.plane_runner import fetch_message_plane_metrics
 from plugin.server.infrastructure.utils import now_iso
 from plugin.server.infrastructure.auth import require_admin
 from plugin.server.infrastructure.executor import _api_executor
+from plugin.settings import MESSAGE_PLANE_ZMQ_RPC_ENDPOINT
+from plugin.utils.instrumentation import OPENMETRICS_CONTENT_TYPE, merge_expositions, registry
 
 router = APIRouter()
 
 
+@router.get("/metrics")
+async def get_openmetrics(_: str = require_admin):
+    """OpenMetrics 文本格式的热路径指标（Prometheus 抓取端点，需配置 Bearer 认证）
+
+    message plane 以独立进程运行（external，默认）时，bus RPC 延迟与 ingest 批大小记录在
+    该进程自己的注册表中，这里通过 ``metrics`` RPC 拉取后与本进程的指标合并导出。
+    """
+    text = registry.render()
+    loop = asyncio.get_running_loop()
+    plane_text = await loop.run_in_executor(
+        _api_executor,
+        lambda: fetch_message_plane_metrics(str(MESSAGE_PLANE_ZMQ_RPC_ENDPOINT), timeout_s=1.0),
+    )
+    if plane_text:
+        text = merge_expositions(text, plane_text)
+    return Response(content=text, media_type=OPENMETRICS_CONTENT_TYPE)
+
+
 @router.get("/plugin/metrics")
 async def get_all_plugin_metrics(_: str = require_admin):
     try:
@@ -167,9 +189,34 @@ async def get_plugin_metrics_history(
     limit: int = Query(default=100, ge=1, le=1000),
     start_time: Optional[str] = Query(default=None),
     end_time: Optional[str] = Query(default=None),
+    buckets: Optional[int] = Query(default=None, ge=1, le=1000),
     _: str = require_admin
 ):
     try:
+        start_ts = parse_time_bound(start_time)
+        end_ts = parse_time_bound(end_time)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="start_time/end_time must be ISO 8601 timestamps, e.g. 2024-01-01T00:00:00Z"
+        ) from None
+    if start_ts is not None and end_ts is not None and start_ts > end_ts:
+        raise HTTPException(status_code=400, detail="start_time must not be later than end_time")
+    try:
+        if buckets is not None:
+            # 降采样：每个时间桶给出各指标的 min/max/avg
+            downsampled = metrics_collector.get_metrics_history_downsampled(
+                plugin_id=plugin_id,
+                buckets=buckets,
+                start_time=start_time,
+                end_time=end_time
+            )
+            return {
+                "plugin_id": plugin_id,
+                "buckets": downsampled,
+                "count": len(downsampled),
+                "time": now_iso()
+            }
         history = metrics_collector.get_metrics_history(
             plugin_id=plugin_id,
             limit=limit,
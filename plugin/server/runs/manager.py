@@ -37,6 +37,7 @@ class ExportItem(BaseModel):
     url: Optional[str] = None
     binary_url: Optional[str] = None
     binary: Optional[str] = None
+    blob_id: Optional[str] = None
     mime: Optional[str] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
@@ -87,6 +87,35 @@ class BlobStore:
             return sess
         return sess
 
+    def adopt_blob(self, *, run_id: str, blob_id: str, size: int) -> Optional[Path]:
+        """登记插件进程直接写入存储目录的 blob（按引用导出，主进程不读取内容）
+
+        blob 不存在时返回 None；磁盘上的大小与插件声明的 ``size`` 不一致（写入被截断或尚未写完）
+        或超过上限时抛出 ValueError。
+        """
+        try:
+            bid = str(uuid.UUID(str(blob_id)))
+        except Exception:
+            return None
+        rid = str(run_id)
+        p = self._ensure_dirs() / f"{bid}.blob"
+        try:
+            if not p.is_file():
+                return None
+            actual = p.stat().st_size
+        except Exception:
+            return None
+        if actual != int(size):
+            raise ValueError(f"blob size mismatch: expected {int(size)} bytes, found {actual}")
+        if actual > int(BLOB_UPLOAD_MAX_BYTES):
+            raise ValueError("blob too large")
+        with self._lock:
+            owner = self._blob_to_run.get(bid)
+            if owner is not None and owner != rid:
+                return None
+            self._blob_to_run[bid] = rid
+        return p
+
     def get_blob_path(self, *, run_id: str, blob_id: str) -> Optional[Path]:
         rid = str(run_id)
         bid = str(blob_id)
@@ -27,6 +27,7 @@ from plugin.api.exceptions import (
 from plugin.server.infrastructure.error_handler import handle_plugin_error
 from plugin.server.infrastructure.utils import now_iso
 from plugin.utils.logging import format_log_text as _format_log_text
+from plugin.utils.instrumentation import timed
 from plugin.settings import (
     PLUGIN_EXECUTION_TIMEOUT,
     MESSAGE_QUEUE_DEFAULT_MAX_COUNT,
@@ -245,6 +246,7 @@ def build_plugin_list() -> List[Dict[str, Any]]:
     return result
 
 
+@timed("plugin_trigger_seconds", "trigger_plugin end-to-end latency")
 async def trigger_plugin(
     plugin_id: str,
     entry_id: str,
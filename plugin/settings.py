@@ -229,6 +229,14 @@ PLUGIN_ZMQ_IPC_ENABLED = _get_bool_env("NEKO_PLUGIN_ZMQ_IPC_ENABLED", True)
 # Env: NEKO_PLUGIN_ZMQ_IPC_ENDPOINT, default="tcp://127.0.0.1:38765"
 PLUGIN_ZMQ_IPC_ENDPOINT = os.getenv("NEKO_PLUGIN_ZMQ_IPC_ENDPOINT", "tcp://127.0.0.1:38765")
 
+# PluginHost 与插件进程之间 cmd/res/status/message/response 通道的实现
+# - zmq: 每个插件三条 ZeroMQ ipc:// PUSH/PULL 连接（0700 临时目录）承载全部通道（msgpack 编码，事件循环原生接收）
+# - queue: 每个通道一个 multiprocessing.Queue（旧实现；pyzmq 或 ipc 传输不可用时自动回退）
+# Env: NEKO_PLUGIN_HOST_TRANSPORT, default="zmq"
+PLUGIN_HOST_TRANSPORT = os.getenv("NEKO_PLUGIN_HOST_TRANSPORT", "zmq").strip().lower()
+if PLUGIN_HOST_TRANSPORT not in ("zmq", "queue"):
+    PLUGIN_HOST_TRANSPORT = "zmq"
+
 # [MESSAGE FORWARD] 日志去重窗口（秒）
 # Env: NEKO_PLUGIN_MESSAGE_FORWARD_LOG_DEDUP_WINDOW_SECONDS, default=1.0
 PLUGIN_MESSAGE_FORWARD_LOG_DEDUP_WINDOW_SECONDS = _get_float_env(
@@ -263,6 +271,13 @@ MESSAGE_PLANE_RUST_BIN = os.getenv("NEKO_MESSAGE_PLANE_RUST_BIN", "neko-message-
 # Env: NEKO_MESSAGE_PLANE_WORKERS, default=0
 MESSAGE_PLANE_WORKERS = _get_int_env("NEKO_MESSAGE_PLANE_WORKERS", 0)
 
+# Python message_plane RPC 工作线程数
+# - 0: 单线程串行处理（默认，单个请求延迟最低）
+# - >0: ROUTER 前端 + N 个 inproc DEALER 工作线程，只读操作并行执行，写操作（bus.publish）串行；
+#       适合存在慢 bus.replay / bus.query 拖慢其他插件 get_recent 的场景
+# Env: NEKO_MESSAGE_PLANE_RPC_WORKERS, default=0
+MESSAGE_PLANE_RPC_WORKERS = _get_int_env("NEKO_MESSAGE_PLANE_RPC_WORKERS", 0)
+
 # Message plane ZeroMQ RPC 端点（用于高频 bus 的请求/响应，例如 get/reload/filter 等）
 # 使用 TCP 回环（127.0.0.1），在某些系统上比 IPC 更快
 # Env: NEKO_MESSAGE_PLANE_ZMQ_RPC_ENDPOINT, default="tcp://127.0.0.1:38865"
@@ -315,6 +330,20 @@ MESSAGE_PLANE_INGEST_BACKPRESSURE_SLEEP_SECONDS = _get_float_env("NEKO_MESSAGE_P
 MESSAGE_PLANE_INGEST_SNDTIMEO_MS = _get_int_env("NEKO_MESSAGE_PLANE_INGEST_SNDTIMEO_MS", 1000)
 
 MESSAGE_PLANE_PUB_ENABLED = _get_bool_env("NEKO_MESSAGE_PLANE_PUB_ENABLED", True)
+
+# 额外的 PUB 端点（逗号分隔），每个端点单独声明格式，主 PUB 端点始终保持旧格式
+# （json 消息体 + ``store.topic`` 主题），已有订阅方不受影响。端点后可附加选项：
+#   wire=json|msgpack        消息体编码
+#   topics=legacy|structured 主题格式：``store.topic`` 或 ``store/topic/plugin_id/``
+#   light=1                  只发送 seq/ts/store/topic/index，不含 payload
+# 例："tcp://127.0.0.1:38868?wire=msgpack&topics=structured,tcp://127.0.0.1:38869?wire=msgpack&topics=structured&light=1"
+# 订阅方通过 RPC health 的 result.pub.channels 选择端点
+# Env: NEKO_MESSAGE_PLANE_ZMQ_PUB_EXTRA_ENDPOINTS, default=""
+MESSAGE_PLANE_ZMQ_PUB_EXTRA_ENDPOINTS = [
+    spec.strip()
+    for spec in os.getenv("NEKO_MESSAGE_PLANE_ZMQ_PUB_EXTRA_ENDPOINTS", "").split(",")
+    if spec.strip()
+]
 MESSAGE_PLANE_VALIDATE_PAYLOAD_BYTES = _get_bool_env("NEKO_MESSAGE_PLANE_VALIDATE_PAYLOAD_BYTES", True)
 
 MESSAGE_PLANE_PUSH_BATCHER_MAX_QUEUE = _get_int_env("NEKO_MESSAGE_PLANE_PUSH_BATCHER_MAX_QUEUE", 100000)
@@ -560,9 +589,11 @@ __all__ = [
     "MESSAGE_PLANE_BACKEND",
     "MESSAGE_PLANE_RUST_BIN",
     "MESSAGE_PLANE_WORKERS",
+    "MESSAGE_PLANE_RPC_WORKERS",
     "MESSAGE_PLANE_RUN_MODE",
     "MESSAGE_PLANE_ZMQ_RPC_ENDPOINT",
     "MESSAGE_PLANE_ZMQ_PUB_ENDPOINT",
+    "MESSAGE_PLANE_ZMQ_PUB_EXTRA_ENDPOINTS",
     "MESSAGE_PLANE_ZMQ_INGEST_ENDPOINT",
     "MESSAGE_PLANE_VALIDATE_MODE",
     
@@ -0,0 +1,499 @@
+"""
+进程内低开销指标：计数器、对数分桶直方图和回调 gauge，以 OpenMetrics 文本格式导出。
+
+写入路径无锁：每个线程只写自己的分片（threading.local），导出时把所有分片相加；
+读到的值可能比写入晚一瞬，但不会丢失计数。只有首次在某个线程写入、或首次出现
+某组标签值时才会短暂加锁。线程退出后其分片并入一个 retired 分片，
+内存只随存活线程数增长，不随线程的创建次数增长。
+
+直方图为 HDR 风格的对数分桶：按 2 的幂分段，每段再等分 SUB_BUCKETS 个子桶，
+相对误差不超过 1/SUB_BUCKETS，记录一次只需 frexp + 一次列表自增。
+
+用法::
+
+    from plugin.utils.instrumentation import registry, timed
+
+    _RPC_SECONDS = registry.histogram("bus_rpc_seconds", "bus RPC latency", labels=("op",), unit="seconds")
+    _RPC_SECONDS.labels("bus.get_recent").observe(elapsed)
+
+    @timed("plugin_trigger_seconds", "trigger_plugin latency")
+    async def trigger_plugin(...): ...
+
+注册表按进程独立：只有主进程（以及经 ``metrics`` RPC 拉取的 message plane 进程）的指标会出现在
+/metrics 中。插件进程内记录的指标无人采集，因此 ``timed`` 不从 plugin.sdk 导出；插件入口的执行耗时
+由插件运行时测量并随 TRIGGER 结果回传，在主进程记入 ``plugin_entry_seconds``。
+
+    text = registry.render()   # OpenMetrics 文本，以 "# EOF" 结尾
+    merged = merge_expositions(text, other_process_text)   # 合并其它进程导出的文本
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import math
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+SUB_BUCKETS = 4
+
+# 默认范围：耗时约 15µs ~ 64s；大小/深度 1 ~ 约 100 万
+SECONDS_EXP_RANGE = (-16, 6)
+SIZE_EXP_RANGE = (0, 20)
+
+LabelValues = Tuple[str, ...]
+
+_frexp = math.frexp
+_nextafter = math.nextafter
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer() and abs(value) < 1e15):
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Shards:
+    """每线程一个分片；分片只由所属线程写入，读取方遍历所有分片求和
+
+    所属线程退出后（不会再写入），分片由 ``merge`` 并入 retired 分片并被丢弃；
+    在新建分片和读取时顺带清理，重启的 worker / 线程池抖动不会累积分片。
+    """
+
+    __slots__ = ("_factory", "_merge", "local", "_all", "_retired", "_lock")
+
+    def __init__(self, factory: Callable[[], Any], merge: Callable[[Any, Any], None]) -> None:
+        self._factory = factory
+        self._merge = merge
+        self.local = threading.local()
+        self._all: List[Tuple["weakref.ref[threading.Thread]", Any]] = []
+        self._retired = factory()
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        try:
+            return self.local.shard
+        except AttributeError:
+            pass
+        shard = self._factory()
+        owner = weakref.ref(threading.current_thread())
+        with self._lock:
+            self._prune()
+            self._all.append((owner, shard))
+        self.local.shard = shard
+        return shard
+
+    def _prune(self) -> None:
+        # 调用方持有 _lock
+        live = []
+        for owner, shard in self._all:
+            thread = owner()
+            if thread is None or not thread.is_alive():
+                self._merge(self._retired, shard)
+            else:
+                live.append((owner, shard))
+        self._all = live
+
+    def all(self) -> List[Any]:
+        with self._lock:
+            self._prune()
+            # retired 分片会被后续清理继续累加，返回副本避免与本次读到的存活分片重复计数
+            retired = self._factory()
+            self._merge(retired, self._retired)
+            return [retired, *(shard for _, shard in self._all)]
+
+
+class _MetricFamily:
+    kind = ""
+
+    def __init__(self, name: str, help: str = "", labels: Sequence[str] = (), unit: str = "") -> None:
+        self.name = name
+        self.help = help
+        self.label_names: Tuple[str, ...] = tuple(labels)
+        self.unit = unit
+        self._children: Dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any, **kv: Any) -> Any:
+        if not kv:
+            # 热路径：标签值已是 str 时直接命中
+            child = self._children.get(values)
+            if child is not None:
+                return child
+        else:
+            values = tuple(kv.get(n, "") for n in self.label_names)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}, got {key}")
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    def _items(self) -> List[Tuple[LabelValues, Any]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def _header(self) -> List[str]:
+        lines = [f"# TYPE {self.name} {self.kind}"]
+        if self.unit:
+            lines.append(f"# UNIT {self.name} {self.unit}")
+        if self.help:
+            lines.append(f"# HELP {self.name} {_escape(self.help)}")
+        return lines
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+def _merge_counter_shard(into: List[float], shard: List[float]) -> None:
+    into[0] += shard[0]
+
+
+class _CounterChild:
+    __slots__ = ("_shards", "_local")
+
+    def __init__(self) -> None:
+        self._shards = _Shards(lambda: [0.0], _merge_counter_shard)
+        self._local = self._shards.local
+
+    def inc(self, amount: float = 1.0) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shards.get()
+        shard[0] += amount
+
+    def value(self) -> float:
+        return sum(s[0] for s in self._shards.all())
+
+
+class Counter(_MetricFamily):
+    """单调递增计数器；导出样本名为 ``<name>_total``"""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, child in self._items():
+            lines.append(f"{self.name}_total{_format_labels(self.label_names, key)} {_format_value(child.value())}")
+        return lines
+
+
+class _HistogramShard:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.sum = 0.0
+
+    def merge(self, other: "_HistogramShard") -> None:
+        counts = self.counts
+        for i, n in enumerate(other.counts):
+            if n:
+                counts[i] += n
+        self.sum += other.sum
+
+
+class _HistogramChild:
+    __slots__ = ("_family", "_shards", "_local", "_exp_offset", "_mant_scale", "_sub", "_top")
+
+    def __init__(self, family: "Histogram") -> None:
+        self._family = family
+        size = family.num_buckets + 1
+        self._shards = _Shards(lambda: _HistogramShard(size), _HistogramShard.merge)
+        self._local = self._shards.local
+        self._exp_offset = family._exp_offset
+        self._mant_scale = family._mant_scale
+        self._sub = family.sub_buckets
+        self._top = family.num_buckets
+
+    def observe(self, value: float) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shards.get()
+        # 与 Histogram.bucket_index 相同，内联以省去一次方法调用
+        if value > 0.0:
+            m, e = _frexp(_nextafter(value, 0.0))
+            i = (e - self._exp_offset) * self._sub + int(m * self._mant_scale) - self._sub
+            if i < 0:
+                i = 0
+            elif i > self._top:
+                i = self._top
+        else:
+            i = 0
+        shard.counts[i] += 1
+        shard.sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        counts = [0] * (self._family.num_buckets + 1)
+        total = 0.0
+        for shard in self._shards.all():
+            for i, n in enumerate(shard.counts):
+                if n:
+                    counts[i] += n
+            total += shard.sum
+        return counts, total
+
+
+class Histogram(_MetricFamily):
+    """对数分桶直方图（累计桶 + _count + _sum）
+
+    桶 i 覆盖 (upper(i-1), upper(i)]，upper 为 2**e * (1 + k/SUB_BUCKETS)；
+    小于最低桶的值计入第一个桶，超出范围的值只计入 +Inf。
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str = "",
+        labels: Sequence[str] = (),
+        unit: str = "",
+        exp_range: Optional[Tuple[int, int]] = None,
+        sub_buckets: int = SUB_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels, unit)
+        if exp_range is None:
+            exp_range = SECONDS_EXP_RANGE if unit == "seconds" else SIZE_EXP_RANGE
+        self.min_exp, self.max_exp = int(exp_range[0]), int(exp_range[1])
+        self.sub_buckets = int(sub_buckets)
+        self.num_buckets = (self.max_exp - self.min_exp) * self.sub_buckets
+        # frexp 的尾数 m ∈ [0.5, 1)：子桶号 = int(m * 2 * sub_buckets) - sub_buckets
+        self._exp_offset = self.min_exp + 1
+        self._mant_scale = 2.0 * self.sub_buckets
+        self.upper_bounds = [
+            math.ldexp(1.0 + (i % self.sub_buckets + 1) / self.sub_buckets, self.min_exp + i // self.sub_buckets)
+            for i in range(self.num_buckets)
+        ]
+        self._le = [repr(b) for b in self.upper_bounds]
+
+    def bucket_index(self, value: float) -> int:
+        if value <= 0.0:
+            return 0
+        # 恰好落在桶上界的值归入该桶（OpenMetrics 的 le 语义）
+        m, e = _frexp(_nextafter(value, 0.0))
+        i = (e - self._exp_offset) * self.sub_buckets + int(m * self._mant_scale) - self.sub_buckets
+        if i < 0:
+            return 0
+        return i if i < self.num_buckets else self.num_buckets
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self)
+
+    def summary(self, quantiles: Sequence[float] = (0.5, 0.99)) -> Dict[LabelValues, Dict[str, Any]]:
+        """按标签值汇总 count、sum 及各分位数所在桶的上界（超出范围为 None），供 JSON 健康检查使用"""
+        out: Dict[LabelValues, Dict[str, Any]] = {}
+        for key, child in self._items():
+            counts, total = child.snapshot()
+            n = sum(counts)
+            qs: Dict[float, Optional[float]] = {}
+            for q in quantiles:
+                target = q * n
+                seen = 0
+                le: Optional[float] = None
+                for i, c in enumerate(counts):
+                    seen += c
+                    if c and seen >= target:
+                        le = self.upper_bounds[i] if i < self.num_buckets else None
+                        break
+                qs[q] = le
+            out[key] = {"count": n, "sum": total, "quantiles": qs}
+        return out
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for le, n in zip(self._le, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', le))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', '+Inf'))} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        return lines
+
+
+GaugeSample = Union[float, Iterable[Tuple[Sequence[str], float]]]
+
+
+class GaugeFunc(_MetricFamily):
+    """导出时调用回调取值的 gauge（如队列深度）
+
+    无标签时回调返回一个数值；有标签时返回 ``[(label_values, value), ...]``。
+    回调异常时本次导出跳过该指标。
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], GaugeSample], labels: Sequence[str] = (), unit: str = "") -> None:
+        super().__init__(name, help, labels, unit)
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            sample = self.fn()
+        except Exception:
+            return []
+        lines = self._header()
+        if not self.label_names:
+            if sample is None:
+                return []
+            lines.append(f"{self.name} {_format_value(float(sample))}")
+            return lines
+        for key, value in sample or ():
+            lines.append(f"{self.name}{_format_labels(self.label_names, [str(v) for v in key])} {_format_value(float(value))}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表；按名称去重，重复声明返回已有实例，便于在多个模块中声明同一指标"""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, kind: type, factory: Callable[[], _MetricFamily]) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            elif not isinstance(metric, kind):
+                raise ValueError(f"metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str = "", labels: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(name, Counter, lambda: Counter(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str = "",
+        labels: Sequence[str] = (),
+        unit: str = "",
+        exp_range: Optional[Tuple[int, int]] = None,
+    ) -> Histogram:
+        return self._get_or_create(name, Histogram, lambda: Histogram(name, help, labels, unit, exp_range))
+
+    def gauge_func(self, name: str, help: str, fn: Callable[[], GaugeSample], labels: Sequence[str] = ()) -> GaugeFunc:
+        """注册回调 gauge；同名再次注册时替换回调（如服务重启后绑定新实例）"""
+        gauge = self._get_or_create(name, GaugeFunc, lambda: GaugeFunc(name, help, fn, labels))
+        gauge.fn = fn
+        return gauge
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def merge_expositions(*texts: str) -> str:
+    """把多个进程各自渲染的 OpenMetrics 文本（均以 "# EOF" 结尾）合并为一份
+
+    同名指标族只保留样本行最多的一份：例如主进程也导入过 message plane 模块、
+    声明了同名但从未记录的空族时，以真正记录数据的进程为准。
+    """
+    families: Dict[str, List[str]] = {}
+    for text in texts:
+        current: Optional[List[str]] = None
+        parsed: List[Tuple[str, List[str]]] = []
+        for line in text.splitlines():
+            if not line or line == "# EOF":
+                continue
+            if line.startswith("# TYPE "):
+                current = [line]
+                parsed.append((line.split()[2], current))
+            elif current is not None:
+                current.append(line)
+        for name, lines in parsed:
+            prev = families.get(name)
+            if prev is None or _sample_count(lines) > _sample_count(prev):
+                families[name] = lines
+    out = [line for lines in families.values() for line in lines]
+    out.append("# EOF")
+    return "\n".join(out) + "\n"
+
+
+def _sample_count(lines: List[str]) -> int:
+    return sum(1 for line in lines if not line.startswith("#"))
+
+
+def timed(name: str, help: str = "", *, metrics: Optional[MetricsRegistry] = None) -> Callable[[Callable], Callable]:
+    """计时装饰器：把每次调用的耗时记入 ``name`` 直方图（秒），按 outcome=ok/error 区分。
+
+    同时支持普通函数和协程函数。
+    """
+    hist = (metrics or registry).histogram(name, help, labels=("outcome",), unit="seconds")
+    ok_child = hist.labels("ok")
+    error_child = hist.labels("error")
+
+    def decorator(fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                started = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException:
+                    error_child.observe(time.perf_counter() - started)
+                    raise
+                ok_child.observe(time.perf_counter() - started)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                error_child.observe(time.perf_counter() - started)
+                raise
+            ok_child.observe(time.perf_counter() - started)
+            return result
+
+        return wrapper
+
+    return decorator
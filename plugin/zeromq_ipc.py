@@ -5,9 +5,11 @@ import time
 import threading
 import queue
 import os
+import shutil
+import tempfile
 import uuid
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 from loguru import logger
 
@@ -79,7 +81,17 @@ class ZmqIpcClient:
             pass
         return sock
 
-    def request(self, request: Dict[str, Any], timeout: float) -> Optional[Dict[str, Any]]:
+    def request(
+        self,
+        request: Dict[str, Any],
+        timeout: float,
+        frames: Optional[Sequence[Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """发送请求并等待响应。
+
+        frames 为附加的二进制帧（bytes / memoryview），原样跟在请求帧之后零拷贝发送，
+        服务端在 request["_binary_frames"] 中拿到，不经过 msgpack/base64。
+        """
         if zmq is None:
             return None
         sock = self._get_sock()
@@ -89,7 +101,10 @@ class ZmqIpcClient:
         if not isinstance(req_id, str) or not req_id:
             return None
         try:
-            sock.send_multipart([req_id.encode("utf-8"), _dumps(request)], flags=0)
+            if frames:
+                sock.send_multipart([req_id.encode("utf-8"), _dumps(request), *frames], flags=0, copy=False)
+            else:
+                sock.send_multipart([req_id.encode("utf-8"), _dumps(request)], flags=0)
         except Exception as e:
             try:
                 logger.bind(component="zmq.client").warning(
@@ -217,6 +232,9 @@ class ZmqIpcServer:
                 except Exception:
                     pass
                 continue
+            if len(frames) > 3:
+                # 附加的二进制帧（见 ZmqIpcClient.request 的 frames 参数）
+                request["_binary_frames"] = frames[3:]
 
             self._recv_count += 1
             try:
@@ -513,3 +531,322 @@ class MessagePlaneIngestBatcher:
         except Exception:
             pass
 
+
+# ---------------------------------------------------------------------------
+# PluginHost <-> plugin process transport
+# ---------------------------------------------------------------------------
+
+# 通道名：主进程 -> 插件进程（每个通道一个 PUSH/PULL 连接，由各自的消费线程直接读取）
+PLUGIN_CHANNELS_TO_PROCESS = ("cmd", "response")
+# 通道名：插件进程 -> 主进程（复用一个 PUSH/PULL 连接，帧头为通道名）
+PLUGIN_CHANNELS_TO_HOST = ("res", "status", "message")
+
+_PACK_OPTIONS = ormsgpack.OPT_NON_STR_KEYS
+
+
+def _pack_default(obj: Any) -> Any:
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not msgpack serializable: {type(obj).__name__}")
+
+
+def _pack_item(obj: Any) -> bytes:
+    """msgpack 编码（与 ZmqIpcClient 同一编解码）；set 按 list 发送，其它无法表示的对象抛出 TypeError。
+
+    不使用 pickle：收到的字节一律只按 msgpack 解析，对端无法借此在本进程中执行代码。
+    """
+    return ormsgpack.packb(obj, default=_pack_default, option=_PACK_OPTIONS)
+
+
+def _unpack_item(body: bytes) -> Any:
+    return ormsgpack.unpackb(body, option=_PACK_OPTIONS)
+
+
+class _ChannelQueue:
+    """queue.Queue 兼容的单通道视图：put 经传输层发送，get 从本端对应的套接字读取。
+
+    让 PluginHost / 插件进程中原本面向 multiprocessing.Queue 的代码无需改动。
+    """
+
+    def __init__(self, send, name: str, recv=None) -> None:
+        self._send = send
+        self.name = name
+        self._recv = recv
+
+    def put(self, item: Any, block: bool = True, timeout: Optional[float] = None) -> None:
+        self._send(self.name, item)
+
+    def put_nowait(self, item: Any) -> None:
+        self._send(self.name, item)
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        if self._recv is None:
+            raise queue.Empty
+        return self._recv(self.name, block, timeout)
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+    def cancel_join_thread(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class PluginHostTransport:
+    """主进程侧：每个插件三条 ZeroMQ 连接承载 cmd/res/status/message/response 五个通道。
+
+    下行 cmd、response 各一个 PUSH；上行 res/status/message 共用一个 PULL，帧格式为
+    ``[channel, payload]``，payload 使用与 ZmqIpcClient 相同的 msgpack 编码。
+    接收走 zmq.asyncio（事件循环原生等待），不再为每个通道占用一个执行器线程阻塞在 Queue.get 上。
+
+    下行没有合并成一个 DEALER/PAIR 套接字：插件进程里 cmd 由命令循环、response 由响应读取线程
+    分别消费，而 zmq 套接字不是线程安全的。单套接字需要在插件进程中再加一个 I/O 线程按通道分发到
+    进程内队列，每条消息多一次线程切换；每个消费线程各自持有一个 PULL 则可以直接 poll + recv。
+
+    端点是 ``ipc://``，位于仅当前用户可访问（0700）的临时目录中，只有 fork/spawn 出的插件进程
+    拿得到路径；其它本地进程既不能向上行 PULL 注入数据，也不能连上下行 PUSH 分走命令。
+    平台不支持 ipc 传输时构造失败，PluginHost 回退到 multiprocessing.Queue。
+    """
+
+    def __init__(self, plugin_id: str) -> None:
+        if zmq is None:
+            raise RuntimeError("pyzmq is not available")
+        if not zmq.has("ipc"):
+            raise RuntimeError("libzmq was built without ipc:// transport support")
+        self.plugin_id = str(plugin_id)
+        self._ctx = zmq.asyncio.Context.instance()
+        self._out: Dict[str, Any] = {}
+        self.endpoints: Dict[str, str] = {}
+        # mkdtemp 创建的目录权限为 0700
+        self._ipc_dir = tempfile.mkdtemp(prefix="neko-plugin-")
+        self._in = None
+        try:
+            for name in PLUGIN_CHANNELS_TO_PROCESS:
+                sock = self._ctx.socket(zmq.PUSH)
+                sock.setsockopt(zmq.LINGER, 0)
+                self._out[name] = sock
+                endpoint = self._ipc_endpoint(name)
+                sock.bind(endpoint)
+                self.endpoints[name] = endpoint
+            self._in = self._ctx.socket(zmq.PULL)
+            self._in.setsockopt(zmq.LINGER, 0)
+            endpoint = self._ipc_endpoint("up")
+            self._in.bind(endpoint)
+            self.endpoints["up"] = endpoint
+        except Exception:
+            for sock in [*self._out.values(), self._in]:
+                if sock is not None:
+                    sock.close(0)
+            shutil.rmtree(self._ipc_dir, ignore_errors=True)
+            raise
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+        self.sent = 0
+        self.received = 0
+
+    def _ipc_endpoint(self, name: str) -> str:
+        return f"ipc://{os.path.join(self._ipc_dir, name)}"
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def channel(self, name: str) -> _ChannelQueue:
+        return _ChannelQueue(self.send_threadsafe, name)
+
+    def _socket_for(self, channel: str):
+        sock = self._out.get(channel)
+        if sock is None:
+            raise ValueError(f"unknown channel to plugin process: {channel!r}")
+        return sock
+
+    def _send_now(self, sock, body: bytes) -> None:
+        fut = sock.send(body, copy=False)
+        self.sent += 1
+        if not fut.done():
+            fut.add_done_callback(self._log_send_error)
+        else:
+            self._log_send_error(fut)
+
+    def _log_send_error(self, fut) -> None:
+        try:
+            exc = fut.exception()
+        except Exception:
+            return
+        if exc is not None and not self._closed:
+            logger.bind(component="zmq.transport").warning(
+                "[PluginHostTransport] send failed for plugin={}: {}", self.plugin_id, exc
+            )
+
+    async def send(self, channel: str, obj: Any) -> None:
+        if self._closed:
+            raise RuntimeError("transport closed")
+        await self._socket_for(channel).send(_pack_item(obj), copy=False)
+        self.sent += 1
+
+    def send_threadsafe(self, channel: str, obj: Any) -> None:
+        """可在任意线程调用；在事件循环线程中直接发送，其它线程经 call_soon_threadsafe 转交"""
+        if self._closed:
+            raise RuntimeError("transport closed")
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            raise RuntimeError("transport is not attached to a running event loop")
+        sock = self._socket_for(channel)
+        body = _pack_item(obj)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._send_now(sock, body)
+        else:
+            loop.call_soon_threadsafe(self._send_now, sock, body)
+
+    async def recv(self) -> Tuple[str, Any]:
+        frames = await self._in.recv_multipart()
+        self.received += 1
+        if len(frames) < 2:
+            return "", None
+        return frames[0].decode("ascii", errors="replace"), _unpack_item(frames[1])
+
+    def close(self) -> None:
+        self._closed = True
+        for sock in [*self._out.values(), self._in]:
+            try:
+                # 留一点时间把刚提交的 STOP 等命令发出去
+                sock.close(linger=200)
+            except Exception:
+                pass
+        shutil.rmtree(self._ipc_dir, ignore_errors=True)
+
+
+class PluginProcessTransport:
+    """插件进程侧：连接 PluginHostTransport.endpoints。
+
+    上行 PUSH 由发送线程在锁内直接写入；下行 cmd/response 各一个 PULL，由各自的消费线程
+    （命令循环 / 响应读取线程）在 get 中直接 poll + recv。没有额外的 I/O 线程，
+    也替代了原先每个 multiprocessing.Queue 各自的 feeder 线程。
+    zmq 套接字不是线程安全的，每个套接字的所有访问都在其锁内进行；close 通过 inproc 唤醒套接字
+    打断正阻塞在 get 上的消费线程，而不是等它的超时结束。
+    """
+
+    def __init__(self, endpoints: Dict[str, str]) -> None:
+        if zmq is None:
+            raise RuntimeError("pyzmq is not available")
+        # 子进程中使用独立 Context（不复用可能从父进程继承的实例）
+        self._ctx = zmq.Context()
+        self._up = self._ctx.socket(zmq.PUSH)
+        # 进程退出前给结果（包括崩溃报告）留出发送时间
+        self._up.setsockopt(zmq.LINGER, 1000)
+        self._up.connect(str(endpoints["up"]))
+        self._up_lock = threading.Lock()
+        wake_endpoint = f"inproc://plugin-transport-wake-{uuid.uuid4().hex}"
+        self._wake = self._ctx.socket(zmq.PUB)
+        self._wake.setsockopt(zmq.LINGER, 0)
+        self._wake.bind(wake_endpoint)
+        self._in: Dict[str, Any] = {}
+        self._in_wake: Dict[str, Any] = {}
+        self._in_locks: Dict[str, threading.Lock] = {}
+        for name in PLUGIN_CHANNELS_TO_PROCESS:
+            sock = self._ctx.socket(zmq.PULL)
+            sock.setsockopt(zmq.LINGER, 0)
+            sock.connect(str(endpoints[name]))
+            wake = self._ctx.socket(zmq.SUB)
+            wake.setsockopt(zmq.LINGER, 0)
+            wake.setsockopt(zmq.SUBSCRIBE, b"")
+            wake.connect(wake_endpoint)
+            self._in[name] = sock
+            self._in_wake[name] = wake
+            self._in_locks[name] = threading.Lock()
+        self._closed = False
+
+    def channel(self, name: str) -> _ChannelQueue:
+        return _ChannelQueue(self.send, name, self.recv if name in self._in else None)
+
+    def send(self, channel: str, obj: Any) -> None:
+        try:
+            body = _pack_item(obj)
+        except TypeError as e:
+            # 结果里带了无法编码的对象：改为回一个错误结果，避免调用方一直等到超时
+            if channel != "res" or not isinstance(obj, dict) or "req_id" not in obj:
+                raise
+            body = _pack_item({
+                "req_id": obj.get("req_id"),
+                "success": False,
+                "data": None,
+                "error": f"Result is not serializable: {e}",
+            })
+        with self._up_lock:
+            if self._closed:
+                raise RuntimeError("transport closed")
+            self._up.send_multipart([channel.encode("ascii"), body])
+
+    def recv(self, channel: str, block: bool = True, timeout: Optional[float] = None) -> Any:
+        """与 queue.Queue.get 语义一致：超时或非阻塞且无数据时抛出 queue.Empty"""
+        deadline = None if (not block or timeout is None) else time.monotonic() + max(0.0, timeout)
+        lock = self._in_locks[channel]
+        if not block:
+            acquired = lock.acquire(blocking=False)
+        elif deadline is None:
+            acquired = lock.acquire()
+        else:
+            acquired = lock.acquire(timeout=max(0.0, timeout))
+        if not acquired:
+            raise queue.Empty
+        try:
+            if self._closed:
+                raise queue.Empty
+            sock = self._in[channel]
+            if not block:
+                wait_ms = 0
+            elif deadline is None:
+                wait_ms = None
+            else:
+                wait_ms = max(0, int((deadline - time.monotonic()) * 1000))
+            poller = zmq.Poller()
+            poller.register(sock, zmq.POLLIN)
+            poller.register(self._in_wake[channel], zmq.POLLIN)
+            if sock not in dict(poller.poll(wait_ms)):
+                raise queue.Empty
+            body = sock.recv()
+        finally:
+            lock.release()
+        return _unpack_item(body)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        with self._up_lock:
+            self._closed = True
+            try:
+                self._up.close()
+            except Exception:
+                pass
+        try:
+            self._wake.send(b"")
+        except Exception:
+            pass
+        all_closed = True
+        for name, sock in self._in.items():
+            # 被唤醒的消费线程会立即释放锁；仍拿不到锁时不关闭该套接字（进程即将退出）
+            lock = self._in_locks[name]
+            if not lock.acquire(timeout=1.0):
+                all_closed = False
+                continue
+            try:
+                sock.close()
+                self._in_wake[name].close()
+            except Exception:
+                pass
+            finally:
+                lock.release()
+        try:
+            self._wake.close()
+        except Exception:
+            pass
+        if all_closed:
+            try:
+                self._ctx.term()
+            except Exception:
+                pass
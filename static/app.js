@@ -224,7 +224,6 @@ function init_app() {
     let interruptedSpeechId = null;      // 被打断的 speech_id
     let currentPlayingSpeechId = null;   // 当前正在播放的 speech_id
     let pendingDecoderReset = false;     // 是否需要在下一个新 speech_id 时重置解码器
-    let skipNextAudioBlob = false;       // 是否跳过下一个音频 blob（被打断的旧音频）
 
     // 麦克风静音检测相关变量
     let silenceDetectionTimer = null;
@@ -313,6 +312,8 @@ function init_app() {
         const wsUrl = `${protocol}://${window.location.host}/ws/${lanlan_config.lanlan_name}`;
         console.log('[WebSocket] 正在连接，猫娘名称:', lanlan_config.lanlan_name, 'URL:', wsUrl);
         socket = new WebSocket(wsUrl);
+        // 二进制语音帧以 ArrayBuffer 同步交付，帧头中的 speech_id 判定与 JSON 消息保持到达顺序
+        socket.binaryType = 'arraybuffer';
 
         socket.onopen = () => {
             console.log('WebSocket连接已建立');
@@ -332,10 +333,12 @@ function init_app() {
         };
 
         socket.onmessage = (event) => {
-            if (event.data instanceof Blob) {
-                // 处理二进制音频数据
-                console.log("收到新的音频块")
-                handleAudioBlob(event.data);
+            if (event.data instanceof ArrayBuffer) {
+                // 处理二进制语音帧（帧头包含 speech_id）
+                const frame = decodeSpeechFrame(event.data);
+                if (frame && acceptSpeechId(frame.speechId)) {
+                    handleAudioBuffer(frame.audio);
+                }
                 return;
             }
 
@@ -356,39 +359,9 @@ function init_app() {
                 } else if (response.type === 'user_activity') {
                     interruptedSpeechId = response.interrupted_speech_id || null;
                     pendingDecoderReset = true;  // 标记需要在新 speech_id 到来时重置
-                    skipNextAudioBlob = false;   // 重置跳过标志
                     
                     // 只清空播放队列，不重置解码器（避免丢失新音频的头信息）
                     clearAudioQueueWithoutDecoderReset();
-                } else if (response.type === 'audio_chunk') {
-                    // 精确打断控制：根据 speech_id 决定是否接收此音频
-                    const speechId = response.speech_id;
-                    
-                    // 检查是否是被打断的旧音频，如果是则丢弃
-                    if (speechId && interruptedSpeechId && speechId === interruptedSpeechId) {
-                        console.log('丢弃被打断的旧音频:', speechId);
-                        skipNextAudioBlob = true;  // 标记跳过后续的二进制数据
-                        return;
-                    }
-                    
-                    // 检查是否是新的 speech_id（新轮对话开始）
-                    if (speechId && speechId !== currentPlayingSpeechId) {
-                        // 新轮对话开始，在此时重置解码器（确保有新的头信息）
-                        if (pendingDecoderReset) {
-                            console.log('新轮对话开始，重置解码器:', speechId);
-                            // 使用立即执行的异步函数等待重置完成，避免竞态条件
-                            (async () => {
-                                await resetOggOpusDecoder();
-                                pendingDecoderReset = false;
-                            })();
-                        } else {
-                            pendingDecoderReset = false;
-                        }
-                        currentPlayingSpeechId = speechId;
-                        interruptedSpeechId = null;  // 清除旧的打断记录
-                    }
-                    
-                    skipNextAudioBlob = false;  // 允许接收后续的二进制数据
                 } else if (response.type === 'cozy_audio') {
                     // 处理音频响应
                     console.log("收到新的音频头")
@@ -2749,6 +2722,23 @@ function init_app() {
         }
     }
 
+    // 二进制音频帧（与 main_routers/websocket_router.py 中 _AUDIO_FRAME_HEADER 保持一致），小端：
+    // u8 version | u8 input_type(1=audio) | u16 reserved | u32 sample_rate | u32 seq | PCM16 samples...
+    const AUDIO_FRAME_HEADER_SIZE = 12;
+    let audioFrameSeq = 0;
+
+    function encodeAudioFrame(pcm16, sampleRate, seq) {
+        const buffer = new ArrayBuffer(AUDIO_FRAME_HEADER_SIZE + pcm16.byteLength);
+        const view = new DataView(buffer);
+        view.setUint8(0, 1);
+        view.setUint8(1, 1);
+        view.setUint16(2, 0, true);
+        view.setUint32(4, sampleRate, true);
+        view.setUint32(8, seq, true);
+        new Int16Array(buffer, AUDIO_FRAME_HEADER_SIZE).set(pcm16);
+        return buffer;
+    }
+
     // 使用AudioWorklet开始音频处理
     async function startAudioWorklet(stream) {
         // 先清理旧的音频上下文，防止多个 worklet 同时发送数据导致 QPS 超限
@@ -2811,6 +2801,8 @@ function init_app() {
                 }
             });
 
+            audioFrameSeq = 0;
+
             // 监听处理器发送的消息
             workletNode.port.onmessage = (event) => {
                 const audioData = event.data;
@@ -2822,11 +2814,9 @@ function init_app() {
                 }
 
                 if (isRecording && socket.readyState === WebSocket.OPEN) {
-                    socket.send(JSON.stringify({
-                        action: 'stream_data',
-                        data: Array.from(audioData),
-                        input_type: 'audio'
-                    }));
+                    // 二进制帧：省去 JSON 整数数组的编码/解析
+                    socket.send(encodeAudioFrame(audioData, targetSampleRate, audioFrameSeq));
+                    audioFrameSeq = (audioFrameSeq + 1) >>> 0;
                 }
             };
 
@@ -3020,14 +3010,59 @@ function init_app() {
     }
 
 
-    async function handleAudioBlob(blob) {
-        // 精确打断控制：检查是否应跳过此音频（属于被打断的旧音频）
-        if (skipNextAudioBlob) {
-            console.log('跳过被打断的音频 blob');
-            return;
+    // 下行语音帧（与 main_logic/core.py 中 _SPEECH_FRAME_HEADER 保持一致），小端：
+    // u8 version | u8 flags | u16 speech_id 字节长度 | speech_id(utf-8) | 音频数据
+    const SPEECH_FRAME_HEADER_SIZE = 4;
+    const speechIdDecoder = new TextDecoder();
+
+    function decodeSpeechFrame(buffer) {
+        if (buffer.byteLength < SPEECH_FRAME_HEADER_SIZE) {
+            return null;
+        }
+        const view = new DataView(buffer);
+        if (view.getUint8(0) !== 1) {
+            console.warn('未知的语音帧版本:', view.getUint8(0));
+            return null;
+        }
+        const idLength = view.getUint16(2, true);
+        const audioOffset = SPEECH_FRAME_HEADER_SIZE + idLength;
+        if (buffer.byteLength < audioOffset) {
+            return null;
+        }
+        return {
+            speechId: speechIdDecoder.decode(new Uint8Array(buffer, SPEECH_FRAME_HEADER_SIZE, idLength)),
+            audio: buffer.slice(audioOffset)
+        };
+    }
+
+    // 精确打断控制：根据 speech_id 决定是否接收此音频，返回 false 表示丢弃
+    function acceptSpeechId(speechId) {
+        // 检查是否是被打断的旧音频，如果是则丢弃
+        if (speechId && interruptedSpeechId && speechId === interruptedSpeechId) {
+            console.log('丢弃被打断的旧音频:', speechId);
+            return false;
+        }
+
+        // 检查是否是新的 speech_id（新轮对话开始）
+        if (speechId && speechId !== currentPlayingSpeechId) {
+            // 新轮对话开始，在此时重置解码器（确保有新的头信息）
+            if (pendingDecoderReset) {
+                console.log('新轮对话开始，重置解码器:', speechId);
+                // 使用立即执行的异步函数等待重置完成，避免竞态条件
+                (async () => {
+                    await resetOggOpusDecoder();
+                    pendingDecoderReset = false;
+                })();
+            } else {
+                pendingDecoderReset = false;
+            }
+            currentPlayingSpeechId = speechId;
+            interruptedSpeechId = null;  // 清除旧的打断记录
         }
+        return true;
+    }
 
-        const arrayBuffer = await blob.arrayBuffer();
+    async function handleAudioBuffer(arrayBuffer) {
         if (!arrayBuffer || arrayBuffer.byteLength === 0) {
             console.warn('收到空的音频数据，跳过处理');
             return;
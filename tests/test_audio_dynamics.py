@@ -0,0 +1,104 @@
+# -- coding: utf-8 --
+"""
+AudioProcessor AGC / Limiter golden 测试
+
+_BaselineProcessor 中的 _apply_agc / _apply_limiter 为优化前实现的逐字拷贝，
+作为 golden 参考：当前实现对同一输入逐 chunk 处理后的 int16 输出必须逐位一致。
+"""
+
+import numpy as np
+import pytest
+
+from utils.audio_benchmark import synthetic_wav
+from utils.audio_processor import AudioProcessor
+
+
+class _BaselineProcessor(AudioProcessor):
+    """优化前的 AGC / Limiter 实现（勿修改，golden 参考）"""
+
+    def _apply_agc(self, audio: np.ndarray) -> np.ndarray:
+        audio_float = audio.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(audio_float ** 2) + 1e-10)
+        if rms > self.AGC_NOISE_FLOOR:
+            desired_gain = self.AGC_TARGET_LEVEL / rms
+            desired_gain = np.clip(desired_gain, self.AGC_MIN_GAIN, self.AGC_MAX_GAIN)
+        else:
+            desired_gain = min(self._agc_gain, 1.0)
+        if desired_gain < self._agc_gain:
+            self._agc_gain = (self._agc_attack_coeff * self._agc_gain +
+                             (1 - self._agc_attack_coeff) * desired_gain)
+        else:
+            self._agc_gain = (self._agc_release_coeff * self._agc_gain +
+                             (1 - self._agc_release_coeff) * desired_gain)
+        audio_float = audio_float * self._agc_gain
+        return (audio_float * 32768.0).clip(-32768, 32767).astype(np.int16)
+
+    def _apply_limiter(self, audio: np.ndarray) -> np.ndarray:
+        audio_float = audio.astype(np.float32) / 32768.0
+        threshold = self.LIMITER_THRESHOLD
+        knee = self.LIMITER_KNEE
+        knee_start = threshold - knee / 2
+        knee_end = threshold + knee / 2
+        abs_audio = np.abs(audio_float)
+        output = np.copy(audio_float)
+        in_knee = (abs_audio > knee_start) & (abs_audio <= knee_end)
+        if np.any(in_knee):
+            knee_ratio = (abs_audio[in_knee] - knee_start) / knee
+            compression = 1 - 0.5 * knee_ratio ** 2
+            output[in_knee] = np.sign(audio_float[in_knee]) * (
+                knee_start + (abs_audio[in_knee] - knee_start) * compression
+            )
+        above_knee = abs_audio > knee_end
+        if np.any(above_knee):
+            excess = abs_audio[above_knee] - threshold
+            limited = threshold + 0.5 * np.tanh(excess * 2) * (1 - threshold)
+            output[above_knee] = np.sign(audio_float[above_knee]) * limited
+        output = np.clip(output, -1.0, 1.0)
+        return (output * 32768.0).clip(-32768, 32767).astype(np.int16)
+
+
+def _run_dynamics(processor, audio, chunk_samples):
+    out = []
+    for i in range(0, len(audio), chunk_samples):
+        chunk = audio[i:i + chunk_samples]
+        out.append(processor._apply_limiter(processor._apply_agc(chunk)))
+    return np.concatenate(out)
+
+
+def _new(cls):
+    return cls(agc_enabled=True, limiter_enabled=True, noise_reduce_enabled=False)
+
+
+# 正常音量 / 小音量（AGC 提升增益）/ 过载（Limiter 大量介入）
+@pytest.mark.parametrize("gain", [1.0, 0.05, 4.0])
+@pytest.mark.parametrize("chunk_samples", [160, 480, 1000])
+def test_agc_limiter_matches_baseline(gain, chunk_samples):
+    audio = synthetic_wav(3.0, gain, seed=1)
+    expected = _run_dynamics(_new(_BaselineProcessor), audio, chunk_samples)
+    actual = _run_dynamics(_new(AudioProcessor), audio, chunk_samples)
+    assert actual.dtype == np.int16
+    assert np.array_equal(actual, expected)
+
+
+def test_agc_gain_state_matches_baseline():
+    audio = synthetic_wav(2.0, 0.05, seed=2)
+    baseline, current = _new(_BaselineProcessor), _new(AudioProcessor)
+    for i in range(0, len(audio), 480):
+        baseline._apply_agc(audio[i:i + 480])
+        current._apply_agc(audio[i:i + 480])
+        assert current._agc_gain == baseline._agc_gain
+
+
+def test_limiter_full_scale_extremes_match_baseline():
+    audio = np.array([-32768, -32767, -30000, -1, 0, 1, 30000, 32767], dtype=np.int16)
+    expected = _new(_BaselineProcessor)._apply_limiter(audio)
+    assert np.array_equal(_new(AudioProcessor)._apply_limiter(audio), expected)
+
+
+def test_limiter_below_knee_is_identity():
+    knee_start = AudioProcessor.LIMITER_THRESHOLD - AudioProcessor.LIMITER_KNEE / 2
+    peak = int(knee_start * 32768.0) - 1
+    audio = np.linspace(-peak, peak, 4801).astype(np.int16)
+    processor = _new(AudioProcessor)
+    assert np.array_equal(processor._apply_limiter(audio), audio)
+    assert np.array_equal(_new(_BaselineProcessor)._apply_limiter(audio), audio)
@@ -0,0 +1,195 @@
+# -- coding: utf-8 --
+"""
+AudioProcessor 微基准
+
+用法：
+    python -m utils.audio_benchmark [--seconds 10]   吞吐量 / 内存分配基准
+
+对比旧实现（每个 chunk 调用无状态 soxr.resample、np.concatenate 拼接 RNNoise 帧缓冲、
+逐 chunk 的 AGC/Limiter）与当前 AudioProcessor 的吞吐量和每个 chunk 的临时内存分配。
+输入为 48kHz、10ms（480 samples）的合成语音样 PCM16 chunk。
+新旧两侧都使用直通降噪器（不论是否安装 pyrnnoise），只衡量分帧、重采样与 AGC/Limiter 本身的开销。
+
+合成语音 / WAV 生成函数也被 tests/test_audio_dynamics.py 的 golden 测试复用。
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+import wave
+
+import numpy as np
+import soxr
+
+from utils.audio_processor import AudioProcessor
+
+CHUNK_SAMPLES = 480
+SAMPLE_RATE = 48000
+
+
+class _PassthroughDenoiser:
+    """与 pyrnnoise.RNNoise.denoise_chunk 接口一致的直通降噪器"""
+
+    def denoise_chunk(self, frame_2d):
+        yield np.array([0.9], dtype=np.float32), frame_2d
+
+    def reset(self):
+        pass
+
+
+def synthetic_speech(seconds, sample_rate=SAMPLE_RATE, seed=0):
+    """合成类语音信号：带音节包络的谐波 + 底噪，int16"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    f0 = 140.0 + 30.0 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * 2.5 * t), 0.0, None) ** 2
+    signal = 0.3 * voice * envelope + 0.01 * rng.standard_normal(len(t))
+    return (np.clip(signal, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def synthetic_wav(seconds, gain, seed=0):
+    """生成合成 WAV（bytes），再按 WAV 读回 int16，保证 golden 输入走与真实文件相同的路径"""
+    audio = (np.clip(synthetic_speech(seconds, seed=seed).astype(np.float64) * gain, -32768, 32767)).astype(np.int16)
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(audio.tobytes())
+    with wave.open(io.BytesIO(buf.getvalue()), 'rb') as wf:
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+
+def _chunks(audio, chunk_samples=CHUNK_SAMPLES):
+    return [audio[i:i + chunk_samples].tobytes() for i in range(0, len(audio) - chunk_samples + 1, chunk_samples)]
+
+
+class _LegacyPipeline:
+    """旧版 process_chunk 的分帧与重采样路径（不含 AGC/Limiter）"""
+
+    def __init__(self):
+        self._frame_buffer = np.array([], dtype=np.int16)
+        self._denoiser = _PassthroughDenoiser()
+
+    def process_chunk(self, audio_bytes):
+        audio = np.frombuffer(audio_bytes, dtype=np.int16)
+        self._frame_buffer = np.concatenate([self._frame_buffer, audio])
+        output_frames = []
+        while len(self._frame_buffer) >= CHUNK_SAMPLES:
+            frame = self._frame_buffer[:CHUNK_SAMPLES]
+            self._frame_buffer = self._frame_buffer[CHUNK_SAMPLES:]
+            for _, denoised in self._denoiser.denoise_chunk(frame.reshape(1, -1)):
+                output_frames.append(denoised.flatten())
+        if not output_frames:
+            return b''
+        audio = np.concatenate(output_frames)
+        audio_float = audio.astype(np.float32) / 32768.0
+        audio_float = soxr.resample(audio_float, SAMPLE_RATE, 16000, quality='HQ')
+        return (audio_float * 32768.0).clip(-32768, 32767).astype(np.int16).tobytes()
+
+
+class _LegacyDynamics:
+    """旧版逐 chunk 的 _apply_agc / _apply_limiter，作为基准对照"""
+
+    def __init__(self):
+        p = AudioProcessor
+        self._agc_gain = 1.0
+        self._attack = np.exp(-1.0 / (p.AGC_ATTACK_TIME * p.RNNOISE_SAMPLE_RATE))
+        self._release = np.exp(-1.0 / (p.AGC_RELEASE_TIME * p.RNNOISE_SAMPLE_RATE))
+
+    def agc(self, audio):
+        p = AudioProcessor
+        audio_float = audio.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(audio_float ** 2) + 1e-10)
+        if rms > p.AGC_NOISE_FLOOR:
+            desired_gain = np.clip(p.AGC_TARGET_LEVEL / rms, p.AGC_MIN_GAIN, p.AGC_MAX_GAIN)
+        else:
+            desired_gain = min(self._agc_gain, 1.0)
+        coeff = self._attack if desired_gain < self._agc_gain else self._release
+        self._agc_gain = coeff * self._agc_gain + (1 - coeff) * desired_gain
+        return (audio_float * self._agc_gain * 32768.0).clip(-32768, 32767).astype(np.int16)
+
+    def limiter(self, audio):
+        p = AudioProcessor
+        audio_float = audio.astype(np.float32) / 32768.0
+        knee_start = p.LIMITER_THRESHOLD - p.LIMITER_KNEE / 2
+        knee_end = p.LIMITER_THRESHOLD + p.LIMITER_KNEE / 2
+        abs_audio = np.abs(audio_float)
+        output = np.copy(audio_float)
+        in_knee = (abs_audio > knee_start) & (abs_audio <= knee_end)
+        if np.any(in_knee):
+            knee_ratio = (abs_audio[in_knee] - knee_start) / p.LIMITER_KNEE
+            output[in_knee] = np.sign(audio_float[in_knee]) * (
+                knee_start + (abs_audio[in_knee] - knee_start) * (1 - 0.5 * knee_ratio ** 2))
+        above_knee = abs_audio > knee_end
+        if np.any(above_knee):
+            excess = abs_audio[above_knee] - p.LIMITER_THRESHOLD
+            output[above_knee] = np.sign(audio_float[above_knee]) * (
+                p.LIMITER_THRESHOLD + 0.5 * np.tanh(excess * 2) * (1 - p.LIMITER_THRESHOLD))
+        return (np.clip(output, -1.0, 1.0) * 32768.0).clip(-32768, 32767).astype(np.int16)
+
+    def process_chunk(self, audio_bytes):
+        return self.limiter(self.agc(np.frombuffer(audio_bytes, dtype=np.int16))).tobytes()
+
+
+def _new_processor(agc=False, limiter=False):
+    processor = AudioProcessor(agc_enabled=agc, limiter_enabled=limiter, noise_reduce_enabled=True)
+    # 与 _LegacyPipeline 一致始终使用直通降噪器，即使装了 pyrnnoise 也只比较分帧/重采样/AGC 本身
+    processor._denoiser = _PassthroughDenoiser()
+    return processor
+
+
+def _measure(process, chunks):
+    for chunk in chunks[:50]:
+        process(chunk)
+    start = time.perf_counter()
+    for chunk in chunks:
+        process(chunk)
+    elapsed = time.perf_counter() - start
+
+    sample = chunks[:500]
+    tracemalloc.start()
+    peaks = 0
+    for chunk in sample:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        process(chunk)
+        peaks += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return len(chunks) / elapsed, peaks / len(sample) / 1024.0
+
+
+def _dynamics(processor):
+    def process_chunk(audio_bytes):
+        audio = np.frombuffer(audio_bytes, dtype=np.int16)
+        return processor._apply_limiter(processor._apply_agc(audio)).tobytes()
+    return process_chunk
+
+
+def run(seconds=10.0):
+    chunks = _chunks(synthetic_speech(seconds))
+    hot_chunks = _chunks(synthetic_wav(seconds, gain=4.0))
+    results = [
+        ("legacy resample+framing", _LegacyPipeline().process_chunk, chunks),
+        ("stream resample+framing", _new_processor().process_chunk, chunks),
+        ("legacy agc+limiter", _LegacyDynamics().process_chunk, chunks),
+        ("agc+limiter", _dynamics(_new_processor()), chunks),
+        ("legacy agc+limiter (hot)", _LegacyDynamics().process_chunk, hot_chunks),
+        ("agc+limiter (hot)", _dynamics(_new_processor()), hot_chunks),
+        ("full chain", _new_processor(agc=True, limiter=True).process_chunk, chunks),
+    ]
+    print(f"{len(chunks)} chunks of {CHUNK_SAMPLES} samples @ {SAMPLE_RATE} Hz")
+    print(f"{'pipeline':<28}{'chunks/s':>12}{'realtime x':>12}{'alloc KiB/chunk':>18}")
+    for name, process, data in results:
+        rate, alloc_kib = _measure(process, data)
+        print(f"{name:<28}{rate:>12.0f}{rate / 100.0:>12.1f}{alloc_kib:>18.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0, help="合成音频时长（秒）")
+    args = parser.parse_args()
+    run(args.seconds)
@@ -71,8 +71,8 @@ class AudioProcessor:
     
     Thread Safety:
         This class is NOT safe for concurrent use. The following mutable
-        state is unprotected: _frame_buffer, _last_speech_prob,
-        _last_speech_time, _needs_reset, _denoiser.
+        state is unprotected: _frame_buffer, _frame_fill, _resampler,
+        _last_speech_prob, _last_speech_time, _needs_reset, _denoiser.
         
         Callers must NOT invoke process_chunk() or reset() from multiple
         threads or coroutines simultaneously. If concurrent access is
@@ -87,6 +87,9 @@ class AudioProcessor:
     # Reset denoiser if no speech detected for this many seconds
     RESET_TIMEOUT_SECONDS = 4.0
     
+    # Max audio held in the RNNoise framing buffer (older samples are dropped)
+    MAX_BUFFER_SECONDS = 1.0
+    
     # AGC Configuration
     AGC_TARGET_LEVEL = 0.25        # Target RMS level (0.0-1.0), raised for easier VAD trigger
     AGC_MAX_GAIN = 20.0            # Maximum gain multiplier (safe with noise floor protection)
@@ -120,8 +123,18 @@ class AudioProcessor:
         self._denoiser = None
         self._init_denoiser()
         
-        # Buffer for incomplete frames (int16 for pyrnnoise)
-        self._frame_buffer = np.array([], dtype=np.int16)
+        # Preallocated RNNoise framing buffer (int16 for pyrnnoise);
+        # _frame_fill samples are valid, the tail (< one frame) is moved to the front after each call
+        self._max_buffer_samples = int(self.MAX_BUFFER_SECONDS * self.RNNOISE_SAMPLE_RATE)
+        self._frame_buffer = np.zeros(self._max_buffer_samples, dtype=np.int16)
+        self._frame_fill = 0
+        
+        # Streaming resampler keeps filter state across chunks (no per-chunk setup or edge artefacts)
+        self._resampler = None
+        if self.input_sample_rate != self.output_sample_rate:
+            self._resampler = soxr.ResampleStream(
+                self.input_sample_rate, self.output_sample_rate, 1, dtype='float32', quality='HQ'
+            )
         
         # Track voice activity for auto-reset
         self._last_speech_prob = 0.0
@@ -219,17 +232,15 @@ class AudioProcessor:
         if self.limiter_enabled and len(audio_int16) > 0:
             audio_int16 = self._apply_limiter(audio_int16)
         
-        # Downsample from 48kHz to 16kHz using high-quality soxr
-        if self.input_sample_rate != self.output_sample_rate and len(audio_int16) > 0:
+        # Downsample from 48kHz to 16kHz using the streaming soxr resampler
+        if self._resampler is not None and len(audio_int16) > 0:
             # Convert to float for soxr, resample, then back to int16
-            audio_float = audio_int16.astype(np.float32) / 32768.0
-            audio_float = soxr.resample(
-                audio_float, 
-                self.input_sample_rate, 
-                self.output_sample_rate, 
-                quality='HQ'
-            )
-            audio_int16 = (audio_float * 32768.0).clip(-32768, 32767).astype(np.int16)
+            audio_float = audio_int16.astype(np.float32)
+            audio_float *= 1.0 / 32768.0
+            audio_float = self._resampler.resample_chunk(audio_float)
+            audio_float *= 32768.0
+            np.clip(audio_float, -32768, 32767, out=audio_float)
+            audio_int16 = audio_float.astype(np.int16)
         return audio_int16.tobytes()
     
     def _process_with_rnnoise(self, audio: np.ndarray) -> np.ndarray:
@@ -241,26 +252,40 @@ class AudioProcessor:
         Returns:
             Denoised int16 numpy array
         """
-        # Add to frame buffer (int16)
-        self._frame_buffer = np.concatenate([self._frame_buffer, audio])
-        
-        # Limit buffer size to prevent memory issues (max 1 seconds of audio)
-        max_buffer_samples = 1 * self.RNNOISE_SAMPLE_RATE
-        if len(self._frame_buffer) > max_buffer_samples:
-            self._frame_buffer = self._frame_buffer[-max_buffer_samples:]
-        
-        # Process complete frames
-        output_frames = []
-        while len(self._frame_buffer) >= self.RNNOISE_FRAME_SIZE:
-            frame = self._frame_buffer[:self.RNNOISE_FRAME_SIZE]
-            self._frame_buffer = self._frame_buffer[self.RNNOISE_FRAME_SIZE:]
-            
-            # RNNoise expects [channels, samples] format with int16
-            frame_2d = frame.reshape(1, -1)
+        frame_size = self.RNNOISE_FRAME_SIZE
+        buf = self._frame_buffer
+        capacity = len(buf)
+        fill = self._frame_fill
+        n = len(audio)
+        
+        # Append to the framing buffer, keeping at most MAX_BUFFER_SECONDS of audio
+        if n >= capacity:
+            buf[:] = audio[-capacity:]
+            fill = capacity
+        else:
+            if fill + n > capacity:
+                drop = fill + n - capacity
+                buf[:fill - drop] = buf[drop:fill]
+                fill -= drop
+            buf[fill:fill + n] = audio
+            fill += n
+        
+        num_frames = fill // frame_size
+        if num_frames == 0:
+            self._frame_fill = fill
+            return np.empty(0, dtype=np.int16)
+        
+        # Process complete frames in place, writing into a single output array
+        output = np.empty(num_frames * frame_size, dtype=np.int16)
+        written = 0
+        for i in range(num_frames):
+            start = i * frame_size
+            frame = buf[start:start + frame_size]
             
             try:
+                # RNNoise expects [channels, samples] format with int16
                 # Process frame - pyrnnoise takes int16 and returns int16
-                for speech_prob, denoised_frame in self._denoiser.denoise_chunk(frame_2d):
+                for speech_prob, denoised_frame in self._denoiser.denoise_chunk(frame.reshape(1, -1)):
                     prob = float(speech_prob[0])
                     self._last_speech_prob = prob
                     
@@ -268,18 +293,27 @@ class AudioProcessor:
                     if prob > 0.2:
                         self._last_speech_time = time.time()
                     
-                    output_frames.append(denoised_frame.flatten())
+                    denoised = denoised_frame.reshape(-1)
+                    if written + len(denoised) > len(output):
+                        output = np.concatenate([output[:written], np.empty(len(denoised), dtype=np.int16)])
+                    output[written:written + len(denoised)] = denoised
+                    written += len(denoised)
             except Exception as e:
                 logger.error(f"❌ RNNoise processing error: {e}")
-                output_frames.append(frame)
-        
-        if output_frames:
-            return np.concatenate(output_frames)
-        return np.array([], dtype=np.int16)
+                output[written:written + frame_size] = frame
+                written += frame_size
+        
+        # Move the incomplete tail frame to the front of the buffer
+        consumed = num_frames * frame_size
+        tail = fill - consumed
+        if tail:
+            buf[:tail] = buf[consumed:fill]
+        self._frame_fill = tail
+        return output[:written]
     
     def _reset_internal_state(self) -> None:
         """Reset RNNoise internal state without full reinitialization."""
-        self._frame_buffer = np.array([], dtype=np.int16)
+        self._frame_fill = 0
         self._last_speech_prob = 0.0
         # Reset AGC gain state
         self._agc_gain = 1.0
@@ -373,7 +407,10 @@ class AudioProcessor:
         """
         Apply Automatic Gain Control to normalize audio levels.
         
-        Uses a simple peak-following AGC with attack/release dynamics.
+        Uses a simple peak-following AGC with attack/release dynamics: one gain
+        update per chunk, applied as a step. Float32 operations are done in place
+        but in the same order as the original per-chunk code, so the int16 output
+        is bit-identical to it.
         
         Args:
             audio: int16 numpy array
@@ -382,7 +419,8 @@ class AudioProcessor:
             Gain-adjusted int16 numpy array
         """
         # Convert to float for processing
-        audio_float = audio.astype(np.float32) / 32768.0
+        audio_float = audio.astype(np.float32)
+        audio_float /= 32768.0
         
         # Calculate RMS of the current chunk
         rms = np.sqrt(np.mean(audio_float ** 2) + 1e-10)
@@ -407,17 +445,21 @@ class AudioProcessor:
             self._agc_gain = (self._agc_release_coeff * self._agc_gain + 
                              (1 - self._agc_release_coeff) * desired_gain)
         
-        # Apply gain
-        audio_float = audio_float * self._agc_gain
-        
-        # Convert back to int16 (clipping will be handled by limiter)
-        return (audio_float * 32768.0).clip(-32768, 32767).astype(np.int16)
+        # Apply gain and convert back to int16 (clipping will be handled by limiter)
+        audio_float *= self._agc_gain
+        audio_float *= 32768.0
+        np.clip(audio_float, -32768, 32767, out=audio_float)
+        return audio_float.astype(np.int16)
     
     def _apply_limiter(self, audio: np.ndarray) -> np.ndarray:
         """
         Apply a soft limiter to prevent clipping.
         
-        Uses a soft-knee limiter to gently compress peaks above threshold.
+        Uses a soft-knee limiter to gently compress peaks above threshold. The
+        transfer curve is evaluated only on samples above the knee start, and a
+        chunk whose peak stays below it is returned as is (the original code
+        returned the same values there), so the int16 output is bit-identical
+        to the per-sample implementation.
         
         Args:
             audio: int16 numpy array
@@ -425,10 +467,6 @@ class AudioProcessor:
         Returns:
             Limited int16 numpy array
         """
-        # Convert to float (-1.0 to 1.0 range)
-        audio_float = audio.astype(np.float32) / 32768.0
-        
-        # Apply soft-knee limiting
         threshold = self.LIMITER_THRESHOLD
         knee = self.LIMITER_KNEE
         
@@ -436,36 +474,38 @@ class AudioProcessor:
         knee_start = threshold - knee / 2
         knee_end = threshold + knee / 2
         
-        # Get absolute values for comparison
-        abs_audio = np.abs(audio_float)
+        # Fast path: no sample reaches the knee (compared in float32, as the array comparison below)
+        peak = max(int(audio.max()), -int(audio.min()))
+        if peak / 32768.0 <= float(np.float32(knee_start)):
+            return audio
         
-        # Apply soft knee compression
-        # Below knee_start: pass through
-        # In knee region: gentle compression
-        # Above knee_end: hard limiting
+        # Convert to float (-1.0 to 1.0 range)
+        audio_float = audio.astype(np.float32)
+        audio_float /= 32768.0
+        abs_audio = np.abs(audio_float)
         
-        output = np.copy(audio_float)
+        # Only samples above knee_start are changed
+        hot = np.flatnonzero(abs_audio > knee_start)
+        level = abs_audio[hot]
+        sign = np.sign(audio_float[hot])
         
-        # Knee region (soft transition)
-        in_knee = (abs_audio > knee_start) & (abs_audio <= knee_end)
+        # Knee region (soft transition): quadratic compression
+        in_knee = level <= knee_end
         if np.any(in_knee):
-            # Quadratic compression in knee region
-            knee_ratio = (abs_audio[in_knee] - knee_start) / knee
+            knee_level = level[in_knee]
+            knee_ratio = (knee_level - knee_start) / knee
             compression = 1 - 0.5 * knee_ratio ** 2
-            output[in_knee] = np.sign(audio_float[in_knee]) * (
-                knee_start + (abs_audio[in_knee] - knee_start) * compression
-            )
+            audio_float[hot[in_knee]] = sign[in_knee] * (knee_start + (knee_level - knee_start) * compression)
         
-        # Above knee (hard limiting with soft saturation)
-        above_knee = abs_audio > knee_end
+        # Above knee (hard limiting with soft saturation using tanh)
+        above_knee = ~in_knee
         if np.any(above_knee):
-            # Soft saturation using tanh
-            excess = abs_audio[above_knee] - threshold
+            excess = level[above_knee] - threshold
             limited = threshold + 0.5 * np.tanh(excess * 2) * (1 - threshold)
-            output[above_knee] = np.sign(audio_float[above_knee]) * limited
-        
-        # Final clip to ensure no samples exceed 1.0
-        output = np.clip(output, -1.0, 1.0)
+            audio_float[hot[above_knee]] = sign[above_knee] * limited
         
-        # Convert back to int16
-        return (output * 32768.0).clip(-32768, 32767).astype(np.int16)
+        # Final clip to ensure no samples exceed 1.0, then convert back to int16
+        np.clip(audio_float, -1.0, 1.0, out=audio_float)
+        audio_float *= 32768.0
+        np.clip(audio_float, -32768, 32767, out=audio_float)
+        return audio_float.astype(np.int16)
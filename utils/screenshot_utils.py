@@ -1,12 +1,17 @@
 """
 截图分析工具库
-提供截图分析功能，包括前端浏览器发送的截图和屏幕分享数据流处理
+提供截图分析功能，包括前端浏览器发送的截图和屏幕分享数据流处理，
+以及屏幕分享帧的变化检测（降采样灰度签名）、自适应发送频率控制和视觉描述缓存
 """
 import base64
 import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Optional
 import asyncio
 from io import BytesIO
+import numpy as np
 from PIL import Image
 from openai import AsyncOpenAI
 from config import get_extra_body
@@ -17,6 +22,174 @@ logger = logging.getLogger(__name__)
 MAX_IMAGE_SIZE_BYTES = 10 * 1024 * 1024
 MAX_BASE64_SIZE = MAX_IMAGE_SIZE_BYTES * 4 // 3 + 100
 
+# 帧变化检测：画面按块平均缩放为 FRAME_GRID 的灰度签名，逐块比较均值
+# 720p 下每块约 40x40 像素：新增一行文字会让十几个块变化，JPEG 重新编码噪声和光标闪烁不会
+FRAME_GRID = (32, 18)
+# 块均值变化超过该灰度级才算该块变化
+FRAME_CELL_DIFF = 10
+# 变化块数不超过该值视为同一画面（鼠标指针移动最多影响两三个块）
+FRAME_CHANGE_THRESHOLD = 2
+# 变化块数达到该值视为画面大幅变化（切换窗口/场景），约占 1/4
+FRAME_BIG_CHANGE = FRAME_GRID[0] * FRAME_GRID[1] // 4
+
+
+@dataclass
+class ScreenFrame:
+    image_b64: str
+    signature: np.ndarray
+    width: int
+    height: int
+
+
+def compute_frame_signature(image: Image.Image) -> np.ndarray:
+    """块平均缩放到 FRAME_GRID 的灰度图（uint8），作为帧签名"""
+    return np.asarray(image.convert('L').resize(FRAME_GRID, Image.BOX), dtype=np.uint8)
+
+
+def frame_difference(a: np.ndarray, b: np.ndarray) -> int:
+    """两个帧签名之间发生变化的块数"""
+    return int(np.count_nonzero(np.abs(a.astype(np.int16) - b) > FRAME_CELL_DIFF))
+
+
+def _decode_frame(image_bytes: bytes) -> Optional[tuple]:
+    """
+    解码一次屏幕帧并计算签名。
+    JPEG 使用 draft 模式按 1/2~1/8 比例解码（DCT 缩放），只解码签名所需的分辨率；
+    load() 会解码整个数据流，损坏的图片在这里失败。
+    """
+    try:
+        image = Image.open(BytesIO(image_bytes))
+        width, height = image.size
+        image.draft('L', (FRAME_GRID[0] * 5, FRAME_GRID[1] * 5))
+        image.load()
+        return compute_frame_signature(image), width, height
+    except Exception as e:
+        logger.warning(f"图片验证失败: {e}")
+        return None
+
+
+class FrameRateController:
+    """
+    屏幕/相机帧的自适应发送控制（每个会话一个）。
+    - 与上次发送的帧相同（变化块数 <= threshold）：跳过，静止画面在一轮对话内只发送一次
+    - 画面变化但距上次发送不足当前间隔：跳过
+    - 持续小幅变化（视频、滚动、打字）每发送一帧，间隔乘以 1.5，直到 max_interval
+    - 大幅变化（>= big_change）或距上次发送已超过 max_interval：间隔恢复为 min_interval
+    """
+
+    def __init__(self, min_interval: float, max_interval: Optional[float] = None,
+                 threshold: int = FRAME_CHANGE_THRESHOLD, big_change: int = FRAME_BIG_CHANGE):
+        self.min_interval = min_interval
+        self.max_interval = max_interval if max_interval is not None else min_interval * 4
+        self.threshold = threshold
+        self.big_change = big_change
+        self.interval = min_interval
+        self._last_signature = None
+        self._last_sent = float('-inf')
+        self.frames = 0
+        self.sent = 0
+        self.unchanged = 0
+        self.throttled = 0
+
+    def should_send(self, signature: Optional[np.ndarray], now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+        elapsed = now - self._last_sent
+        if signature is None:
+            # 没有签名时退化为固定最小间隔
+            if elapsed < self.min_interval:
+                self.throttled += 1
+                return False
+            self._last_sent = now
+            self.sent += 1
+            return True
+
+        if self._last_signature is None:
+            distance = signature.size
+        else:
+            distance = frame_difference(signature, self._last_signature)
+        if distance <= self.threshold:
+            self.unchanged += 1
+            return False
+
+        settled = distance >= self.big_change or elapsed >= self.max_interval
+        if settled:
+            self.interval = self.min_interval
+        if elapsed < self.interval:
+            self.throttled += 1
+            return False
+        if not settled:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        self._last_signature = signature
+        self._last_sent = now
+        self.sent += 1
+        return True
+
+    def new_turn(self) -> None:
+        """新一轮对话开始：忘记上次发送的画面，下一帧不会因“未变化”被跳过"""
+        self._last_signature = None
+        self.interval = self.min_interval
+
+    def stats(self) -> dict:
+        return {
+            'frames': self.frames,
+            'sent': self.sent,
+            'unchanged': self.unchanged,
+            'throttled': self.throttled,
+            'interval': round(self.interval, 3),
+        }
+
+
+class VisionDescriptionCache:
+    """
+    视觉模型描述缓存：以帧签名为键，变化块数在阈值内的画面直接复用已有描述，
+    静止画面不会重复调用视觉模型。LRU 淘汰。
+    """
+
+    def __init__(self, max_entries: int = 64, threshold: int = FRAME_CHANGE_THRESHOLD):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries = OrderedDict()  # signature bytes -> (signature, description)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, signature: Optional[np.ndarray]) -> Optional[str]:
+        if signature is None:
+            return None
+        if not self._entries:
+            self.misses += 1
+            return None
+        key = signature.tobytes()
+        if key not in self._entries:
+            keys = list(self._entries)
+            stacked = np.stack([self._entries[k][0] for k in keys]).astype(np.int16)
+            distances = np.count_nonzero(np.abs(stacked - signature) > FRAME_CELL_DIFF, axis=(1, 2))
+            nearest = int(np.argmin(distances))
+            if distances[nearest] > self.threshold:
+                self.misses += 1
+                return None
+            key = keys[nearest]
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._entries[key][1]
+
+    def put(self, signature: Optional[np.ndarray], description: str) -> None:
+        if signature is None or not description:
+            return
+        key = signature.tobytes()
+        self._entries[key] = (signature, description)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# 进程内共享：会话热切换后仍可复用同一画面的描述
+vision_description_cache = VisionDescriptionCache()
+
+
 def _validate_image_data(image_bytes: bytes) -> Optional[Image.Image]:
     """验证图片数据有效性"""
     try:
@@ -32,12 +205,22 @@ def _validate_image_data(image_bytes: bytes) -> Optional[Image.Image]:
 async def process_screen_data(data: str) -> Optional[str]:
     """
     处理前端发送的屏幕分享数据流
-    前端已统一压缩到720p JPEG，此方法只做验证，不再二次缩放
+    
+    返回: 验证后的base64字符串（不含data:前缀），如果验证失败则返回None
+    """
+    frame = await process_screen_frame(data)
+    return frame.image_b64 if frame else None
+
+
+async def process_screen_frame(data: str) -> Optional[ScreenFrame]:
+    """
+    处理前端发送的屏幕分享数据流
+    前端已统一压缩到720p JPEG，此方法只做验证和帧签名计算（单次降采样解码），不再二次缩放
     
     参数:
         data: 前端发送的屏幕数据，格式为 'data:image/jpeg;base64,...'
     
-    返回: 验证后的base64字符串（不含data:前缀），如果验证失败则返回None
+    返回: ScreenFrame（base64字符串不含data:前缀，附带帧签名），如果验证失败则返回None
     """
     try:
         if not isinstance(data, str) or not data.startswith('data:image/jpeg;base64,'):
@@ -52,15 +235,15 @@ async def process_screen_data(data: str) -> Optional[str]:
         
         img_bytes = base64.b64decode(img_b64)
         
-        image = _validate_image_data(img_bytes)
-        if image is None:
+        decoded = _decode_frame(img_bytes)
+        if decoded is None:
             logger.error("无效的图片数据")
             return None
         
-        w, h = image.size
+        signature, w, h = decoded
         logger.debug(f"屏幕数据验证完成: 尺寸 {w}x{h}")
         
-        return img_b64
+        return ScreenFrame(image_b64=img_b64, signature=signature, width=w, height=h)
             
     except ValueError as ve:
         logger.error(f"Base64解码错误 (屏幕数据): {ve}")